@@ -1,150 +1,628 @@
-import warnings
-warnings.filterwarnings('ignore')
-
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g, stream_with_context
 from flask_cors import CORS
+import functools
+import logging
 import os
 import sys
-import pandas as pd
+import threading
+import time
+import zlib
 import numpy as np
-import joblib
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 
 sys.path.append('src')
 sys.path.append('utils')
 
 try:
-    from preprocess import preprocess_input, clean_dataset, convert_distance_to_numeric, extract_hour
+    from preprocess import convert_distance_to_numeric, extract_hour
+    from preprocess import FEATURE_NAMES, convert_distance_series, extract_hour_series
+    from model_registry import ModelRegistry, file_version
+    from dataset_cache import DatasetCache
+    from history_store import create_history_store
+    from aggregates import OrderAggregates
+    from ingest import ingest_csv
+    from columnar_cache import ColumnarCache, load_cleaned_dataset
+    from compiled_forest import CompiledForest, compiled_path
+    from lookup_table import PredictionTable
+    from restaurant_catalog import RestaurantCatalog, top_k
+    from menu_store import MenuStore
+    from predict_batcher import PredictBatcher
+    from prediction_cache import PredictionCache
+    from fast_json import FastJSONProvider, encode, encode_response
+    from analytics import AnalyticsEngine, ColumnSource, QUERY_PARAMS, parse_query
+    from metrics import MetricsRegistry
+    from profiler import SamplingProfiler, profile_filename
 except ImportError:
-    from utils.preprocess import preprocess_input, clean_dataset, convert_distance_to_numeric, extract_hour
+    from utils.preprocess import convert_distance_to_numeric, extract_hour
+    from utils.preprocess import FEATURE_NAMES, convert_distance_series, extract_hour_series
+    from utils.model_registry import ModelRegistry, file_version
+    from utils.dataset_cache import DatasetCache
+    from utils.history_store import create_history_store
+    from utils.aggregates import OrderAggregates
+    from utils.ingest import ingest_csv
+    from utils.columnar_cache import ColumnarCache, load_cleaned_dataset
+    from utils.compiled_forest import CompiledForest, compiled_path
+    from utils.lookup_table import PredictionTable
+    from utils.restaurant_catalog import RestaurantCatalog, top_k
+    from utils.menu_store import MenuStore
+    from utils.predict_batcher import PredictBatcher
+    from utils.prediction_cache import PredictionCache
+    from utils.fast_json import FastJSONProvider, encode, encode_response
+    from utils.analytics import AnalyticsEngine, ColumnSource, QUERY_PARAMS, parse_query
+    from utils.metrics import MetricsRegistry
+    from utils.profiler import SamplingProfiler, profile_filename
+
+# ORDERLY_LOG_LEVEL=OFF silences the server's own log lines
+LOG_LEVEL = os.environ.get('ORDERLY_LOG_LEVEL', 'INFO').upper()
+logging.basicConfig(level=logging.INFO if LOG_LEVEL == 'OFF' else LOG_LEVEL,
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+if LOG_LEVEL == 'OFF':
+    logging.disable(logging.CRITICAL)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# jsonify and request.get_json use orjson (when installed), which encodes NumPy values natively
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Store prediction history in memory (in production, use a database)
-prediction_history = []
+DATA_DIR = os.environ.get('ORDERLY_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+MODEL_PATH = os.path.join(DATA_DIR, 'food_delivery_model.pkl')
+DATASET_PATH = os.path.join(DATA_DIR, 'dataset.csv')
+
+# Columns of the cleaned dataset /analyze reads from the columnar cache
+ANALYZE_COLUMNS = ['Rating', 'KPT duration (minutes)', 'Distance_numeric', 'Order Status', 'performance_label', 'order_hour',
+                   'City', 'Subzone', 'Rider wait time (minutes)', 'order_day']
+
+# /predict/batch limits: larger requests are rejected, larger responses are streamed
+MAX_BATCH_SIZE = int(os.environ.get('ORDERLY_MAX_BATCH_SIZE', 50000))
+STREAM_THRESHOLD = int(os.environ.get('ORDERLY_STREAM_THRESHOLD', 1000))
+# NDJSON lines sent per chunk of a streamed /predict/batch response
+STREAM_CHUNK_ROWS = 500
+
+# 'full' keeps the cleaned frame in memory; 'stream' reads the CSV in chunks into aggregates only
+INGEST_MODE = os.environ.get('ORDERLY_INGEST_MODE', 'full')
+INGEST_CHUNKSIZE = int(os.environ['ORDERLY_INGEST_CHUNKSIZE']) if os.environ.get('ORDERLY_INGEST_CHUNKSIZE') else None
+INGEST_MAX_RSS_MB = float(os.environ['ORDERLY_INGEST_MAX_RSS_MB']) if os.environ.get('ORDERLY_INGEST_MAX_RSS_MB') else None
+
+# /predict scores through the flat-array forest export unless this is '0'
+COMPILED_FOREST = os.environ.get('ORDERLY_COMPILED_FOREST', '1') != '0'
+
+# Opt-in: serve from the memory-mapped export, shared by all workers through the page
+# cache; the pickle is only loaded for rows with missing values. ORDERLY_LOOKUP_TABLE has no
+# effect then: the table is per-worker memory, and the export is too slow to fill it
+MODEL_MMAP = os.environ.get('ORDERLY_MODEL_MMAP', '0') == '1'
+
+# Opt-in: precompute predict_proba over the discretized feature grid when a model loads
+LOOKUP_TABLE = os.environ.get('ORDERLY_LOOKUP_TABLE', '0') == '1'
+
+# Opt-in: concurrent /predict calls wait up to ORDERLY_BATCH_WAIT_MS to be scored together
+PREDICT_BATCHING = os.environ.get('ORDERLY_PREDICT_BATCHING', '0') == '1'
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get('ORDERLY_BATCH_MAX_SIZE', 64))
+PREDICT_BATCH_WAIT_MS = float(os.environ.get('ORDERLY_BATCH_WAIT_MS', 2.0))
+
+# LRU cache of /predict results per feature tuple and model version; size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get('ORDERLY_PREDICTION_CACHE_SIZE', 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get('ORDERLY_PREDICTION_CACHE_TTL', 300))
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+# (model version, sorted /feature-importance payload)
+feature_importance_cache = None
+
+# Grouped /analyze queries (?group_by=city,day&...) split the dataset into partitions of
+# ORDERLY_ANALYTICS_PARTITION_ROWS and aggregate them on this many processes
+ANALYTICS_WORKERS = int(os.environ.get('ORDERLY_ANALYTICS_WORKERS', os.cpu_count() or 1))
+ANALYTICS_PARTITION_ROWS = int(os.environ.get('ORDERLY_ANALYTICS_PARTITION_ROWS', 500000))
+analytics_engine = AnalyticsEngine(ANALYTICS_WORKERS, ANALYTICS_PARTITION_ROWS)
+# (dataset version, ColumnSource) for the snapshot grouped queries last ran on
+analytics_source = (None, None)
+
+# Cleaned dataset cached as memory-mappable column files, keyed by CSV hash + preprocess version
+column_cache = ColumnarCache(os.path.join(DATA_DIR, 'cache')) if os.environ.get('ORDERLY_COLUMN_CACHE', '1') != '0' else None
+
+# Restaurant catalog, indexed by city, cuisine and grid cell at warm-up
+CATALOG_DIR = os.environ.get('ORDERLY_CATALOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog'))
+restaurant_catalog = None
+restaurant_catalog_lock = threading.Lock()
+# With a customer location and no radius, rank this many nearest vendors
+NEAREST_CANDIDATES = 50
+MAX_SEARCH_RADIUS_KM = 50.0
+# Larger 'limit' values are clamped to this
+MAX_RECOMMENDATIONS = 100
+
+# Vendor menus, pre-encoded per (city, vendor_id) and reloaded when the file changes
+menu_store = MenuStore(
+    os.path.join(CATALOG_DIR, 'menus.json'),
+    check_interval=float(os.environ.get('ORDERLY_MENU_CHECK_INTERVAL', 2.0))
+)
+MENU_MAX_AGE = int(os.environ.get('ORDERLY_MENU_MAX_AGE', 300))
+
+# Prediction history: bounded in-memory ring buffer by default, or SQLite shared across workers
+history_store = create_history_store(
+    os.environ.get('ORDERLY_HISTORY_BACKEND', 'memory'),
+    DATA_DIR,
+    capacity=int(os.environ.get('ORDERLY_HISTORY_CAPACITY', 100000))
+)
+
+# Per-process request and per-stage timings, scraped from /metrics
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram('orderly_request_seconds', 'Request handling time', ['route', 'method', 'status'])
+STAGE_SECONDS = metrics.histogram('orderly_stage_seconds', 'Time spent in each stage of a request', ['route', 'stage'])
+
+def stage(name):
+    """Time a block of the current request under orderly_stage_seconds"""
+    return STAGE_SECONDS.time(request.endpoint, name)
+
+# Opt-in: a request sent with the X-Orderly-Profile header is stack-sampled
+# and the folded stacks are written to ORDERLY_PROFILE_DIR
+PROFILING = os.environ.get('ORDERLY_PROFILING', '0') == '1'
+PROFILE_DIR = os.environ.get('ORDERLY_PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+PROFILE_INTERVAL_MS = float(os.environ.get('ORDERLY_PROFILE_INTERVAL_MS', 1.0))
+
+@app.before_request
+def start_request():
+    g.request_started = time.perf_counter()
+    if PROFILING and request.headers.get('X-Orderly-Profile'):
+        g.profiler = SamplingProfiler(interval_ms=PROFILE_INTERVAL_MS).start()
+
+@app.after_request
+def finish_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or 'unmatched', request.method, response.status_code)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = profile_filename(request.endpoint)
+            with open(os.path.join(PROFILE_DIR, name), 'w') as f:
+                f.write(profiler.folded())
+            response.headers['X-Orderly-Profile'] = name
+            logger.info("Profiled %s: %d samples written to %s", request.path, profiler.samples, name)
+        except OSError as e:
+            logger.error("Error writing profile: %s", e)
+    return response
+
+# Constant bodies are encoded once, not on every request
+HOME_BODY = encode_response({
+    'message': 'Orderly Backend API is running!',
+    'status': 'active',
+    'endpoints': {
+        'predict': '/predict',
+        'predict-batch': '/predict/batch',
+        'analyze': '/analyze',
+        'recommendations': '/recommendations',
+        'customers': '/customers',
+        'feature-importance': '/feature-importance',
+        'metrics': '/metrics',
+        'ready': '/ready'
+    }
+})
 
 @app.route('/', methods=['GET'])
 def home():
     """API status endpoint"""
-    return jsonify({
-        'message': 'Orderly Backend API is running!',
-        'status': 'active',
-        'endpoints': {
-            'predict': '/predict',
-            'analyze': '/analyze', 
-            'recommendations': '/recommendations',
-            'customers': '/customers',
-            'feature-importance': '/feature-importance'
-        }
-    })
+    return Response(HOME_BODY, mimetype='application/json')
 
 # Load and prepare data
-def load_data():
+def dataset_is_cached():
+    """Whether the columnar cache holds the current dataset"""
+    try:
+        return column_cache is not None and column_cache.exists(column_cache.key_for(DATASET_PATH))
+    except Exception:
+        return False
+
+def load_data(columns=None):
     """Load and preprocess the dataset"""
     try:
-        import os
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        csv_path = os.path.join(current_dir, 'data', 'dataset.csv')
-        df = pd.read_csv(csv_path)
-        df = clean_dataset(df)
-        return df
+        return load_cleaned_dataset(DATASET_PATH, column_cache, columns)
     except Exception as e:
-        print(f"Error loading data: {e}")
+        logger.error("Error loading data: %s", e)
         return None
 
-# Load or train model
-def get_model():
-    """Load existing model or train new one"""
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(current_dir, 'data', 'food_delivery_model.pkl')
-    
-    if os.path.exists(model_path):
-        return joblib.load(model_path)
+def ingest_data():
+    """Stream the dataset in compact chunks without holding the raw frame"""
+    try:
+        result = ingest_csv(DATASET_PATH, chunksize=INGEST_CHUNKSIZE, max_rss_mb=INGEST_MAX_RSS_MB)
+        logger.info("Ingested %d records in %d chunks (peak RSS %.0f MiB)", result.rows, result.chunks, result.peak_rss_mb)
+        return result
+    except Exception as e:
+        logger.error("Error ingesting data: %s", e)
+        return None
+
+def build_dataset_snapshot():
+    """Load the dataset and compute the /analyze aggregates"""
+    if INGEST_MODE == 'stream' and not dataset_is_cached():
+        result = ingest_data()
+        if result is None or result.rows == 0:
+            return None
+        return None, result.aggregates
     
-    # Train new model
-    df = load_data()
+    df = load_data(ANALYZE_COLUMNS)
     if df is None or len(df) == 0:
-        print("No data available for training")
         return None
+    return df, OrderAggregates.from_frame(df)
+
+# Model is loaded once per process and hot-swapped when the pickle changes.
+# The server never trains: artifacts are produced offline by train.py.
+model_registry = ModelRegistry(
+    MODEL_PATH,
+    check_interval=float(os.environ.get('ORDERLY_MODEL_CHECK_INTERVAL', 2.0))
+)
+
+def get_model():
+    """Return the in-memory model, or None if no artifact has been trained"""
+    return model_registry.get()
+
+# (model, CompiledForest) for the model the registry last handed out
+compiled_forest = (None, None)
+# The export read straight from disk at warm-up, so /predict can score before
+# the pickle (and with it sklearn) has been loaded
+startup_forest = None
+startup_forest_version = None
+
+def get_compiled_forest(model):
+    """Flat-array export of model for the /predict fast path, or None"""
+    global compiled_forest
+    if not COMPILED_FOREST or model is None:
+        return None
+    if compiled_forest[0] is model:
+        return compiled_forest[1]
     
+    forest = None
     try:
-        # Prepare features
-        feature_cols = ['Distance_numeric', 'KPT duration (minutes)', 'Rider wait time (minutes)', 'order_hour']
-        X = df[feature_cols].fillna(0)
-        y = df['performance_label']
-        
-        # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X, y)
-        
-        # Save model
-        joblib.dump(model, model_path)
-        print(f"Model trained and saved to {model_path}")
-        return model
+        # Prefer the export train.py wrote; compile in-process if it is missing or stale
+        path = compiled_path(MODEL_PATH)
+        if startup_forest is not None and startup_forest.matches(model):
+            forest = startup_forest
+        elif os.path.exists(path):
+            forest = CompiledForest.load(path)
+            if not forest.matches(model):
+                forest = None
+        if forest is None:
+            forest = CompiledForest.from_model(model)
+    except Exception as e:
+        logger.error("Error compiling model: %s", e)
+    compiled_forest = (model, forest)
+    return forest
+
+# With ORDERLY_MODEL_MMAP the export is mapped, not copied, and re-mapped when train.py publishes a new one
+export_registry = ModelRegistry(
+    compiled_path(MODEL_PATH),
+    loader=functools.partial(CompiledForest.load, mmap=True),
+    check_interval=float(os.environ.get('ORDERLY_MODEL_CHECK_INTERVAL', 2.0))
+) if MODEL_MMAP else None
+
+def get_predictor():
+    """(model, compiled forest, version) for /predict.
+
+    Until warm-up has loaded the pickle, model is None and the forest is the
+    export read at startup; with no export, this loads the model itself.
+    With ORDERLY_MODEL_MMAP, model stays None and the forest is the mapped export.
+    version identifies the artifact the answer comes from, for the cache.
+    """
+    if export_registry is not None:
+        forest = export_registry.get()
+        if forest is not None:
+            return None, forest, ('export', export_registry.version)
+    if model_registry.loaded or startup_forest is None:
+        model = get_model()
+        return model, get_compiled_forest(model), model_registry.version
+    return None, startup_forest, ('export', startup_forest_version)
+
+# (model, PredictionTable) once the table for that model has been built
+prediction_table = (None, None)
+prediction_table_lock = threading.Lock()
+prediction_table_worker = None
+
+def build_prediction_table(model):
+    """Fill the lookup table for model (runs on a background thread)"""
+    global prediction_table
+    try:
+        table = PredictionTable.build(model.predict_proba, model.classes_)
+        prediction_table = (model, table)
+        logger.info("Built prediction table: %d grid points, %.1f MiB in %.2fs",
+                    int(np.prod(table.shape)), table.nbytes / 2 ** 20, table.build_seconds)
     except Exception as e:
-        print(f"Error training model: {e}")
+        logger.error("Error building prediction table: %s", e)
+        prediction_table = (model, None)
+
+def get_prediction_table(model):
+    """Lookup table for model, or None while it is disabled or still building"""
+    global prediction_table_worker
+    if not LOOKUP_TABLE or model is None:
         return None
+    if prediction_table[0] is model:
+        return prediction_table[1]
+    
+    # Requests keep using the model until the build for it has finished
+    with prediction_table_lock:
+        worker = prediction_table_worker
+        if worker is None or not worker.is_alive():
+            if prediction_table[0] is not model:
+                prediction_table_worker = threading.Thread(
+                    target=build_prediction_table, args=(model,), name='prediction-table', daemon=True)
+                prediction_table_worker.start()
+    return None
+
+def score_rows(model, X):
+    """Labels and class probabilities for a matrix of feature rows.
+
+    model may be a CompiledForest on its own (the export, before or instead
+    of the pickle); rows with missing values then load the pickle.
+    """
+    forest = model if isinstance(model, CompiledForest) else get_compiled_forest(model)
+    if forest is not None and np.isfinite(X).all():
+        probabilities = forest.predict_proba(X)
+        return forest.classes.take(np.argmax(probabilities, axis=1)), probabilities
+    if isinstance(model, CompiledForest):
+        model = get_model()
+        if model is None:
+            raise RuntimeError('Model not available')
+    return predict_with_proba(model, X)
+
+predict_batcher = PredictBatcher(score_rows, PREDICT_BATCH_MAX_SIZE, PREDICT_BATCH_WAIT_MS) if PREDICT_BATCHING else None
+
+# Cleaned dataset and /analyze aggregates, rebuilt in the background when the CSV changes
+dataset_cache = DatasetCache(
+    DATASET_PATH,
+    build=build_dataset_snapshot,
+    check_interval=float(os.environ.get('ORDERLY_DATASET_CHECK_INTERVAL', 2.0))
+)
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Predict restaurant performance"""
     try:
-        data = request.json
+        with stage('parse'):
+            data = request.json
         
         # Extract features
-        features = {
-            'Distance_numeric': convert_distance_to_numeric(data.get('Distance', '1km')),
-            'KPT duration (minutes)': float(data.get('KPT_duration', 15)),
-            'Rider wait time (minutes)': float(data.get('Rider_wait_time', 5)),
-            'order_hour': extract_hour(data.get('Order_time', '12:00 PM'))
-        }
+        with stage('features'):
+            try:
+                features = {
+                    'Distance_numeric': convert_distance_to_numeric(data.get('Distance', '1km')),
+                    'KPT duration (minutes)': number_field(data, 'KPT_duration', 15),
+                    'Rider wait time (minutes)': number_field(data, 'Rider_wait_time', 5),
+                    'order_hour': extract_hour(data.get('Order_time', '12:00 PM'))
+                }
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        model = get_model()
-        if model is None:
+        with stage('model'):
+            model, forest, version = get_predictor()
+        if model is None and forest is None:
             return jsonify({'error': 'Model not available'}), 500
         
-        # Make prediction with proper feature names
-        import warnings
-        warnings.filterwarnings('ignore')
+        row = [features['Distance_numeric'], features['KPT duration (minutes)'], 
+               features['Rider wait time (minutes)'], features['order_hour']]
         
-        feature_names = ['Distance_numeric', 'KPT duration (minutes)', 'Rider wait time (minutes)', 'order_hour']
-        X = pd.DataFrame([[features['Distance_numeric'], features['KPT duration (minutes)'], 
-                          features['Rider wait time (minutes)'], features['order_hour']]], 
-                         columns=feature_names)
-        
-        prediction = model.predict(X)[0]
-        probability = model.predict_proba(X)[0]
+        # NaN never equals itself, so only finite rows can be cached
+        key = tuple(float(v) for v in row) if prediction_cache is not None and np.isfinite(row).all() else None
+        with stage('inference'):
+            cached = prediction_cache.get(key, version) if key is not None else None
+            table = get_prediction_table(model) if cached is None else None
+            hit = table.lookup(row) if table is not None else None
+            if cached is not None:
+                prediction, probability = cached
+            elif hit is not None:
+                prediction, probability = hit
+            elif predict_batcher is not None and (model is not None or np.isfinite(row).all()):
+                prediction, probability = predict_batcher.submit(model if model is not None else forest, row)
+            elif forest is not None and np.isfinite(row).all():
+                prediction, probability = forest.predict_one(row)
+            else:
+                # sklearn routes missing values its own way; keep it for NaN inputs
+                if model is None:
+                    model = get_model()
+                if model is None:
+                    return jsonify({'error': 'Model not available'}), 500
+                labels, probabilities = predict_with_proba(model, [row])
+                prediction = labels[0]
+                probability = probabilities[0]
+            if key is not None and cached is None:
+                prediction_cache.put(key, version, (prediction, probability))
         
         # Store prediction in history
-        prediction_record = {
-            'distance': features['Distance_numeric'],
-            'kpt_duration': features['KPT duration (minutes)'],
-            'rider_wait_time': features['Rider wait time (minutes)'],
-            'order_hour': features['order_hour'],
-            'predicted_performance': int(prediction),
-            'confidence': float(max(probability))
-        }
-        prediction_history.append(prediction_record)
+        with stage('history'):
+            prediction_record = {
+                'distance': features['Distance_numeric'],
+                'kpt_duration': features['KPT duration (minutes)'],
+                'rider_wait_time': features['Rider wait time (minutes)'],
+                'order_hour': features['order_hour'],
+                'predicted_performance': int(prediction),
+                'confidence': float(max(probability))
+            }
+            history_store.append(prediction_record)
         
-        return jsonify({
-            'predicted_label': int(prediction),
-            'performance': 'Good' if prediction == 1 else 'Poor',
-            'confidence': float(max(probability)),
-            'probability_good': float(probability[1]) if len(probability) > 1 else 0.5
-        })
+        with stage('serialize'):
+            return jsonify({
+                'predicted_label': int(prediction),
+                'performance': 'Good' if prediction == 1 else 'Poor',
+                'confidence': float(max(probability)),
+                'probability_good': float(probability[1]) if len(probability) > 1 else 0.5
+            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def predict_with_proba(model, X):
+    """Score X with a single predict_proba pass and derive labels from it"""
+    # Hand sklearn the rows the way the model was fitted: named columns or a plain array
+    if getattr(model, 'feature_names_in_', None) is not None:
+        import pandas as pd
+        X = pd.DataFrame(X, columns=FEATURE_NAMES)
+    else:
+        X = np.asarray(X, dtype=float)
+    probabilities = model.predict_proba(X)
+    labels = model.classes_.take(np.argmax(probabilities, axis=1))
+    return labels, probabilities
+
+def parse_batch_orders():
+    """Read a JSON array (or {"orders": [...]}) or NDJSON request body"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        body = request.get_data(as_text=True)
+        return [app.json.loads(line) for line in body.splitlines() if line.strip()]
+    
+    data = request.get_json(force=True)
+    if isinstance(data, dict):
+        data = data.get('orders')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of orders')
+    return data
+
+def number_column(orders, name, default):
+    """orders' name fields as a float array; raises ValueError naming the first order without a finite number"""
+    values = [o.get(name, default) for o in orders]
+    try:
+        column = np.asarray(values, dtype=float)
+        if np.isfinite(column).all():
+            return column
+    except (TypeError, ValueError):
+        pass
+    for i, order in enumerate(orders):
+        try:
+            number_field(order, name, default)
+        except ValueError as e:
+            raise ValueError(f"orders[{i}].{e}")
+
+def build_batch_features(orders):
+    """Build the feature frame for many orders, parsing columns in bulk"""
+    import pandas as pd
+    return pd.DataFrame({
+        'Distance_numeric': convert_distance_series([o.get('Distance', '1km') for o in orders]).to_numpy(),
+        'KPT duration (minutes)': number_column(orders, 'KPT_duration', 15),
+        'Rider wait time (minutes)': number_column(orders, 'Rider_wait_time', 5),
+        'order_hour': extract_hour_series([o.get('Order_time', '12:00 PM') for o in orders]).to_numpy()
+    }, columns=FEATURE_NAMES)
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict restaurant performance for many orders at once"""
+    try:
+        with stage('parse'):
+            orders = parse_batch_orders()
+        if len(orders) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: {len(orders)} orders (max {MAX_BATCH_SIZE})'}), 413
+        if not all(isinstance(o, dict) for o in orders):
+            return jsonify({'error': 'Each order must be a JSON object'}), 400
+        with stage('features'):
+            X = build_batch_features(orders)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        with stage('model'):
+            model, forest, _ = get_predictor()
+        if model is None and forest is None:
+            return jsonify({'error': 'Model not available'}), 500
+        
+        if len(X) == 0:
+            return jsonify({'predictions': [], 'count': 0})
+        
+        with stage('inference'):
+            if model is None:
+                labels, probabilities = score_rows(forest, X.to_numpy(dtype=float))
+            else:
+                labels, probabilities = predict_with_proba(model, X)
+            confidence = probabilities.max(axis=1)
+            if probabilities.shape[1] > 1:
+                probability_good = probabilities[:, 1]
+            else:
+                probability_good = np.full(len(X), 0.5)
+        
+        # Store predictions in history
+        with stage('history'):
+            history_store.extend({
+                'distance': X['Distance_numeric'].to_numpy(),
+                'kpt_duration': X['KPT duration (minutes)'].to_numpy(),
+                'rider_wait_time': X['Rider wait time (minutes)'].to_numpy(),
+                'order_hour': X['order_hour'].to_numpy(),
+                'predicted_performance': labels.astype(int),
+                'confidence': confidence
+            })
+        
+        results = ({
+            'predicted_label': int(label),
+            'performance': 'Good' if label == 1 else 'Poor',
+            'confidence': conf,
+            'probability_good': good
+        } for label, conf, good in zip(labels.tolist(), confidence.tolist(), probability_good.tolist()))
+        
+        wants_ndjson = 'application/x-ndjson' in request.headers.get('Accept', '')
+        if wants_ndjson or len(X) > STREAM_THRESHOLD:
+            def generate():
+                chunk = []
+                for result in results:
+                    chunk.append(encode(result))
+                    if len(chunk) == STREAM_CHUNK_ROWS:
+                        yield b'\n'.join(chunk) + b'\n'
+                        chunk = []
+                if chunk:
+                    yield b'\n'.join(chunk) + b'\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        with stage('serialize'):
+            return jsonify({'predictions': list(results), 'count': len(X)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_analytics_source(snapshot):
+    """Columns of the snapshot's dataset for grouped queries, read from the columnar cache when possible"""
+    global analytics_source
+    if analytics_source[0] == snapshot.version:
+        return analytics_source[1]
+    
+    source = None
+    if dataset_is_cached():
+        try:
+            source = ColumnSource.from_cache(column_cache.cache_dir, column_cache.key_for(DATASET_PATH))
+        except Exception as e:
+            logger.error("Error reading column cache: %s", e)
+    if source is None:
+        if snapshot.frame is None:
+            return None
+        source = ColumnSource.from_frame(snapshot.frame)
+    analytics_source = (snapshot.version, source)
+    return source
+
+def analyze_groups(snapshot):
+    """Grouped and filtered /analyze query over the dataset"""
+    try:
+        query = parse_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if snapshot is None:
+        return jsonify({'error': 'Analytics data is loading', 'status': 'warming'}), 503, {'Retry-After': '2'}
+    if snapshot.aggregates is None:
+        return jsonify({'error': 'No data available', 'group_by': query.group_by, 'groups': [], 'total_orders': 0})
+    source = get_analytics_source(snapshot)
+    if source is None:
+        # Streamed ingestion keeps only the totals plain /analyze serves, not the rows
+        return jsonify({
+            'error': 'Grouped /analyze queries need the dataset rows: build the column cache '
+                     '(python build_cache.py) or set ORDERLY_INGEST_MODE=full',
+            'status': 'unsupported'
+        }), 503
+    
+    with stage('aggregate'):
+        try:
+            body = analytics_engine.run(source, query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    with stage('serialize'):
+        return jsonify(body)
+
 @app.route('/analyze', methods=['GET'])
 def analyze():
     """Get analytics insights"""
     try:
-        df = load_data()
-        if df is None or len(df) == 0:
-            return jsonify({
+        with stage('snapshot'):
+            snapshot = dataset_cache.get()
+        if any(name in request.args for name in QUERY_PARAMS):
+            return analyze_groups(snapshot)
+        if snapshot is None or snapshot.aggregates is None:
+            body = {
                 'error': 'No data available',
                 'summary': {
                     'avg_rating': 0,
@@ -155,384 +633,375 @@ def analyze():
                 'performance_distribution': {0: 0, 1: 0},
                 'peak_hours': {},
                 'total_orders': 0
-            })
+            }
+            if snapshot is None:
+                # First load is still running in the background
+                body['error'] = 'Analytics data is loading'
+                body['status'] = 'warming'
+                return jsonify(body), 503, {'Retry-After': '2'}
+            return jsonify(body)
         
-        print(f"Loaded {len(df)} records")
-        print(f"Columns: {df.columns.tolist()}")
+        stats = snapshot.aggregates
+        avg_rating = stats.avg_rating
+        delivery_success_rate = stats.delivery_success_rate
         
         # If we have prediction history, combine with dataset
-        if prediction_history:
-            # Create DataFrame from predictions
-            pred_df = pd.DataFrame(prediction_history)
-            
-            # Calculate metrics from both dataset and predictions
-            avg_rating = df['Rating'].fillna(0).mean()
-            
-            # Combine KPT duration from dataset and predictions
-            all_kpt = list(df['KPT duration (minutes)'].fillna(0)) + [p['kpt_duration'] for p in prediction_history]
-            avg_kpt = np.mean(all_kpt)
-            
-            # Combine distance from dataset and predictions
-            all_distance = list(df['Distance_numeric'].fillna(0)) + [p['distance'] for p in prediction_history]
-            avg_distance = np.mean(all_distance)
-            
-            delivery_success_rate = (df['Order Status'] == 'Delivered').mean() * 100
-            
-            # Performance distribution (dataset + predictions)
-            dataset_perf = df['performance_label'].value_counts().to_dict()
-            pred_perf = pred_df['predicted_performance'].value_counts().to_dict()
-            
-            performance_dist = {}
-            for key in [0, 1]:
-                performance_dist[key] = dataset_perf.get(key, 0) + pred_perf.get(key, 0)
-            
-            # Peak hours (dataset + predictions)
-            dataset_hours = df.groupby('order_hour').size().to_dict()
-            pred_hours = pred_df.groupby('order_hour').size().to_dict()
-            
-            peak_hours = {}
-            all_hours = set(list(dataset_hours.keys()) + list(pred_hours.keys()))
-            for hour in all_hours:
-                peak_hours[hour] = dataset_hours.get(hour, 0) + pred_hours.get(hour, 0)
+        with stage('aggregate'):
+            predictions = history_store.aggregates()
+            if predictions.count:
+                total_orders = stats.count + predictions.count
                 
-            total_orders = len(df) + len(prediction_history)
-        else:
-            # Use only dataset
-            avg_rating = df['Rating'].fillna(0).mean()
-            avg_kpt = df['KPT duration (minutes)'].fillna(0).mean()
-            avg_distance = df['Distance_numeric'].fillna(0).mean()
-            delivery_success_rate = (df['Order Status'] == 'Delivered').mean() * 100
-            
-            # Performance distribution
-            performance_dist = df['performance_label'].value_counts().to_dict()
-            
-            # Peak hours analysis
-            peak_hours = df.groupby('order_hour').size().to_dict()
-            
-            total_orders = len(df)
+                # Combine KPT duration and distance from dataset and predictions
+                avg_kpt = np.float64(stats.kpt_sum + predictions.kpt_sum) / total_orders
+                avg_distance = np.float64(stats.distance_sum + predictions.distance_sum) / total_orders
+                
+                # Performance distribution (dataset + predictions)
+                performance_dist = {}
+                for key in [0, 1]:
+                    performance_dist[key] = stats.performance.get(key, 0) + predictions.performance.get(key, 0)
+                
+                # Peak hours (dataset + predictions)
+                peak_hours = dict(stats.hours)
+                for hour, count in predictions.hours.items():
+                    peak_hours[hour] = peak_hours.get(hour, 0) + count
+            else:
+                # Use only dataset (precomputed when the cache was built)
+                avg_kpt = stats.avg_kpt
+                avg_distance = stats.avg_distance
+                performance_dist = stats.performance
+                peak_hours = stats.hours
+                total_orders = stats.count
         
-        return jsonify({
-            'summary': {
-                'avg_rating': round(avg_rating, 2) if not pd.isna(avg_rating) else 0,
-                'avg_kpt_duration': round(avg_kpt, 2) if not pd.isna(avg_kpt) else 0,
-                'avg_distance': round(avg_distance, 2) if not pd.isna(avg_distance) else 0,
-                'delivery_success_rate': round(delivery_success_rate, 2) if not pd.isna(delivery_success_rate) else 0
-            },
-            'performance_distribution': performance_dist,
-            'peak_hours': peak_hours,
-            'total_orders': total_orders,
-            'predictions_made': len(prediction_history)
-        })
+        with stage('serialize'):
+            return jsonify({
+                'summary': {
+                    'avg_rating': round(avg_rating, 2) if not np.isnan(avg_rating) else 0,
+                    'avg_kpt_duration': round(avg_kpt, 2) if not np.isnan(avg_kpt) else 0,
+                    'avg_distance': round(avg_distance, 2) if not np.isnan(avg_distance) else 0,
+                    'delivery_success_rate': round(delivery_success_rate, 2) if not np.isnan(delivery_success_rate) else 0
+                },
+                'performance_distribution': performance_dist,
+                'peak_hours': peak_hours,
+                'total_orders': total_orders,
+                'predictions_made': predictions.count
+            })
     except Exception as e:
-        print(f"Error in analyze: {e}")
+        logger.error("Error in analyze: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/feature-importance', methods=['GET'])
 def feature_importance():
     """Get model feature importance"""
     try:
-        model = get_model()
-        if model is None:
-            return jsonify({'error': 'Model not available'}), 500
+        model, forest, version = get_predictor()
+        if model is None and (forest is None or forest.importances is None):
+            # Exports written before they carried the importances need the pickle
+            model, version = get_model(), model_registry.version
+            if model is None:
+                return jsonify({'error': 'Model not available'}), 500
         
-        feature_names = ['Distance', 'KPT Duration', 'Rider Wait Time', 'Order Hour']
-        importances = model.feature_importances_
-        
-        feature_imp = [{
-            'feature': name,
-            'importance': float(imp)
-        } for name, imp in zip(feature_names, importances)]
-        
-        # Sort by importance
-        feature_imp.sort(key=lambda x: x['importance'], reverse=True)
+        # Importances only change with the model, so compute them once per version
+        global feature_importance_cache
+        if feature_importance_cache is None or feature_importance_cache[0] != version:
+            feature_names = ['Distance', 'KPT Duration', 'Rider Wait Time', 'Order Hour']
+            importances = model.feature_importances_ if model is not None else forest.importances
+            
+            feature_imp = [{
+                'feature': name,
+                'importance': float(imp)
+            } for name, imp in zip(feature_names, importances)]
+            
+            # Sort by importance
+            feature_imp.sort(key=lambda x: x['importance'], reverse=True)
+            feature_importance_cache = (version, feature_imp)
         
-        return jsonify(feature_imp)
+        return jsonify(feature_importance_cache[1])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
     """Get current prediction statistics"""
-    return jsonify({
-        'total_predictions': len(prediction_history),
-        'recent_predictions': prediction_history[-10:] if prediction_history else []
-    })
+    stats = {
+        'total_predictions': len(history_store),
+        'recent_predictions': history_store.recent(10)
+    }
+    if predict_batcher is not None:
+        stats['batching'] = predict_batcher.stats()
+    if prediction_cache is not None:
+        stats['prediction_cache'] = prediction_cache.stats()
+    return jsonify(stats)
+
+def int_field(data, name, default, minimum):
+    """data[name] as an int no smaller than minimum; raises ValueError naming the field"""
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+def float_field(data, name):
+    """data[name] as a finite float, or None when absent; raises ValueError naming the field"""
+    value = data.get(name)
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not np.isfinite(number):
+        raise ValueError(f"{name} must be a number")
+    return number
+
+def number_field(data, name, default):
+    """data[name] (default when absent) as a finite float; raises ValueError naming the field"""
+    value = data.get(name, default)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = np.nan
+    if not np.isfinite(number):
+        raise ValueError(f"{name} must be a number")
+    return number
+
+def get_restaurant_catalog():
+    """The restaurant catalog, read on first use (warm-up loads it ahead of requests)"""
+    global restaurant_catalog
+    if restaurant_catalog is None:
+        with restaurant_catalog_lock:
+            if restaurant_catalog is None:
+                restaurant_catalog = RestaurantCatalog.load(os.path.join(CATALOG_DIR, 'restaurants.csv'))
+    return restaurant_catalog
 
 @app.route('/recommendations', methods=['POST'])
 def get_recommendations():
     """Get restaurant recommendations based on customer data"""
     try:
-        data = request.json
-        print(f"Received recommendation request: {data}")
+        with stage('parse'):
+            data = request.json
+            if not isinstance(data, dict):
+                raise ValueError('Expected a JSON object')
+        logger.debug("Received recommendation request: %s", data)
         
         # Extract customer features
-        age = int(data.get('age', 25))
+        age = int_field(data, 'age', 25, 0)
         gender = data.get('gender', 'M')
         city = data.get('city', 'Haridwar')
-        print(f"Processing for: age={age}, gender={gender}, city={city}")
+        logger.debug("Processing for: age=%s, gender=%s, city=%s", age, gender, city)
         
-        # City-based restaurant recommendations (6 states, 2 cities each)
-        city_restaurants = {
-            # Uttarakhand
-            'Dehradun': [
-                {'name': 'BlackPepper Restaurant', 'cuisine': 'North Indian', 'rating': 4.6, 'distance': 1.2},
-                {'name': 'Kalsang Cafe & Restaurant', 'cuisine': 'Cafe', 'rating': 4.4, 'distance': 1.5},
-                {'name': 'Walk In Woods', 'cuisine': 'North Indian', 'rating': 4.6, 'distance': 1.8},
-                {'name': 'Ellora Restaurant', 'cuisine': 'Multi-cuisine', 'rating': 4.3, 'distance': 2.1},
-                {'name': 'Clock Tower Cafe', 'cuisine': 'Italian', 'rating': 4.2, 'distance': 1.9}
-            ],
-            'Haridwar': [
-                {'name': 'Hoshiyarpuri', 'cuisine': 'North Indian', 'rating': 4.1, 'distance': 0.8},
-                {'name': 'Dilliwasi Fine Dine Restaurant', 'cuisine': 'Family Restaurant', 'rating': 4.8, 'distance': 1.2},
-                {'name': 'Masala Club', 'cuisine': 'North Indian', 'rating': 4.4, 'distance': 1.5},
-                {'name': 'Ganga Aarti Restaurant', 'cuisine': 'Traditional', 'rating': 4.3, 'distance': 1.0},
-                {'name': 'Chotiwala Restaurant', 'cuisine': 'Vegetarian', 'rating': 4.5, 'distance': 1.8}
-            ],
-
-            
-            # Delhi
-            'New Delhi': [
-                {'name': 'Indian Accent', 'cuisine': 'Fine Dining', 'rating': 4.7, 'distance': 2.5},
-                {'name': 'Tamra Restaurant', 'cuisine': 'Buffet Restaurant', 'rating': 4.4, 'distance': 1.8},
-                {'name': 'Bukhara', 'cuisine': 'North Indian', 'rating': 4.5, 'distance': 3.2},
-                {'name': 'Paranthe Wali Gali', 'cuisine': 'North Indian', 'rating': 4.4, 'distance': 2.1},
-                {'name': 'Karim\'s', 'cuisine': 'Mughlai', 'rating': 4.6, 'distance': 2.8}
-            ],
-            'Central Delhi': [
-                {'name': 'CP Central Cafe', 'cuisine': 'Continental', 'rating': 4.3, 'distance': 1.5},
-                {'name': 'Rajdhani Thali House', 'cuisine': 'Gujarati', 'rating': 4.4, 'distance': 1.8},
-                {'name': 'Wenger Bakery CP', 'cuisine': 'Bakery', 'rating': 4.2, 'distance': 1.2},
-                {'name': 'Embassy Fine Dining', 'cuisine': 'North Indian', 'rating': 4.1, 'distance': 2.0},
-                {'name': 'Nirula Corner', 'cuisine': 'Fast Food', 'rating': 4.0, 'distance': 1.6}
-            ],
-
-            
-            # Maharashtra
-            'Mumbai': [
-                {'name': 'Ziya The Oberoi', 'cuisine': 'North Indian', 'rating': 4.5, 'distance': 2.1},
-                {'name': 'Masala Library by Jiggs Kalra', 'cuisine': 'North Indian', 'rating': 4.5, 'distance': 1.8},
-                {'name': 'The Bombay Canteen', 'cuisine': 'Modern Indian', 'rating': 4.5, 'distance': 1.5},
-                {'name': 'Trishna', 'cuisine': 'Seafood', 'rating': 4.7, 'distance': 2.4},
-                {'name': 'Leopold Cafe', 'cuisine': 'Continental', 'rating': 4.3, 'distance': 1.9}
-            ],
-            'Pune': [
-                {'name': 'Malaka Spice', 'cuisine': 'Thai Restaurant', 'rating': 4.3, 'distance': 1.8},
-                {'name': 'The Sassy Spoon', 'cuisine': 'Restaurant', 'rating': 4.4, 'distance': 1.5},
-                {'name': 'Le Plaisir', 'cuisine': 'European Restaurant', 'rating': 4.4, 'distance': 2.1},
-                {'name': 'Vaishali FC Road', 'cuisine': 'South Indian', 'rating': 4.4, 'distance': 1.3},
-                {'name': 'German Bakery Koregaon', 'cuisine': 'Continental', 'rating': 4.2, 'distance': 1.6}
-            ],
-
-            
-            # Karnataka
-            'Bangalore': [
-                {'name': 'Karavalli', 'cuisine': 'South Indian', 'rating': 4.6, 'distance': 1.5},
-                {'name': 'Oota Bangalore', 'cuisine': 'Karnataka', 'rating': 4.3, 'distance': 2.1},
-                {'name': 'The Only Place', 'cuisine': 'Steak House', 'rating': 4.2, 'distance': 1.8},
-                {'name': 'Byg Brewski Brewing Company', 'cuisine': 'Brew Pub', 'rating': 4.4, 'distance': 2.3},
-                {'name': 'Bengaluru Oota Company', 'cuisine': 'Fusion', 'rating': 4.3, 'distance': 1.2}
-            ],
-            'Mysore': [
-                {'name': 'The Old House', 'cuisine': 'Vegetarian', 'rating': 4.3, 'distance': 1.2},
-                {'name': 'Vinayaka Mylari', 'cuisine': 'Restaurant', 'rating': 4.2, 'distance': 1.6},
-                {'name': 'Infinit Mysore', 'cuisine': 'Asian Fusion', 'rating': 4.1, 'distance': 1.9},
-                {'name': 'Hotel RRR', 'cuisine': 'Andhra', 'rating': 4.3, 'distance': 1.1},
-                {'name': 'Mylari Dosa Corner', 'cuisine': 'South Indian', 'rating': 4.5, 'distance': 2.0}
-            ],
-
-            
-            # Tamil Nadu
-            'Chennai': [
-                {'name': 'Dakshin', 'cuisine': 'South Indian', 'rating': 4.6, 'distance': 1.3},
-                {'name': 'Jamavar', 'cuisine': 'North Indian', 'rating': 4.7, 'distance': 1.8},
-                {'name': 'Paati Veedu', 'cuisine': 'Fine Dining', 'rating': 4.2, 'distance': 2.5},
-                {'name': 'Avartana', 'cuisine': 'South Indian', 'rating': 4.8, 'distance': 2.1},
-                {'name': 'Southern Spice', 'cuisine': 'South Indian', 'rating': 4.5, 'distance': 1.9}
-            ],
-            'Coimbatore': [
-                {'name': 'WelcomCafe Kovai', 'cuisine': 'Buffet Restaurant', 'rating': 4.4, 'distance': 1.2},
-                {'name': 'Latest Recipe', 'cuisine': 'Multi-cuisine', 'rating': 4.3, 'distance': 1.5},
-                {'name': 'Shree Anandhaas', 'cuisine': 'Vegetarian', 'rating': 4.2, 'distance': 1.8},
-                {'name': 'Annapoorna Kovai', 'cuisine': 'South Indian', 'rating': 4.4, 'distance': 1.6},
-                {'name': 'Kongu Nadu Mess', 'cuisine': 'Tamil', 'rating': 4.3, 'distance': 2.0}
-            ],
-            
-            # Uttar Pradesh
-            'Lucknow': [
-                {'name': 'Tunday Kababi', 'cuisine': 'Kebab Shop', 'rating': 4.2, 'distance': 1.4},
-                {'name': 'Milan A Speciality Restaurant', 'cuisine': 'Restaurant', 'rating': 4.8, 'distance': 1.2},
-                {'name': 'Baati Chokha Restaurant', 'cuisine': 'North Indian', 'rating': 4.3, 'distance': 1.8},
-                {'name': 'Dastarkhwan', 'cuisine': 'Mughlai', 'rating': 4.4, 'distance': 2.0},
-                {'name': 'Idris Biryani', 'cuisine': 'Biryani', 'rating': 4.5, 'distance': 1.6}
-            ],
-            'Agra': [
-                {'name': 'The Salt Cafe Kitchen & Bar', 'cuisine': 'Restaurant', 'rating': 4.6, 'distance': 1.3},
-                {'name': '2nd Wife Fine Dining', 'cuisine': 'North Indian', 'rating': 4.6, 'distance': 1.5},
-                {'name': 'Daawat-e-Nawab', 'cuisine': 'Restaurant', 'rating': 4.4, 'distance': 1.8},
-                {'name': 'Pinch of Spice', 'cuisine': 'North Indian', 'rating': 4.4, 'distance': 1.2},
-                {'name': 'Petha Ghar', 'cuisine': 'Sweets', 'rating': 4.2, 'distance': 1.1}
-            ]
-        }
+        cuisine = data.get('cuisine')
+        k = min(int_field(data, 'limit', 5, 1), MAX_RECOMMENDATIONS)
         
-        restaurants = city_restaurants.get(city, [
-            {'name': 'Local Restaurant', 'cuisine': 'Multi-cuisine', 'rating': 4.0, 'distance': 1.5},
-            {'name': 'City Kitchen', 'cuisine': 'Traditional', 'rating': 4.1, 'distance': 1.8},
-            {'name': 'Regional Dhaba', 'cuisine': 'North Indian', 'rating': 4.2, 'distance': 1.2}
-        ])
+        # Jitter comes from a per-request generator, seeded by the request or the customer profile
+        seed = int_field(data, 'seed', None, 0) if data.get('seed') is not None else None
         
-        # Generate recommendations with AI-like scoring
-        recommendations = []
-        for i, rest in enumerate(restaurants):
-            # Calculate probability based on rating, distance, and user preferences
-            rating_score = rest['rating'] / 5.0
-            distance_score = max(0, 1 - (rest['distance'] / 5.0))
-            age_preference = 0.9 if int(age) < 30 else 0.8
-            
-            probability = (rating_score * 0.4 + distance_score * 0.4 + age_preference * 0.2)
-            probability = min(0.98, probability + (np.random.random() * 0.1 - 0.05))
-            
-            recommendations.append({
-                'vendor_id': i + 1,
-                'name': rest['name'],
-                'cuisine': rest['cuisine'],
-                'rating': rest['rating'],
-                'distance': rest['distance'],
-                'latitude': 29.9457 + (np.random.random() - 0.5) * 0.01 if city == 'Haridwar' else 12.9716 + (np.random.random() - 0.5) * 0.01,
-                'longitude': 78.1642 + (np.random.random() - 0.5) * 0.01 if city == 'Haridwar' else 77.5946 + (np.random.random() - 0.5) * 0.01,
-                'probability': round(probability, 3)
-            })
+        location = data.get('location') or {}
+        if not isinstance(location, dict):
+            raise ValueError('location must be an object')
+        lat, lon = float_field(location, 'latitude'), float_field(location, 'longitude')
+        radius_km = float_field(data, 'radius_km')
+        if radius_km is not None and radius_km < 0:
+            raise ValueError('radius_km must be at least 0')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if seed is None:
+            seed = zlib.crc32(f"{city}|{age}|{gender}".encode())
+        rng = np.random.default_rng(seed)
         
-        # Sort by probability (highest first)
-        recommendations.sort(key=lambda x: x['probability'], reverse=True)
+        # A customer location switches to a spatial search (radius or nearest vendors)
+        # ranked by the computed distance; otherwise rank the city's catalog
+        distances = None
+        with stage('search'):
+            catalog = get_restaurant_catalog()
+            if lat is not None and lon is not None:
+                if radius_km is not None:
+                    rows, distances = catalog.within(lat, lon, min(radius_km, MAX_SEARCH_RADIUS_KM), cuisine)
+                else:
+                    rows, distances = catalog.nearest(lat, lon, max(k, NEAREST_CANDIDATES), cuisine,
+                                                      max_radius_km=MAX_SEARCH_RADIUS_KM)
+            else:
+                rows = catalog.candidates(city, cuisine)
         
-        result = {
-            'recommendations': recommendations[:5],  # Top 5 recommendations
-            'total_found': len(recommendations),
-            'city': city
-        }
-        print(f"Returning {len(result['recommendations'])} recommendations")
-        return jsonify(result)
+        with stage('scoring'):
+            probabilities = catalog.score(rows, age, rng, distances)
+            best = top_k(probabilities, k)
+            
+            result = {
+                'recommendations': catalog.records(rows[best], probabilities[best],
+                                                   distances[best] if distances is not None else None),
+                'total_found': len(rows),
+                'city': city
+            }
+        logger.debug("Returning %d recommendations", len(result['recommendations']))
+        with stage('serialize'):
+            return jsonify(result)
         
     except Exception as e:
-        print(f"Error in get_recommendations: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_recommendations: %s", e)
         return jsonify({'error': str(e)}), 500
 
+CUSTOMERS = [
+    {'customer_id': 1, 'age': 28, 'gender': 'M', 'language': 'English', 'state': 'Delhi', 'city': 'New Delhi', 'loyalty_score': 0.8},
+    {'customer_id': 2, 'age': 32, 'gender': 'F', 'language': 'Hindi', 'state': 'Maharashtra', 'city': 'Mumbai', 'loyalty_score': 0.9},
+    {'customer_id': 3, 'age': 25, 'gender': 'M', 'language': 'English', 'state': 'Karnataka', 'city': 'Bangalore', 'loyalty_score': 0.7},
+    {'customer_id': 4, 'age': 29, 'gender': 'F', 'language': 'Tamil', 'state': 'Tamil Nadu', 'city': 'Chennai', 'loyalty_score': 0.85},
+    {'customer_id': 5, 'age': 35, 'gender': 'M', 'language': 'Hindi', 'state': 'Uttarakhand', 'city': 'Dehradun', 'loyalty_score': 0.75}
+]
+CUSTOMERS_BODY = encode_response({'data': CUSTOMERS})
+
 @app.route('/customers', methods=['GET'])
 def get_customers():
     """Get sample customer data"""
-    customers = [
-        {'customer_id': 1, 'age': 28, 'gender': 'M', 'language': 'English', 'state': 'Delhi', 'city': 'New Delhi', 'loyalty_score': 0.8},
-        {'customer_id': 2, 'age': 32, 'gender': 'F', 'language': 'Hindi', 'state': 'Maharashtra', 'city': 'Mumbai', 'loyalty_score': 0.9},
-        {'customer_id': 3, 'age': 25, 'gender': 'M', 'language': 'English', 'state': 'Karnataka', 'city': 'Bangalore', 'loyalty_score': 0.7},
-        {'customer_id': 4, 'age': 29, 'gender': 'F', 'language': 'Tamil', 'state': 'Tamil Nadu', 'city': 'Chennai', 'loyalty_score': 0.85},
-        {'customer_id': 5, 'age': 35, 'gender': 'M', 'language': 'Hindi', 'state': 'Uttarakhand', 'city': 'Dehradun', 'loyalty_score': 0.75}
-    ]
-    return jsonify({'data': customers})
+    return Response(CUSTOMERS_BODY, mimetype='application/json')
 
 @app.route('/menu/<int:vendor_id>/<city>', methods=['GET'])
 def get_menu(vendor_id, city):
     """Get city-specific menu for restaurant"""
-    city_menus = {
-        'Haridwar': {
-            1: [{'dish_id': 1, 'dish_name': 'Chole Bhature', 'price': 120}, {'dish_id': 2, 'dish_name': 'Lassi', 'price': 60}, {'dish_id': 3, 'dish_name': 'Aloo Paratha', 'price': 80}],
-            2: [{'dish_id': 4, 'dish_name': 'Ganga Aarti Thali', 'price': 250}, {'dish_id': 5, 'dish_name': 'Dal Makhani', 'price': 180}, {'dish_id': 6, 'dish_name': 'Butter Naan', 'price': 50}],
-            3: [{'dish_id': 7, 'dish_name': 'Puri Sabzi', 'price': 100}, {'dish_id': 8, 'dish_name': 'Kachori', 'price': 40}, {'dish_id': 9, 'dish_name': 'Jalebi', 'price': 80}],
-            4: [{'dish_id': 10, 'dish_name': 'Gol Gappe', 'price': 50}, {'dish_id': 11, 'dish_name': 'Raj Kachori', 'price': 80}, {'dish_id': 12, 'dish_name': 'Dahi Bhalla', 'price': 70}],
-            5: [{'dish_id': 13, 'dish_name': 'Thali', 'price': 200}, {'dish_id': 14, 'dish_name': 'Paneer Curry', 'price': 160}, {'dish_id': 15, 'dish_name': 'Roti', 'price': 20}]
-        },
-        'Dehradun': {
-            1: [{'dish_id': 46, 'dish_name': 'Black Pepper Chicken', 'price': 320}, {'dish_id': 47, 'dish_name': 'Garlic Naan', 'price': 60}, {'dish_id': 48, 'dish_name': 'Paneer Tikka', 'price': 280}],
-            2: [{'dish_id': 49, 'dish_name': 'Tibetan Momos', 'price': 150}, {'dish_id': 50, 'dish_name': 'Thukpa', 'price': 180}, {'dish_id': 51, 'dish_name': 'Butter Tea', 'price': 40}],
-            3: [{'dish_id': 52, 'dish_name': 'Grilled Chicken', 'price': 350}, {'dish_id': 53, 'dish_name': 'Forest Salad', 'price': 120}, {'dish_id': 54, 'dish_name': 'Herbal Tea', 'price': 50}],
-            4: [{'dish_id': 55, 'dish_name': 'Multi Cuisine Platter', 'price': 400}, {'dish_id': 56, 'dish_name': 'Pasta Arrabiata', 'price': 220}, {'dish_id': 57, 'dish_name': 'Garlic Bread', 'price': 80}],
-            5: [{'dish_id': 58, 'dish_name': 'Margherita Pizza', 'price': 280}, {'dish_id': 59, 'dish_name': 'Tiramisu', 'price': 150}, {'dish_id': 60, 'dish_name': 'Cappuccino', 'price': 80}]
-        },
-        'Mumbai': {
-            1: [{'dish_id': 61, 'dish_name': 'Koliwada Prawns', 'price': 350}, {'dish_id': 62, 'dish_name': 'Fish Curry', 'price': 280}, {'dish_id': 63, 'dish_name': 'Sol Kadhi', 'price': 80}],
-            2: [{'dish_id': 64, 'dish_name': 'Chicken Steak', 'price': 450}, {'dish_id': 65, 'dish_name': 'Fish & Chips', 'price': 380}, {'dish_id': 66, 'dish_name': 'Beer', 'price': 200}],
-            3: [{'dish_id': 67, 'dish_name': 'Berry Pulao', 'price': 320}, {'dish_id': 68, 'dish_name': 'Dhansak', 'price': 280}, {'dish_id': 69, 'dish_name': 'Caramel Custard', 'price': 120}],
-            4: [{'dish_id': 70, 'dish_name': 'Seekh Kebab', 'price': 180}, {'dish_id': 71, 'dish_name': 'Mutton Biryani', 'price': 350}, {'dish_id': 72, 'dish_name': 'Roomali Roti', 'price': 40}],
-            5: [{'dish_id': 73, 'dish_name': 'Vada Pav', 'price': 30}, {'dish_id': 74, 'dish_name': 'Pav Bhaji', 'price': 120}, {'dish_id': 75, 'dish_name': 'Cutting Chai', 'price': 15}]
-        },
-        'Pune': {
-            1: [{'dish_id': 76, 'dish_name': 'Thai Green Curry', 'price': 280}, {'dish_id': 77, 'dish_name': 'Pad Thai', 'price': 250}, {'dish_id': 78, 'dish_name': 'Tom Yum Soup', 'price': 180}],
-            2: [{'dish_id': 79, 'dish_name': 'Chicken Sizzler', 'price': 320}, {'dish_id': 80, 'dish_name': 'Pasta Alfredo', 'price': 240}, {'dish_id': 81, 'dish_name': 'Chocolate Mousse', 'price': 120}],
-            3: [{'dish_id': 82, 'dish_name': 'French Onion Soup', 'price': 180}, {'dish_id': 83, 'dish_name': 'Beef Bourguignon', 'price': 450}, {'dish_id': 84, 'dish_name': 'Crème Brûlée', 'price': 160}],
-            4: [{'dish_id': 85, 'dish_name': 'Masala Dosa', 'price': 120}, {'dish_id': 86, 'dish_name': 'Filter Coffee', 'price': 40}, {'dish_id': 87, 'dish_name': 'Rava Idli', 'price': 80}],
-            5: [{'dish_id': 88, 'dish_name': 'German Pretzel', 'price': 150}, {'dish_id': 89, 'dish_name': 'Apple Strudel', 'price': 180}, {'dish_id': 90, 'dish_name': 'Black Forest Cake', 'price': 200}]
-        },
-        'New Delhi': {
-            1: [{'dish_id': 91, 'dish_name': 'Mutton Korma', 'price': 420}, {'dish_id': 92, 'dish_name': 'Chicken Changezi', 'price': 380}, {'dish_id': 93, 'dish_name': 'Sheermal', 'price': 60}],
-            2: [{'dish_id': 94, 'dish_name': 'Aloo Paratha', 'price': 80}, {'dish_id': 95, 'dish_name': 'Gobi Paratha', 'price': 90}, {'dish_id': 96, 'dish_name': 'Makkhan', 'price': 20}],
-            3: [{'dish_id': 97, 'dish_name': 'Dal Bukhara', 'price': 650}, {'dish_id': 98, 'dish_name': 'Sikandari Raan', 'price': 1200}, {'dish_id': 99, 'dish_name': 'Kulfi', 'price': 180}],
-            4: [{'dish_id': 100, 'dish_name': 'Stuffed Paratha', 'price': 120}, {'dish_id': 101, 'dish_name': 'Chole', 'price': 100}, {'dish_id': 102, 'dish_name': 'Pickle', 'price': 30}],
-            5: [{'dish_id': 103, 'dish_name': 'Mutton Seekh', 'price': 280}, {'dish_id': 104, 'dish_name': 'Chicken Tikka', 'price': 250}, {'dish_id': 105, 'dish_name': 'Rumali Roti', 'price': 40}]
-        },
-        'Central Delhi': {
-            1: [{'dish_id': 106, 'dish_name': 'Continental Platter', 'price': 350}, {'dish_id': 107, 'dish_name': 'Grilled Sandwich', 'price': 150}, {'dish_id': 108, 'dish_name': 'Cold Coffee', 'price': 80}],
-            2: [{'dish_id': 109, 'dish_name': 'Gujarati Thali', 'price': 280}, {'dish_id': 110, 'dish_name': 'Dhokla', 'price': 80}, {'dish_id': 111, 'dish_name': 'Buttermilk', 'price': 40}],
-            3: [{'dish_id': 112, 'dish_name': 'Chocolate Pastry', 'price': 120}, {'dish_id': 113, 'dish_name': 'Black Forest', 'price': 150}, {'dish_id': 114, 'dish_name': 'Vanilla Shake', 'price': 100}],
-            4: [{'dish_id': 115, 'dish_name': 'Butter Chicken', 'price': 320}, {'dish_id': 116, 'dish_name': 'Jeera Rice', 'price': 120}, {'dish_id': 117, 'dish_name': 'Raita', 'price': 60}],
-            5: [{'dish_id': 118, 'dish_name': 'Burger', 'price': 180}, {'dish_id': 119, 'dish_name': 'French Fries', 'price': 100}, {'dish_id': 120, 'dish_name': 'Coke', 'price': 50}]
-        },
-        'Bangalore': {
-            1: [{'dish_id': 121, 'dish_name': 'Fish Curry', 'price': 280}, {'dish_id': 122, 'dish_name': 'Neer Dosa', 'price': 80}, {'dish_id': 123, 'dish_name': 'Coconut Chutney', 'price': 40}],
-            2: [{'dish_id': 124, 'dish_name': 'Bisi Bele Bath', 'price': 150}, {'dish_id': 125, 'dish_name': 'Mysore Pak', 'price': 100}, {'dish_id': 126, 'dish_name': 'Filter Coffee', 'price': 40}],
-            3: [{'dish_id': 127, 'dish_name': 'Grilled Steak', 'price': 450}, {'dish_id': 128, 'dish_name': 'Mashed Potato', 'price': 120}, {'dish_id': 129, 'dish_name': 'Wine', 'price': 300}],
-            4: [{'dish_id': 130, 'dish_name': 'Craft Beer', 'price': 250}, {'dish_id': 131, 'dish_name': 'Chicken Wings', 'price': 280}, {'dish_id': 132, 'dish_name': 'Nachos', 'price': 180}],
-            5: [{'dish_id': 133, 'dish_name': 'Fusion Curry', 'price': 220}, {'dish_id': 134, 'dish_name': 'Quinoa Salad', 'price': 180}, {'dish_id': 135, 'dish_name': 'Green Tea', 'price': 60}]
-        },
-        'Mysore': {
-            1: [{'dish_id': 136, 'dish_name': 'Veg Thali', 'price': 180}, {'dish_id': 137, 'dish_name': 'Sambar', 'price': 60}, {'dish_id': 138, 'dish_name': 'Rasam', 'price': 50}],
-            2: [{'dish_id': 139, 'dish_name': 'Mysore Masala Dosa', 'price': 120}, {'dish_id': 140, 'dish_name': 'Coconut Chutney', 'price': 30}, {'dish_id': 141, 'dish_name': 'Coffee', 'price': 40}],
-            3: [{'dish_id': 142, 'dish_name': 'Asian Noodles', 'price': 180}, {'dish_id': 143, 'dish_name': 'Manchurian', 'price': 160}, {'dish_id': 144, 'dish_name': 'Fried Rice', 'price': 150}],
-            4: [{'dish_id': 145, 'dish_name': 'Andhra Meals', 'price': 200}, {'dish_id': 146, 'dish_name': 'Spicy Chicken', 'price': 250}, {'dish_id': 147, 'dish_name': 'Pickle Rice', 'price': 120}],
-            5: [{'dish_id': 148, 'dish_name': 'Mysore Dosa', 'price': 100}, {'dish_id': 149, 'dish_name': 'Idli Vada', 'price': 80}, {'dish_id': 150, 'dish_name': 'South Coffee', 'price': 35}]
-        },
-        'Chennai': {
-            1: [{'dish_id': 151, 'dish_name': 'Chettinad Chicken', 'price': 320}, {'dish_id': 152, 'dish_name': 'Appam', 'price': 60}, {'dish_id': 153, 'dish_name': 'Coconut Milk', 'price': 40}],
-            2: [{'dish_id': 154, 'dish_name': 'Mutton Biryani', 'price': 380}, {'dish_id': 155, 'dish_name': 'Raita', 'price': 60}, {'dish_id': 156, 'dish_name': 'Shorba', 'price': 80}],
-            3: [{'dish_id': 157, 'dish_name': 'Traditional Thali', 'price': 250}, {'dish_id': 158, 'dish_name': 'Payasam', 'price': 80}, {'dish_id': 159, 'dish_name': 'Buttermilk', 'price': 40}],
-            4: [{'dish_id': 160, 'dish_name': 'Innovative Dosa', 'price': 150}, {'dish_id': 161, 'dish_name': 'Fusion Curry', 'price': 200}, {'dish_id': 162, 'dish_name': 'Modern Coffee', 'price': 60}],
-            5: [{'dish_id': 163, 'dish_name': 'Spice Curry', 'price': 180}, {'dish_id': 164, 'dish_name': 'Lemon Rice', 'price': 100}, {'dish_id': 165, 'dish_name': 'Pickle', 'price': 30}]
-        },
-        'Coimbatore': {
-            1: [{'dish_id': 166, 'dish_name': 'Buffet Spread', 'price': 350}, {'dish_id': 167, 'dish_name': 'Live Counter', 'price': 200}, {'dish_id': 168, 'dish_name': 'Dessert Bar', 'price': 120}],
-            2: [{'dish_id': 169, 'dish_name': 'Multi Cuisine', 'price': 280}, {'dish_id': 170, 'dish_name': 'Continental', 'price': 220}, {'dish_id': 171, 'dish_name': 'Indian', 'price': 180}],
-            3: [{'dish_id': 172, 'dish_name': 'Pure Veg Thali', 'price': 180}, {'dish_id': 173, 'dish_name': 'Sweets', 'price': 100}, {'dish_id': 174, 'dish_name': 'Lassi', 'price': 60}],
-            4: [{'dish_id': 175, 'dish_name': 'South Meals', 'price': 150}, {'dish_id': 176, 'dish_name': 'Sambar Rice', 'price': 100}, {'dish_id': 177, 'dish_name': 'Curd Rice', 'price': 80}],
-            5: [{'dish_id': 178, 'dish_name': 'Tamil Special', 'price': 200}, {'dish_id': 179, 'dish_name': 'Kongu Cuisine', 'price': 180}, {'dish_id': 180, 'dish_name': 'Traditional Tea', 'price': 30}]
-        },
-        'Lucknow': {
-            1: [{'dish_id': 181, 'dish_name': 'Galouti Kebab', 'price': 280}, {'dish_id': 182, 'dish_name': 'Sheermal', 'price': 60}, {'dish_id': 183, 'dish_name': 'Kulcha', 'price': 40}],
-            2: [{'dish_id': 184, 'dish_name': 'Awadhi Thali', 'price': 450}, {'dish_id': 185, 'dish_name': 'Lucknowi Biryani', 'price': 350}, {'dish_id': 186, 'dish_name': 'Kulfi', 'price': 80}],
-            3: [{'dish_id': 187, 'dish_name': 'Litti Chokha', 'price': 120}, {'dish_id': 188, 'dish_name': 'Sattu Drink', 'price': 40}, {'dish_id': 189, 'dish_name': 'Gud', 'price': 30}],
-            4: [{'dish_id': 190, 'dish_name': 'Mughlai Paratha', 'price': 180}, {'dish_id': 191, 'dish_name': 'Korma', 'price': 250}, {'dish_id': 192, 'dish_name': 'Roomali Roti', 'price': 40}],
-            5: [{'dish_id': 193, 'dish_name': 'Lucknowi Biryani', 'price': 320}, {'dish_id': 194, 'dish_name': 'Kebab Platter', 'price': 400}, {'dish_id': 195, 'dish_name': 'Thandai', 'price': 60}]
-        },
-        'Agra': {
-            1: [{'dish_id': 196, 'dish_name': 'Tandoori Platter', 'price': 380}, {'dish_id': 197, 'dish_name': 'Naan Basket', 'price': 120}, {'dish_id': 198, 'dish_name': 'Lassi', 'price': 80}],
-            2: [{'dish_id': 199, 'dish_name': 'Mughlai Cuisine', 'price': 420}, {'dish_id': 200, 'dish_name': 'Biryani', 'price': 300}, {'dish_id': 201, 'dish_name': 'Shahi Tukda', 'price': 120}],
-            3: [{'dish_id': 202, 'dish_name': 'Royal Thali', 'price': 350}, {'dish_id': 203, 'dish_name': 'Nawabi Curry', 'price': 280}, {'dish_id': 204, 'dish_name': 'Kulfi Falooda', 'price': 100}],
-            4: [{'dish_id': 205, 'dish_name': 'Spice Kitchen', 'price': 250}, {'dish_id': 206, 'dish_name': 'Tandoori Roti', 'price': 30}, {'dish_id': 207, 'dish_name': 'Mint Chutney', 'price': 20}],
-            5: [{'dish_id': 208, 'dish_name': 'Agra Petha', 'price': 150}, {'dish_id': 209, 'dish_name': 'Milk Cake', 'price': 120}, {'dish_id': 210, 'dish_name': 'Rabri', 'price': 80}]
-        }
-    }
+    entry = menu_store.get(city, vendor_id)
+    response = Response(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = MENU_MAX_AGE
+    # Answers If-None-Match with a bodiless 304
+    return response.make_conditional(request)
+
+@app.route('/menu/reload', methods=['POST'])
+def reload_menus():
+    """Re-read the menu file without restarting the server"""
+    try:
+        return jsonify({'menus': menu_store.reload()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+metrics.gauge('orderly_predictions_total', 'Predictions recorded in the history store', lambda: len(history_store))
+metrics.gauge('orderly_model_loaded', 'Whether a model artifact is loaded',
+              lambda: int(model_registry.loaded or (export_registry is not None and export_registry.loaded)))
+def dataset_orders():
+    snapshot = dataset_cache.get()
+    if snapshot is None or snapshot.aggregates is None:
+        return None
+    return snapshot.aggregates.count
+
+metrics.gauge('orderly_dataset_orders', 'Orders in the loaded dataset snapshot', dataset_orders)
+metrics.gauge('orderly_menus', 'Menus in the menu store', lambda: len(menu_store))
+if predict_batcher is not None:
+    metrics.gauge('orderly_predict_batch_mean_size', 'Mean rows per coalesced /predict batch',
+                  lambda: predict_batcher.stats()['mean_batch_size'])
+    metrics.gauge('orderly_predict_batch_queue_delay_ms', 'Mean time a /predict row waited to be batched',
+                  lambda: predict_batcher.stats()['mean_queue_delay_ms'])
+if prediction_cache is not None:
+    metrics.gauge('orderly_prediction_cache_hits_total', '/predict answers served from the prediction cache',
+                  lambda: prediction_cache.hits, kind='counter')
+    metrics.gauge('orderly_prediction_cache_misses_total', '/predict lookups that missed the prediction cache',
+                  lambda: prediction_cache.misses, kind='counter')
+    metrics.gauge('orderly_prediction_cache_evictions_total', 'Least recently used entries evicted from the prediction cache',
+                  lambda: prediction_cache.evictions, kind='counter')
+    metrics.gauge('orderly_prediction_cache_size', 'Entries in the prediction cache', lambda: len(prediction_cache))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text-format metrics for this process"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Startup warm-up: pending -> warming -> ready, or failed when a step in
+# REQUIRED_STEPS failed. /ready answers 503 unless it is ready.
+warmup = {'status': 'pending', 'steps': {}, 'seconds': None}
+warmup_lock = threading.Lock()
+
+def load_startup_forest():
+    global startup_forest, startup_forest_version
+    if export_registry is not None:
+        export_registry.get()
+        return
+    path = compiled_path(MODEL_PATH)
+    if COMPILED_FOREST and startup_forest is None and os.path.exists(path):
+        startup_forest_version = file_version(path)
+        startup_forest = CompiledForest.load(path)
+
+def warm_model():
+    if export_registry is not None and export_registry.get() is not None:
+        # Serving from the mapped export; the pickle loads on demand
+        if LOOKUP_TABLE:
+            logger.warning("ORDERLY_LOOKUP_TABLE is ignored with ORDERLY_MODEL_MMAP")
+        return
+    model = get_model()
+    if model is None:
+        if os.path.exists(MODEL_PATH):
+            raise RuntimeError(f"Model at {MODEL_PATH} failed to load")
+        raise RuntimeError("Model not available, run `python train.py` to create it")
+    get_compiled_forest(model)
+    if LOOKUP_TABLE:
+        build_prediction_table(model)
+
+WARMUP_STEPS = [
+    ('compiled_forest', load_startup_forest),
+    ('dataset', lambda: dataset_cache.refresh(wait=True)),
+    ('model', warm_model),
+    ('catalog', get_restaurant_catalog),
+    ('menus', menu_store.reload),
+]
+# Steps /predict can't do without; the others only degrade their own routes
+REQUIRED_STEPS = {'model'}
+
+def preload():
+    """Run the warm-up steps in this thread, e.g. before workers fork"""
+    with warmup_lock:
+        if warmup['status'] != 'pending':
+            return
+        warmup['status'] = 'warming'
     
-    menu = city_menus.get(city, {}).get(vendor_id, [])
-    return jsonify({'menu': menu})
+    started = time.perf_counter()
+    failed = []
+    for name, step in WARMUP_STEPS:
+        step_started = time.perf_counter()
+        try:
+            step()
+            warmup['steps'][name] = round(time.perf_counter() - step_started, 3)
+        except Exception as e:
+            logger.error("Warm-up step %s failed: %s", name, e)
+            warmup['steps'][name] = f"failed: {e}"
+            failed.append(name)
+    warmup['seconds'] = round(time.perf_counter() - started, 3)
+    warmup['status'] = 'failed' if REQUIRED_STEPS.intersection(failed) else 'ready'
+    logger.info("Warm-up finished in %.2fs (%s)", warmup['seconds'], warmup['status'])
+
+def start_warmup():
+    """Warm up on a background thread so the server can start accepting connections now"""
+    # Only the compiled export is read up front (tens of ms, NumPy only), so
+    # the first /predict doesn't have to wait for the pickle
+    try:
+        load_startup_forest()
+    except Exception as e:
+        logger.error("Error loading compiled forest: %s", e)
+    threading.Thread(target=preload, name='warmup', daemon=True).start()
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the dataset, model and tables are loaded"""
+    body = {'ready': warmup['status'] == 'ready', 'status': warmup['status'],
+            'steps': dict(warmup['steps']), 'seconds': warmup['seconds']}
+    if warmup['status'] == 'failed':
+        # Not going to recover by waiting; the model has to be trained or fixed and the server restarted
+        return jsonify(body), 503
+    if not body['ready']:
+        return jsonify(body), 503, {'Retry-After': '1'}
+    return jsonify(body)
 
 if __name__ == '__main__':
-    # Initialize model
-    print("Initializing Orderly Analytics Platform...")
-    model = get_model()
-    if model:
-        print("Model loaded successfully!")
-    else:
-        print("Warning: Model not available")
+    # Development server; production runs wsgi.py under gunicorn
+    logger.info("Initializing Orderly Analytics Platform...")
+    # The port opens right away; GET /ready reports when warm-up is done
+    start_warmup()
     
     port = int(os.environ.get('PORT', 8000))
-    print(f"Starting server on port {port}")
+    logger.info("Starting server on port %d", port)
     app.run(debug=False, port=port, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""ASGI entry point: the Flask app behind an event loop with split thread pools.
+
+    uvicorn asgi:app --port 8000 --workers 2
+
+or under gunicorn with ORDERLY_WORKER_CLASS=uvicorn.workers.UvicornWorker.
+
+Cheap routes run on a small pool of their own and never queue behind
+inference or dataset work; everything else shares a bounded heavy pool, and
+requests past ORDERLY_MAX_PENDING get a 503 with Retry-After (see
+utils/async_gateway.py).
+
+Settings come from the environment:
+    ORDERLY_HEAVY_WORKERS       threads for /predict, /analyze, ... (default 4)
+    ORDERLY_LIGHT_WORKERS       threads for /, /stats, /customers, /metrics, /ready, /menu (default 2)
+    ORDERLY_MAX_PENDING         heavy requests running or queued before shedding load (default 64)
+    ORDERLY_WARMUP              'preload' (default) or 'background', as in wsgi.py
+"""
+import gc
+import os
+
+from app import app as flask_app, preload, start_warmup
+
+try:
+    from async_gateway import AsyncGateway
+except ImportError:
+    from utils.async_gateway import AsyncGateway
+
+# Routes that only read in-memory state
+LIGHT_PATHS = ['/', '/stats', '/customers', '/metrics', '/ready']
+LIGHT_PREFIXES = ['/menu/']
+
+if os.environ.get('ORDERLY_WARMUP', 'preload') == 'background':
+    start_warmup()
+else:
+    preload()
+    gc.freeze()
+
+app = AsyncGateway(
+    flask_app,
+    light_paths=LIGHT_PATHS,
+    light_prefixes=LIGHT_PREFIXES,
+    heavy_workers=int(os.environ.get('ORDERLY_HEAVY_WORKERS', 4)),
+    light_workers=int(os.environ.get('ORDERLY_LIGHT_WORKERS', 2)),
+    max_pending=int(os.environ.get('ORDERLY_MAX_PENDING', 64))
+)
@@ -0,0 +1,79 @@
+"""Grouped /analyze queries on 1, 2, 4 and 8 worker processes.
+
+Writes a large synthetic dataset, builds its columnar cache the way the
+server does, and runs the same grouped query through AnalyticsEngine with
+the rows split into one partition per worker. Workers map the cache entry
+themselves, so only per-group totals travel between processes. A pandas
+groupby over the cleaned frame on one core is the reference, and the
+engine's order counts and means are checked against it.
+
+Speedup is bounded by the cores actually available; the machine's core
+count is printed with the results.
+
+    python benchmarks/bench_analytics_scaling.py [--rows 2000000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+
+import numpy as np
+
+from common import make_data_dir, measure, print_row, summarize
+
+QUERY = 'group_by=city,subzone,day&status=Delivered,Rejected&hour_from=12&hour_to=23'
+
+
+def pandas_groupby(df):
+    """The same query as QUERY, written as a pandas groupby"""
+    rows = df[df['Order Status'].isin(['Delivered', 'Rejected']) & df['order_hour'].between(12, 23)]
+    return rows.groupby(['City', 'Subzone', 'order_day'], observed=True).agg(
+        orders=('order_day', 'size'),
+        rating=('Rating', 'mean'),
+        kpt=('KPT duration (minutes)', 'mean'),
+        distance=('Distance_numeric', 'mean'),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from utils.analytics import AnalyticsEngine, ColumnSource, parse_query
+    from utils.columnar_cache import ColumnarCache, load_cleaned_dataset
+
+    data_dir = make_data_dir(args.rows)
+    csv_path = os.path.join(data_dir, 'dataset.csv')
+    cache = ColumnarCache(os.path.join(data_dir, 'cache'))
+    df = load_cleaned_dataset(csv_path, cache)
+    source = ColumnSource.from_cache(cache.cache_dir, cache.key_for(csv_path))
+    query = parse_query(dict(pair.split('=') for pair in QUERY.split('&')))
+    print(f"{args.rows} rows, {os.cpu_count()} CPU(s) available; query: {QUERY}")
+
+    reference = pandas_groupby(df)
+    baseline = summarize(measure(lambda: pandas_groupby(df), args.repeat, warmup=1))
+    print_row('pandas groupby, 1 core', baseline)
+
+    for workers in args.workers:
+        engine = AnalyticsEngine(workers, partition_rows=-(-args.rows // workers))
+        try:
+            body = engine.run(source, query)
+            result = summarize(measure(lambda: engine.run(source, query), args.repeat, warmup=1))
+        finally:
+            engine.close()
+        print_row(f"engine, {workers} worker(s), {body['partitions']} partition(s)", result)
+        print(f"  speedup vs pandas (p50): {baseline['p50_ms'] / result['p50_ms']:.2f}x")
+
+        groups = {(g['city'], g['subzone'], g['day']): g for g in body['groups']}
+        assert len(groups) == len(reference), 'group count differs from pandas'
+        for (city, subzone, day), row in reference.iterrows():
+            group = groups[(city, subzone, str(np.datetime64(int(day), 'D')))]
+            assert group['orders'] == row['orders']
+            assert np.isclose(group['metrics']['kpt_duration']['mean'], round(row['kpt'], 2), atol=0.011)
+            assert np.isclose(group['metrics']['distance']['mean'], round(row['distance'], 2), atol=0.011)
+    print('results match pandas')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""/analyze: incremental aggregates vs the original per-request rebuild.
+
+The reference below is the original /analyze body: it rebuilds lists over the
+whole dataset and prediction history on every call. For each history size the
+script checks that the route returns exactly the same payload, then times
+both. tests/test_analyze.py runs the same check without the timing.
+
+    python benchmarks/bench_analyze.py [--rows 20000] [--history 0 1000 100000]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+
+
+def reference_analyze(df, prediction_history):
+    """Original /analyze computation, kept verbatim for parity checks"""
+    if prediction_history:
+        pred_df = pd.DataFrame(prediction_history)
+        avg_rating = df['Rating'].fillna(0).mean()
+        all_kpt = list(df['KPT duration (minutes)'].fillna(0)) + [p['kpt_duration'] for p in prediction_history]
+        avg_kpt = np.mean(all_kpt)
+        all_distance = list(df['Distance_numeric'].fillna(0)) + [p['distance'] for p in prediction_history]
+        avg_distance = np.mean(all_distance)
+        delivery_success_rate = (df['Order Status'] == 'Delivered').mean() * 100
+        dataset_perf = df['performance_label'].value_counts().to_dict()
+        pred_perf = pred_df['predicted_performance'].value_counts().to_dict()
+        performance_dist = {}
+        for key in [0, 1]:
+            performance_dist[key] = dataset_perf.get(key, 0) + pred_perf.get(key, 0)
+        dataset_hours = df.groupby('order_hour').size().to_dict()
+        pred_hours = pred_df.groupby('order_hour').size().to_dict()
+        peak_hours = {}
+        for hour in set(list(dataset_hours.keys()) + list(pred_hours.keys())):
+            peak_hours[hour] = dataset_hours.get(hour, 0) + pred_hours.get(hour, 0)
+        total_orders = len(df) + len(prediction_history)
+    else:
+        avg_rating = df['Rating'].fillna(0).mean()
+        avg_kpt = df['KPT duration (minutes)'].fillna(0).mean()
+        avg_distance = df['Distance_numeric'].fillna(0).mean()
+        delivery_success_rate = (df['Order Status'] == 'Delivered').mean() * 100
+        performance_dist = df['performance_label'].value_counts().to_dict()
+        peak_hours = df.groupby('order_hour').size().to_dict()
+        total_orders = len(df)
+
+    return {
+        'summary': {
+            'avg_rating': round(avg_rating, 2) if not pd.isna(avg_rating) else 0,
+            'avg_kpt_duration': round(avg_kpt, 2) if not pd.isna(avg_kpt) else 0,
+            'avg_distance': round(avg_distance, 2) if not pd.isna(avg_distance) else 0,
+            'delivery_success_rate': round(delivery_success_rate, 2) if not pd.isna(delivery_success_rate) else 0
+        },
+        'performance_distribution': performance_dist,
+        'peak_hours': peak_hours,
+        'total_orders': total_orders,
+        'predictions_made': len(prediction_history)
+    }
+
+
+def random_orders(n, seed):
+    rng = np.random.default_rng(seed)
+    ampm = np.where(rng.random(n) < 0.5, 'AM', 'PM')
+    return [{
+        'Distance': f"{d}km",
+        'KPT_duration': float(k),
+        'Rider_wait_time': float(w),
+        'Order_time': f"{h:02d}:{m:02d} {p}"
+    } for d, k, w, h, m, p in zip(rng.integers(1, 12, n), np.round(rng.gamma(4.0, 4.0, n), 2),
+                                  np.round(rng.gamma(2.0, 2.5, n), 2), rng.integers(1, 13, n),
+                                  rng.integers(0, 60, n), ampm)]
+
+
+def normalize(payload):
+    """Round-trip through JSON so int/str dict keys compare equal"""
+    return json.loads(json.dumps(payload, sort_keys=True, default=float))
+
+
+def record_predictions(client, orders):
+    """Send orders mostly as batch traffic, plus a few single calls to cover both update paths"""
+    singles = min(3, len(orders))
+    if len(orders) > singles:
+        client.post('/predict/batch', json=orders[singles:])
+    for order in orders[:singles]:
+        client.post('/predict', json=order)
+
+
+def check_parity(client, df, history_store, size):
+    """Assert /analyze matches the reference over the dataset and the newest `size` predictions"""
+    history = history_store.recent(size)
+    expected = normalize(reference_analyze(df, history))
+    actual = normalize(client.get('/analyze').get_json())
+    assert actual == expected, f"/analyze mismatch at history={size}:\n{actual}\n{expected}"
+    return history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--history', type=int, nargs='+', default=[0, 1000, 100000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    os.environ['ORDERLY_HISTORY_BACKEND'] = args.backend
+    os.environ['ORDERLY_HISTORY_CAPACITY'] = str(max(args.history) + 1)
+    import app as backend
+
+    client = backend.app.test_client()
+    df = backend.dataset_cache.refresh(wait=True).frame
+
+    recorded = 0
+    for size in sorted(args.history):
+        if size > recorded:
+            record_predictions(client, random_orders(size - recorded, seed=size))
+            recorded = size
+
+        history = check_parity(client, df, backend.history_store, size)
+        before = summarize(measure(lambda: reference_analyze(df, history), max(args.repeat // 5, 3)))
+        after = summarize(measure(lambda: client.get('/analyze'), args.repeat, warmup=3))
+        print(f"history={size}: payloads match")
+        print_row('  original per-request rebuild', before)
+        print_row('  /analyze with running aggregates', after)
+
+
+if __name__ == '__main__':
+    main()
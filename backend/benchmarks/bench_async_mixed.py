@@ -0,0 +1,136 @@
+"""Mixed traffic: cheap-route latency while heavy routes saturate the server.
+
+Runs --heavy clients posting /predict/batch (--batch orders each) alongside
+--light clients cycling through /, /stats, /customers and /menu, against
+
+  * gunicorn, one gthread worker with heavy + light threads (wsgi.py)
+  * uvicorn, one worker running asgi.py with the same number of threads
+    split into the heavy and light pools
+
+and reports throughput and p50/p99 per traffic class. Under gthread every
+request waits for the same threads, so cheap calls queue behind batches;
+the ASGI gateway keeps them on their own pool and sheds heavy requests past
+--max-pending with a 503 instead of queueing them.
+
+    python benchmarks/bench_async_mixed.py [--heavy 16] [--light 4] [--batch 2000] [--duration 10]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from common import BACKEND_DIR, make_data_dir, summarize, train_model
+from load_test import free_port, wait_until_warm
+
+LIGHT_REQUESTS = [('GET', '/'), ('GET', '/stats'), ('GET', '/customers'), ('GET', '/menu/3/Mumbai')]
+
+
+def batch_body(n):
+    orders = [{'Distance': f"{i % 10 + 1}km", 'KPT_duration': 10 + i % 20, 'Rider_wait_time': i % 8,
+               'Order_time': f"{i % 12 + 1:02d}:15 PM"} for i in range(n)]
+    return json.dumps(orders)
+
+
+def start_server(kind, data_dir, port, heavy_threads, light_threads, max_pending):
+    env = dict(os.environ, PORT=str(port), ORDERLY_DATA_DIR=data_dir, ORDERLY_ACCESS_LOG='',
+               WEB_CONCURRENCY='1', ORDERLY_THREADS=str(heavy_threads + light_threads),
+               ORDERLY_HEAVY_WORKERS=str(heavy_threads), ORDERLY_LIGHT_WORKERS=str(light_threads),
+               ORDERLY_MAX_PENDING=str(max_pending), ORDERLY_HISTORY_CAPACITY='1000')
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--no-access-log', '--log-level', 'warning']
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_mixed(port, heavy, light, body, duration):
+    """Drive both traffic classes at once; returns {class: (latencies, busy, errors, elapsed)}"""
+    results = {'heavy': [[], 0, 0], 'light': [[], 0, 0]}
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(kind, i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        latencies, busy, errors = [], 0, 0
+        n = i
+        while time.monotonic() < stop:
+            if kind == 'heavy':
+                method, path, payload = 'POST', '/predict/batch', body
+            else:
+                method, path = LIGHT_REQUESTS[n % len(LIGHT_REQUESTS)]
+                payload = None
+            n += 1
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'} if payload else {})
+                response = conn.getresponse()
+                response.read()
+            except OSError:
+                errors += 1
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            if response.status == 503:
+                busy += 1
+                time.sleep(float(response.getheader('Retry-After', 1)) / 10)
+                continue
+            if response.status != 200:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        with lock:
+            results[kind][0].extend(latencies)
+            results[kind][1] += busy
+            results[kind][2] += errors
+
+    started = time.monotonic()
+    clients = ([threading.Thread(target=client, args=('heavy', i)) for i in range(heavy)]
+               + [threading.Thread(target=client, args=('light', i)) for i in range(light)])
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    elapsed = time.monotonic() - started
+    return {kind: (np.asarray(lat), busy, errors, elapsed) for kind, (lat, busy, errors) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=['gunicorn', 'asgi'], default=['gunicorn', 'asgi'])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--heavy', type=int, default=16, help='clients posting /predict/batch')
+    parser.add_argument('--light', type=int, default=4, help='clients calling cheap routes')
+    parser.add_argument('--batch', type=int, default=2000, help='orders per /predict/batch request')
+    parser.add_argument('--heavy-threads', type=int, default=4)
+    parser.add_argument('--light-threads', type=int, default=2)
+    parser.add_argument('--max-pending', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    body = batch_body(args.batch)
+    print(f"{os.cpu_count()} CPUs, {args.heavy} heavy + {args.light} light clients, {args.duration:.0f}s, "
+          f"{args.heavy_threads} + {args.light_threads} threads")
+
+    for kind in args.servers:
+        port = free_port()
+        server = start_server(kind, data_dir, port, args.heavy_threads, args.light_threads, args.max_pending)
+        label = 'gunicorn gthread' if kind == 'gunicorn' else 'uvicorn asgi.py'
+        try:
+            wait_until_warm(port)
+            for traffic, (samples, busy, errors, elapsed) in run_mixed(port, args.heavy, args.light, body, args.duration).items():
+                stats = summarize(samples) if len(samples) else {'p50_ms': float('nan'), 'p99_ms': float('nan')}
+                print(f"{label:<18} {traffic:<6} {len(samples) / elapsed:8.1f} req/s  p50={stats['p50_ms']:9.2f} ms  "
+                      f"p99={stats['p99_ms']:9.2f} ms  503s={busy}  errors={errors}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
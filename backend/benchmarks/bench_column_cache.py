@@ -0,0 +1,58 @@
+"""Startup cost: read_csv + clean_dataset vs loading the columnar cache.
+
+    python benchmarks/bench_column_cache.py [--rows 21321] [--repeat 5]
+
+The default row count matches the shipped dataset.csv.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from common import make_data_dir
+from utils.columnar_cache import ColumnarCache
+from utils.preprocess import clean_dataset
+
+ANALYZE_COLUMNS = ['Rating', 'KPT duration (minutes)', 'Distance_numeric', 'Order Status', 'performance_label', 'order_hour']
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=21321)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    csv_path = os.path.join(data_dir, 'dataset.csv')
+    cache = ColumnarCache(os.path.join(data_dir, 'cache'))
+
+    csv_ms = best_of(lambda: clean_dataset(pd.read_csv(csv_path)), args.repeat)
+    start = time.perf_counter()
+    key = cache.key_for(csv_path)
+    cache.write(key, clean_dataset(pd.read_csv(csv_path)))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    key_ms = best_of(lambda: cache.key_for(csv_path), args.repeat)
+    all_ms = best_of(lambda: cache.read(key), args.repeat)
+    analyze_ms = best_of(lambda: cache.read(key, ANALYZE_COLUMNS), args.repeat)
+
+    print(f"{args.rows:,} rows")
+    print(f"  read_csv + clean_dataset           {csv_ms:9.1f} ms")
+    print(f"  build cache (hash + clean + write)  {build_ms:9.1f} ms  (one-off)")
+    print(f"  cache key lookup                    {key_ms:9.1f} ms")
+    print(f"  cache load, all columns             {all_ms:9.1f} ms")
+    print(f"  cache load, /analyze columns        {analyze_ms:9.1f} ms  ({csv_ms / analyze_ms:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Flat-array forest export: parity with model.predict_proba and single-row latency.
+
+Parity is checked on random rows, on rows that sit exactly on split
+thresholds (where float32 rounding decides the branch) and through the batch
+evaluator. Latency is reported for the raw evaluators and for /predict with
+and without the fast path.
+
+    python benchmarks/bench_compiled_forest.py [--rows 20000] [--repeat 500]
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+from utils.compiled_forest import CompiledForest
+from utils.preprocess import FEATURE_NAMES
+
+PAYLOAD = {'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'}
+
+
+def random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 24, size=n) * 0.5,
+        rng.gamma(4.0, 4.0, size=n),
+        rng.gamma(2.0, 2.5, size=n),
+        rng.integers(0, 24, size=n),
+    ])
+
+
+def threshold_rows(model, n, seed=1):
+    """Rows whose features equal split thresholds of the first tree"""
+    tree = model.estimators_[0].tree_
+    splits = tree.children_left >= 0
+    rows = random_rows(n, seed)
+    picks = np.random.default_rng(seed).choice(np.flatnonzero(splits), size=n)
+    rows[np.arange(n), tree.feature[picks]] = tree.threshold[picks]
+    return rows
+
+
+def check_parity(model, forest, X):
+    expected = model.predict_proba(X)
+    labels = model.classes_.take(np.argmax(expected, axis=1))
+    batch = forest.predict_proba(X)
+    assert np.allclose(batch, expected, rtol=0, atol=1e-12), np.abs(batch - expected).max()
+    for row, want_label, want in zip(X, labels, expected):
+        label, probability = forest.predict_one(row)
+        assert label == want_label, (row, label, want_label)
+        assert np.allclose(probability, want, rtol=0, atol=1e-12), (row, probability, want)
+    return np.abs(batch - expected).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--parity-rows', type=int, default=2000)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data_dir = make_data_dir(args.rows)
+    model = train_model(data_dir)
+    start = time.perf_counter()
+    forest = CompiledForest.from_model(model)
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"{forest.n_estimators} trees, depth {forest.depth}, {len(forest.feature):,} nodes, "
+          f"{forest.nbytes / 2 ** 20:.1f} MiB, compiled in {compile_ms:.0f} ms")
+
+    for name, X in (('random rows', random_rows(args.parity_rows)),
+                    ('rows on split thresholds', threshold_rows(model, args.parity_rows))):
+        diff = check_parity(model, forest, X)
+        print(f"parity OK on {len(X)} {name} (max |diff| {diff:.1e})")
+
+    row = random_rows(1)[0]
+    frame = pd.DataFrame([row], columns=FEATURE_NAMES)
+    print_row('model.predict_proba (DataFrame)', summarize(measure(lambda: model.predict_proba(frame), args.repeat // 5, warmup=3)))
+    print_row('CompiledForest.predict_one', summarize(measure(lambda: forest.predict_one(row), args.repeat, warmup=10)))
+
+    use_data_dir(data_dir)
+    import app as backend
+    client = backend.app.test_client()
+
+    def predict():
+        client.post('/predict', json=PAYLOAD)
+
+    backend.COMPILED_FOREST = False
+    sklearn_stats = summarize(measure(predict, args.repeat // 5, warmup=3))
+    backend.COMPILED_FOREST = True
+    compiled_stats = summarize(measure(predict, args.repeat, warmup=10))
+    print_row('/predict via sklearn', sklearn_stats)
+    print_row('/predict via compiled forest', compiled_stats)
+    print(f"speedup (p50): {sklearn_stats['p50_ms'] / compiled_stats['p50_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Nearest-vendor search: brute-force haversine scan vs the catalog's spatial grid.
+
+Builds a synthetic catalog of --vendors restaurants clustered around the
+shipped city centres, checks that grid radius and k-nearest queries return
+exactly what a full scan returns, then times both.
+
+    python benchmarks/bench_geo_search.py [--vendors 1000000] [--queries 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import BACKEND_DIR, measure, print_row, summarize
+from bench_recommendations import CUISINES
+from utils.restaurant_catalog import RestaurantCatalog, haversine_km, top_k
+
+
+def make_vendors(n, seed=42):
+    """n vendors: most within a few km of a city centre, the rest spread over India"""
+    base = pd.read_csv(os.path.join(BACKEND_DIR, 'catalog', 'restaurants.csv'))
+    centres = base[base['city'] != '*'].groupby('city', sort=False)[['latitude', 'longitude']].mean()
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, len(centres), size=n)
+    spread = np.where(rng.random(n) < 0.9, 0.05, 2.0)
+    return pd.DataFrame({
+        'city': centres.index.to_numpy()[city],
+        'vendor_id': np.arange(1, n + 1),
+        'name': 'Vendor',
+        'cuisine': np.array(CUISINES)[rng.integers(0, len(CUISINES), size=n)],
+        'rating': np.round(rng.uniform(3.0, 5.0, size=n), 1),
+        'distance': 0.0,
+        'latitude': centres['latitude'].to_numpy()[city] + rng.normal(0, 1, size=n) * spread,
+        'longitude': centres['longitude'].to_numpy()[city] + rng.normal(0, 1, size=n) * spread,
+    })
+
+
+def brute_within(catalog, lat, lon, radius_km):
+    distances = haversine_km(lat, lon, catalog.latitude, catalog.longitude)
+    return np.flatnonzero(distances <= radius_km)
+
+
+def brute_nearest(catalog, lat, lon, k):
+    distances = haversine_km(lat, lon, catalog.latitude, catalog.longitude)
+    return top_k(-distances, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vendors', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    frame = make_vendors(args.vendors)
+    start = time.perf_counter()
+    catalog = RestaurantCatalog(frame)
+    build_s = time.perf_counter() - start
+    index_mib = (catalog.grid_rows.nbytes + catalog.grid_keys.nbytes + catalog.grid_starts.nbytes) / 2 ** 20
+    print(f"{len(catalog):,} vendors, {len(catalog.grid_keys):,} occupied cells, "
+          f"index {index_mib:.1f} MiB, catalog built in {build_s:.2f}s")
+
+    # Queries near the centres of a random set of vendors
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(catalog), size=args.queries)
+    points = np.column_stack([catalog.latitude[picks], catalog.longitude[picks]]) + rng.normal(0, 0.01, size=(args.queries, 2))
+
+    for lat, lon in points[:20]:
+        for radius in (1.0, 5.0):
+            grid_rows, _ = catalog.within(lat, lon, radius)
+            assert np.array_equal(np.sort(grid_rows), brute_within(catalog, lat, lon, radius)), (lat, lon, radius)
+        for k in (10, 50):
+            grid_rows, grid_distances = catalog.nearest(lat, lon, k, max_radius_km=20000)
+            brute = brute_nearest(catalog, lat, lon, k)
+            expected = haversine_km(lat, lon, catalog.latitude[brute], catalog.longitude[brute])
+            assert np.allclose(grid_distances, expected), (lat, lon, k)
+    print("parity OK: grid radius and k-nearest results match a full scan")
+
+    def cycle(fn):
+        queries = iter(np.tile(points, (1000, 1)))
+        return lambda: fn(*next(queries))
+
+    repeat = args.queries
+    print_row('full scan, radius 5 km', summarize(measure(cycle(lambda a, b: brute_within(catalog, a, b, 5.0)), max(repeat // 10, 5))))
+    print_row('full scan, 50 nearest', summarize(measure(cycle(lambda a, b: brute_nearest(catalog, a, b, 50)), max(repeat // 10, 5))))
+    print_row('grid, radius 1 km', summarize(measure(cycle(lambda a, b: catalog.within(a, b, 1.0)), repeat)))
+    print_row('grid, radius 5 km', summarize(measure(cycle(lambda a, b: catalog.within(a, b, 5.0)), repeat)))
+    print_row('grid, 10 nearest', summarize(measure(cycle(lambda a, b: catalog.nearest(a, b, 10)), repeat)))
+    print_row('grid, 50 nearest', summarize(measure(cycle(lambda a, b: catalog.nearest(a, b, 50)), repeat)))
+    print_row('grid, 50 nearest seafood', summarize(measure(cycle(lambda a, b: catalog.nearest(a, b, 50, 'seafood')), repeat)))
+
+    catalog_dir = tempfile.mkdtemp(prefix='orderly-catalog-')
+    frame.to_csv(os.path.join(catalog_dir, 'restaurants.csv'), index=False)
+    os.environ['ORDERLY_CATALOG_DIR'] = catalog_dir
+    import app as backend
+    client = backend.app.test_client()
+    lat, lon = points[0]
+    payload = {'age': 25, 'city': 'Mumbai', 'location': {'latitude': lat, 'longitude': lon}}
+    print_row('POST /recommendations (50 nearest)', summarize(measure(
+        lambda: client.post('/recommendations', json=payload), repeat, warmup=5)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Memory used by the prediction history: list of dicts vs the new stores.
+
+The list-of-dicts figure is measured with tracemalloc on --sample records and
+scaled linearly to --records (building 10M dicts needs several GB). The ring
+buffer size is exact; the SQLite store is filled for real and its on-disk
+size reported, since that data never sits in the worker's heap.
+
+    python benchmarks/bench_history_memory.py [--records 10000000] [--sample 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import BACKEND_DIR  # noqa: F401  (puts backend/ on sys.path)
+from utils.history_store import RingBufferHistory, SQLiteHistory
+
+
+def make_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'distance': rng.integers(0, 12, n).astype(float),
+        'kpt_duration': np.round(rng.gamma(4.0, 4.0, n), 2),
+        'rider_wait_time': np.round(rng.gamma(2.0, 2.5, n), 2),
+        'order_hour': rng.integers(0, 24, n),
+        'predicted_performance': rng.integers(0, 2, n),
+        'confidence': rng.random(n),
+    }
+
+
+def list_of_dicts_bytes(columns):
+    rows = list(zip(*(columns[f].tolist() for f in columns)))
+    tracemalloc.start()
+    history = []
+    for d, k, w, h, p, c in rows:
+        history.append({'distance': d, 'kpt_duration': k, 'rider_wait_time': w,
+                        'order_hour': h, 'predicted_performance': p, 'confidence': c})
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The float objects were allocated before tracing started but are owned by the dicts
+    return current + len(history) * 4 * 24
+
+
+def mib(n_bytes):
+    return n_bytes / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=10000000)
+    parser.add_argument('--sample', type=int, default=1000000)
+    parser.add_argument('--chunk', type=int, default=100000)
+    args = parser.parse_args()
+
+    sample = min(args.sample, args.records)
+    dict_bytes = list_of_dicts_bytes(make_columns(sample)) * args.records / sample
+    print(f"list of dicts:        {mib(dict_bytes):10.1f} MiB  (measured on {sample:,} records, scaled)")
+
+    ring = RingBufferHistory(capacity=args.records)
+    print(f"ring buffer:          {mib(ring.nbytes):10.1f} MiB  (capacity {args.records:,})")
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='orderly-history-'), 'prediction_history.db')
+    store = SQLiteHistory(db_path)
+    start = time.perf_counter()
+    for offset in range(0, args.records, args.chunk):
+        store.extend(make_columns(min(args.chunk, args.records - offset), seed=offset))
+    elapsed = time.perf_counter() - start
+    disk = sum(os.path.getsize(db_path + suffix) for suffix in ('', '-wal') if os.path.exists(db_path + suffix))
+    print(f"sqlite (on disk):     {mib(disk):10.1f} MiB  ({len(store):,} rows, {args.records / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
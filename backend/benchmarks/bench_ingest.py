@@ -0,0 +1,69 @@
+"""Peak RSS and time: full read_csv + clean_dataset vs chunked ingestion.
+
+Each mode runs in its own subprocess so ru_maxrss is not shared between them.
+The /analyze summary from both modes is printed side by side; the chunked
+mode keeps the minute columns in float32, so means can differ in the last
+digits.
+
+    python benchmarks/bench_ingest.py [--rows 1000000] [--max-rss-mb 300]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import make_data_dir
+
+
+def run_mode(mode, csv_path, chunksize, max_rss_mb):
+    from utils.aggregates import OrderAggregates
+    from utils.ingest import ingest_csv, peak_rss_mb
+    from utils.preprocess import clean_dataset
+    import pandas as pd
+
+    start = time.perf_counter()
+    if mode == 'full':
+        agg = OrderAggregates.from_frame(clean_dataset(pd.read_csv(csv_path)))
+    else:
+        agg = ingest_csv(csv_path, chunksize=chunksize, max_rss_mb=max_rss_mb).aggregates
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'rows': agg.count,
+        'avg_kpt': round(agg.avg_kpt, 4),
+        'avg_distance': round(agg.avg_distance, 4),
+        'delivery_success_rate': round(agg.delivery_success_rate, 4),
+        'performance': {str(k): v for k, v in sorted(agg.performance.items())},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--max-rss-mb', type=float, default=300)
+    parser.add_argument('--mode', choices=['full', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.csv, args.chunksize, args.max_rss_mb)
+        return
+
+    csv_path = os.path.join(make_data_dir(args.rows), 'dataset.csv')
+    print(f"{args.rows:,} rows, {os.path.getsize(csv_path) / 2 ** 20:.0f} MiB CSV")
+    for mode in ('full', 'stream'):
+        cmd = [sys.executable, __file__, '--mode', mode, '--csv', csv_path, '--max-rss-mb', str(args.max_rss_mb)]
+        if args.chunksize:
+            cmd += ['--chunksize', str(args.chunksize)]
+        result = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.splitlines()[-1])
+        print(f"{mode:<7} {result['seconds']:7.2f} s  peak RSS {result['peak_rss_mb']:7.0f} MiB  "
+              f"avg_kpt={result['avg_kpt']} avg_distance={result['avg_distance']} "
+              f"delivered={result['delivery_success_rate']}% labels={result['performance']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Response serialization per route: Flask's json provider vs the orjson one.
+
+Each route is called once to capture the object it passes to jsonify, and
+that object is then encoded into a response by DefaultJSONProvider (what
+every route used before) and by FastJSONProvider. / and /customers are
+compared as jsonify per request vs their pre-encoded bytes, and a streamed
+/predict/batch body as one json.dumps per line vs orjson lines sent in
+chunks. End-to-end test-client latencies with each provider follow; there
+the Flask and routing overhead is the same on both sides.
+
+    python benchmarks/bench_json.py [--repeat 500] [--batch 5000]
+"""
+import argparse
+import json
+
+import numpy as np
+
+from bench_predict_batching import random_orders
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=5000, help='orders in the streamed /predict/batch request')
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    import app as backend
+    from flask import Response
+    from flask.json.provider import DefaultJSONProvider
+    from utils.fast_json import FastJSONProvider, encode
+    backend.preload()
+    backend.prediction_cache = None
+
+    app = backend.app
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+    client = app.test_client()
+    order = json.loads(random_orders(1)[0])
+    routes = [
+        ('GET /analyze', 'get', '/analyze', None),
+        ('GET /analyze?group_by=city,day', 'get', '/analyze?group_by=city,day', None),
+        ('GET /analyze?group_by=city,subzone,hour', 'get', '/analyze?group_by=city,subzone,hour', None),
+        ('POST /recommendations', 'post', '/recommendations', {'city': 'Mumbai', 'age': 30, 'limit': 50}),
+        ('POST /predict', 'post', '/predict', order),
+        ('POST /predict/batch (500)', 'post', '/predict/batch', [order] * 500),
+        ('GET /feature-importance', 'get', '/feature-importance', None),
+    ]
+
+    # The object each route hands to jsonify
+    captured = []
+
+    class CapturingProvider(FastJSONProvider):
+        def response(self, *a, **kw):
+            captured.append(self._prepare_response_obj(a, kw))
+            return super().response(*a, **kw)
+
+    def call(method, url, body):
+        response = getattr(client, method)(url, json=body) if body is not None else getattr(client, method)(url)
+        response.get_data()
+        return response
+
+    print('encoding only')
+    app.json = CapturingProvider(app)
+    for label, method, url, body in routes:
+        captured.clear()
+        call(method, url, body)
+        obj = captured[-1]
+        before = summarize(measure(lambda: default.response(obj), args.repeat, warmup=10))
+        after = summarize(measure(lambda: fast.response(obj), args.repeat, warmup=10))
+        size = len(fast.response(obj).get_data())
+        print_row(f"{label}, json", before)
+        print_row(f"{label}, orjson", after)
+        print(f"  {size} bytes, speedup (p50) {before['p50_ms'] / after['p50_ms']:.1f}x")
+
+    for label, body in (('GET /', backend.HOME_BODY), ('GET /customers', backend.CUSTOMERS_BODY)):
+        obj = json.loads(body)
+        before = summarize(measure(lambda: default.response(obj), args.repeat, warmup=10))
+        after = summarize(measure(lambda: Response(body, mimetype='application/json'), args.repeat, warmup=10))
+        print_row(f"{label}, jsonify per request", before)
+        print_row(f"{label}, pre-encoded", after)
+        print(f"  speedup (p50) {before['p50_ms'] / after['p50_ms']:.1f}x")
+
+    results = [{'predicted_label': 1, 'performance': 'Good', 'confidence': c, 'probability_good': c}
+               for c in np.random.default_rng(0).random(args.batch).tolist()]
+
+    def per_line():
+        for result in results:
+            yield json.dumps(result) + '\n'
+
+    def chunked():
+        for start in range(0, len(results), backend.STREAM_CHUNK_ROWS):
+            yield b'\n'.join(encode(r) for r in results[start:start + backend.STREAM_CHUNK_ROWS]) + b'\n'
+
+    repeat = max(5, args.repeat // 50)
+    before = summarize(measure(lambda: sum(map(len, per_line())), repeat, warmup=1))
+    after = summarize(measure(lambda: sum(map(len, chunked())), repeat, warmup=1))
+    print_row(f"/predict/batch ({args.batch}) stream, json lines", before)
+    print_row(f"/predict/batch ({args.batch}) stream, orjson chunks", after)
+    print(f"  speedup (p50) {before['p50_ms'] / after['p50_ms']:.1f}x")
+
+    print('\nend to end (test client)')
+    routes.append((f"POST /predict/batch ({args.batch}, streamed)", 'post', '/predict/batch', [order] * args.batch))
+    for label, method, url, body in routes:
+        n = repeat if body is not None and len(body) == args.batch else args.repeat
+        app.json = default
+        before = summarize(measure(lambda: call(method, url, body), n, warmup=3))
+        app.json = fast
+        after = summarize(measure(lambda: call(method, url, body), n, warmup=3))
+        print_row(f"{label}, json", before)
+        print_row(f"{label}, orjson", after)
+        print(f"  speedup (p50) {before['p50_ms'] / after['p50_ms']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Lookup-table prediction mode: build time, memory, parity and latency.
+
+The table holds model.predict_proba for every point of PREDICTION_GRID;
+/predict indexes into it for on-grid rows and falls back to the compiled
+forest for everything else.
+
+    python benchmarks/bench_lookup_table.py [--rows 20000] [--trees 100] [--repeat 2000]
+"""
+import argparse
+import os
+import warnings
+
+import numpy as np
+
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+from utils.compiled_forest import CompiledForest
+from utils.lookup_table import PREDICTION_GRID, PredictionTable
+
+
+def grid_rows(n, seed=0):
+    """Random rows that lie on the grid"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, round((last - first) / step) + 1, size=n) * step + first
+        for _, first, last, step in PREDICTION_GRID
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--parity-rows', type=int, default=20000)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    data_dir = make_data_dir(args.rows)
+    model = train_model(data_dir, n_estimators=args.trees)
+    table = PredictionTable.build(model.predict_proba, model.classes_)
+    points = int(np.prod(table.shape))
+    print(f"grid {'x'.join(map(str, table.shape))} = {points:,} points: "
+          f"{table.nbytes / 2 ** 20:.1f} MiB, built in {table.build_seconds:.2f}s "
+          f"({points / table.build_seconds:,.0f} points/s)")
+
+    X = grid_rows(args.parity_rows)
+    expected = model.predict_proba(X)
+    labels = model.classes_.take(np.argmax(expected, axis=1))
+    for row, want_label, want in zip(X.tolist(), labels, expected):
+        label, probability = table.lookup(row)
+        assert label == want_label and np.array_equal(probability, want), (row, probability, want)
+    for row in ([2.25, 15, 5, 19], [2.0, 15.5, 5, 19], [16.0, 15, 5, 19], [2.0, 15, 5, 24], [np.nan, 15, 5, 19]):
+        assert table.lookup(row) is None, row
+    print(f"parity OK on {len(X)} on-grid rows; off-grid rows fall through")
+
+    forest = CompiledForest.from_model(model)
+    row = [2.0, 15.0, 5.0, 19]
+    print_row('PredictionTable.lookup', summarize(measure(lambda: table.lookup(row), args.repeat, warmup=10)))
+    print_row('CompiledForest.predict_one', summarize(measure(lambda: forest.predict_one(row), args.repeat // 10, warmup=5)))
+
+    use_data_dir(data_dir)
+    os.environ['ORDERLY_LOOKUP_TABLE'] = '1'
+    import app as backend
+    client = backend.app.test_client()
+    payload = {'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'}
+
+    backend.get_prediction_table(backend.get_model())
+    backend.prediction_table_worker.join()
+
+    def predict():
+        client.post('/predict', json=payload)
+
+    backend.LOOKUP_TABLE = False
+    forest_stats = summarize(measure(predict, args.repeat // 4, warmup=10))
+    backend.LOOKUP_TABLE = True
+    table_stats = summarize(measure(predict, args.repeat // 4, warmup=10))
+    print_row('/predict via compiled forest', forest_stats)
+    print_row('/predict via lookup table', table_stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""/menu latency: rebuilding and encoding the menu literal per call vs the pre-encoded store.
+
+The baseline route rebuilds the nested city -> vendor -> dishes structure
+(what evaluating the old literal did) and runs jsonify on every request. The
+store answers from pre-encoded bytes, and with a bodiless 304 when the
+client sends the ETag it already has. Test-client overhead dominates the
+end-to-end rows, so the handlers are also timed on their own.
+
+    python benchmarks/bench_menu.py [--repeat 2000]
+"""
+import argparse
+import json
+import os
+
+from common import BACKEND_DIR, measure, print_row, summarize
+
+MENUS_PATH = os.path.join(BACKEND_DIR, 'catalog', 'menus.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    import app as backend
+    from flask import jsonify
+
+    with open(MENUS_PATH, encoding='utf-8') as f:
+        menus = json.load(f)
+
+    @backend.app.route('/bench/legacy-menu/<int:vendor_id>/<city>')
+    def legacy_menu(vendor_id, city):
+        city_menus = {c: {int(v): [dict(dish) for dish in dishes] for v, dishes in vendors.items()}
+                      for c, vendors in menus.items()}
+        return jsonify({'menu': city_menus.get(city, {}).get(vendor_id, [])})
+
+    client = backend.app.test_client()
+    legacy = client.get('/bench/legacy-menu/3/Mumbai')
+    current = client.get('/menu/3/Mumbai')
+    assert legacy.data == current.data, 'store must return the same bytes as jsonify'
+    etag = current.headers['ETag']
+    assert client.get('/menu/3/Mumbai', headers={'If-None-Match': etag}).status_code == 304
+
+    print_row('rebuild literal + jsonify', summarize(measure(lambda: client.get('/bench/legacy-menu/3/Mumbai'), args.repeat, warmup=20)))
+    print_row('menu store, 200', summarize(measure(lambda: client.get('/menu/3/Mumbai'), args.repeat, warmup=20)))
+    print_row('menu store, 304 (If-None-Match)', summarize(measure(
+        lambda: client.get('/menu/3/Mumbai', headers={'If-None-Match': etag}), args.repeat, warmup=20)))
+    with backend.app.test_request_context('/menu/3/Mumbai'):
+        print_row('handler only: rebuild + jsonify', summarize(measure(lambda: legacy_menu(3, 'Mumbai'), args.repeat, warmup=20)))
+        print_row('handler only: menu store', summarize(measure(lambda: backend.get_menu(3, 'Mumbai'), args.repeat, warmup=20)))
+    print_row('MenuStore.get', summarize(measure(lambda: backend.menu_store.get('Mumbai', 3), args.repeat, warmup=20)))
+
+
+if __name__ == '__main__':
+    main()
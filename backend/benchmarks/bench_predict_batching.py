@@ -0,0 +1,117 @@
+"""/predict throughput under concurrent load, with and without micro-batching.
+
+Starts gunicorn (one worker, --threads threads) three times: scoring each
+request through sklearn, through the compiled forest row by row, and with
+ORDERLY_PREDICT_BATCHING=1 so concurrent requests are coalesced into one
+predict_proba call. --concurrency keep-alive clients post random orders for
+--duration seconds; the batcher's batch size and queue delay come from
+/stats afterwards.
+
+    python benchmarks/bench_predict_batching.py [--concurrency 32] [--threads 32] [--wait-ms 2]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from common import BACKEND_DIR, make_data_dir, summarize, train_model
+from load_test import free_port, wait_until_warm
+
+MODES = {
+    'sklearn per request': {'ORDERLY_COMPILED_FOREST': '0'},
+    'compiled per request': {},
+    'micro-batched': {'ORDERLY_PREDICT_BATCHING': '1'},
+}
+
+
+def random_orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [json.dumps({
+        'Distance': f"{rng.integers(1, 12)}km",
+        'KPT_duration': float(np.round(rng.uniform(5, 40), 1)),
+        'Rider_wait_time': float(np.round(rng.uniform(0, 15), 1)),
+        'Order_time': f"{rng.integers(1, 13):02d}:{rng.integers(0, 60):02d} {'PM' if rng.random() < 0.7 else 'AM'}",
+    }) for _ in range(n)]
+
+
+def run_clients(port, orders, concurrency, duration):
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop = time.monotonic() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        n = i
+        while time.monotonic() < stop:
+            body = orders[n % len(orders)]
+            n += concurrency
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/predict', body=body, headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[i] += 1
+            except OSError:
+                errors[i] += 1
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies[i].append((time.perf_counter() - start) * 1000)
+
+    started = time.monotonic()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    samples = np.concatenate([np.asarray(l) for l in latencies])
+    return len(samples) / (time.monotonic() - started), samples, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--wait-ms', type=float, default=2.0)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    orders = random_orders(5000)
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, 1 worker x {args.threads} threads, {args.duration:.0f}s")
+
+    for label, overrides in MODES.items():
+        env = dict(os.environ, PORT=str(free_port()), ORDERLY_DATA_DIR=data_dir, ORDERLY_ACCESS_LOG='',
+                   WEB_CONCURRENCY='1', ORDERLY_THREADS=str(args.threads), ORDERLY_HISTORY_CAPACITY='1000',
+                   ORDERLY_BATCH_MAX_SIZE=str(args.max_batch), ORDERLY_BATCH_WAIT_MS=str(args.wait_ms),
+                   ORDERLY_PREDICTION_CACHE_SIZE='0', **overrides)
+        port = int(env['PORT'])
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=BACKEND_DIR,
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_warm(port)
+            rps, samples, errors = run_clients(port, orders, args.concurrency, args.duration)
+            stats = summarize(samples)
+            print(f"{label:<22} {rps:8.0f} req/s  p50={stats['p50_ms']:8.2f} ms  p99={stats['p99_ms']:8.2f} ms  errors={errors}")
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', '/stats')
+            batching = json.loads(conn.getresponse().read()).get('batching')
+            if batching:
+                print(f"{'':<22} mean batch {batching['mean_batch_size']:.1f} rows, "
+                      f"queue delay mean {batching['mean_queue_delay_ms']:.2f} ms / max {batching['max_queue_delay_ms']:.2f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
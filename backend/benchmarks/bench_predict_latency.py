@@ -0,0 +1,44 @@
+"""Cold vs warm /predict latency.
+
+Cold: the registry is invalidated before every request, so each call pays the
+joblib.load of the forest the way the old get_model() did.
+Warm: the model stays resident in the process-wide registry.
+
+    python benchmarks/bench_predict_latency.py [--rows 20000] [--repeat 200]
+"""
+import argparse
+
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+
+PAYLOAD = {'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    import app as backend
+
+    client = backend.app.test_client()
+
+    def cold():
+        backend.model_registry.invalidate()
+        client.post('/predict', json=PAYLOAD)
+
+    def warm():
+        client.post('/predict', json=PAYLOAD)
+
+    cold_stats = summarize(measure(cold, max(args.repeat // 10, 10)))
+    warm_stats = summarize(measure(warm, args.repeat, warmup=5))
+    print_row('/predict cold (joblib.load per call)', cold_stats)
+    print_row('/predict warm (registry)', warm_stats)
+    print(f"speedup (p50): {cold_stats['p50_ms'] / warm_stats['p50_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""/predict and /feature-importance with and without result caching.
+
+/predict traffic is drawn from --distinct different orders with a skewed
+(Zipf-like) popularity, the way a few common orders dominate real traffic.
+The same request sequence runs with the prediction cache on and with it
+disabled; the cache's hit rate comes from its own counters.
+/feature-importance is timed with the per-version memo and with the memo
+dropped before every call, which is what the route used to compute.
+
+    python benchmarks/bench_prediction_cache.py [--distinct 500] [--requests 5000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import make_data_dir, measure, print_row, summarize, train_model, use_data_dir
+
+
+def skewed_orders(distinct, n, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = [{
+        'Distance': f"{rng.integers(1, 12)}km",
+        'KPT_duration': float(np.round(rng.uniform(5, 40), 1)),
+        'Rider_wait_time': float(np.round(rng.uniform(0, 15), 1)),
+        'Order_time': f"{rng.integers(1, 13):02d}:{rng.integers(0, 60):02d} {'PM' if rng.random() < 0.7 else 'AM'}",
+    } for _ in range(distinct)]
+    weights = 1.0 / np.arange(1, distinct + 1)
+    return [pool[i] for i in rng.choice(distinct, size=n, p=weights / weights.sum())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    import app as backend
+    backend.preload()
+
+    client = backend.app.test_client()
+    cache = backend.prediction_cache
+    orders = skewed_orders(args.distinct, args.requests)
+
+    def replay():
+        samples = np.empty(len(orders))
+        for i, order in enumerate(orders):
+            start = time.perf_counter()
+            client.post('/predict', json=order)
+            samples[i] = (time.perf_counter() - start) * 1000
+        return samples
+
+    backend.prediction_cache = None
+    uncached = summarize(replay())
+    backend.prediction_cache = cache
+    cache.clear()
+    cached = summarize(replay())
+    stats = cache.stats()
+    print_row('/predict, no cache', uncached)
+    print_row('/predict, prediction cache', cached)
+    print(f"hit rate {stats['hit_rate']:.1%} over {args.requests} requests, {args.distinct} distinct orders "
+          f"({stats['size']} cached); mean speedup {uncached['mean_ms'] / cached['mean_ms']:.2f}x")
+
+    def recompute():
+        backend.feature_importance_cache = None
+        client.get('/feature-importance')
+
+    before = summarize(measure(recompute, args.repeat, warmup=5))
+    after = summarize(measure(lambda: client.get('/feature-importance'), args.repeat, warmup=5))
+    print_row('/feature-importance, per request', before)
+    print_row('/feature-importance, per model version', after)
+    print(f"speedup (p50): {before['p50_ms'] / after['p50_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Vectorized clean_dataset vs the original row-wise apply.
+
+Times both at each size. The row-wise path is only timed up to
+--rowwise-max rows because it takes minutes beyond that. Their outputs are
+compared by tests/test_preprocess.py, on the synthetic data plus the
+hand-written edge cases below (<1km, NaN, malformed timestamps and dates, ...).
+
+    python benchmarks/bench_preprocess.py [--sizes 100000 1000000 10000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import make_orders
+from utils.preprocess import (clean_dataset, convert_distance_to_numeric, create_performance_label, extract_day,
+                              extract_hour)
+
+EDGE_DISTANCES = ['<1km', '<1KM', 'less than 1km', '2km', '3.5 km', '10KM', '0.5km', '1.2.3km',
+                  'abc', '', None, np.nan, 5, 2.5]
+EDGE_TIMESTAMPS = ['11:38 PM, September 10 2024', '03:52 AM, September 1 2024', '12:00 AM', '12:00 PM',
+                   '7:05 PM', '7:5 PM', '13:00 PM', '00:30 AM', '07:30PM', '07:60 PM', ' 07:30 pm AM',
+                   '  09:15 AM  , x', '7:30 PM extra', 'PM', 'garbage', '', None, np.nan, 5,
+                   '01:00 PM, september 9 2024', '01:00 PM, Sep 9 2024', '01:00 PM, September 31 2024',
+                   '01:00 PM, February 29 2024', '01:00 PM, September 9, 2024', '01:00 PM,September  9 2024']
+
+
+def clean_dataset_rowwise(df):
+    """The original clean_dataset, kept as the reference implementation"""
+    df['Distance_numeric'] = df['Distance'].apply(convert_distance_to_numeric)
+    df['order_hour'] = df['Order Placed At'].apply(extract_hour)
+    df['order_day'] = df['Order Placed At'].apply(extract_day)
+    df['performance_label'] = df.apply(create_performance_label, axis=1)
+    df['Rating'] = df['Rating'].fillna(3.0)
+    df['KPT duration (minutes)'] = df['KPT duration (minutes)'].fillna(df['KPT duration (minutes)'].median())
+    df['Rider wait time (minutes)'] = df['Rider wait time (minutes)'].fillna(df['Rider wait time (minutes)'].median())
+    return df
+
+
+def edge_case_orders():
+    n = max(len(EDGE_DISTANCES), len(EDGE_TIMESTAMPS))
+    df = make_orders(n, seed=7)
+    df['Distance'] = [EDGE_DISTANCES[i % len(EDGE_DISTANCES)] for i in range(n)]
+    df['Order Placed At'] = [EDGE_TIMESTAMPS[i % len(EDGE_TIMESTAMPS)] for i in range(n)]
+    df.loc[::3, 'Order Ready Marked'] = np.nan
+    return df
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--rowwise-max', type=int, default=1000000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        df = make_orders(size)
+        vectorized = timed(clean_dataset, df.copy())
+        line = f"{size:>10,} rows  vectorized {vectorized:8.2f} s"
+        if size <= args.rowwise_max:
+            rowwise = timed(clean_dataset_rowwise, df.copy())
+            line += f"  row-wise {rowwise:8.2f} s  speedup {rowwise / vectorized:5.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""/recommendations over a large catalog: per-row loop + full sort vs indexed, vectorized top-k.
+
+Writes a synthetic catalog with --vendors restaurants in each of the 12
+cities and points the app at it through ORDERLY_CATALOG_DIR. The baseline is
+the original per-restaurant loop (several np.random calls per row, then a
+full sort) run over pre-built per-city lists, so it does not even pay for
+rebuilding the literal on every request.
+
+    python benchmarks/bench_recommendations.py [--vendors 10000] [--repeat 200]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import BACKEND_DIR, measure, print_row, summarize
+from utils.restaurant_catalog import RestaurantCatalog, top_k
+
+CUISINES = ['North Indian', 'South Indian', 'Cafe', 'Mughlai', 'Continental', 'Bakery', 'Seafood', 'Biryani',
+            'Fast Food', 'Vegetarian', 'Italian', 'Chinese']
+
+
+def make_catalog(vendors_per_city, seed=42):
+    """Synthetic catalog with the shipped cities and their centres"""
+    base = pd.read_csv(os.path.join(BACKEND_DIR, 'catalog', 'restaurants.csv'))
+    centres = base[base['city'] != '*'].groupby('city', sort=False)[['latitude', 'longitude']].mean()
+    rng = np.random.default_rng(seed)
+    frames = []
+    for city, (lat, lon) in centres.iterrows():
+        n = vendors_per_city
+        frames.append(pd.DataFrame({
+            'city': city,
+            'vendor_id': np.arange(1, n + 1),
+            'name': [f"{city} Kitchen {i}" for i in range(1, n + 1)],
+            'cuisine': np.array(CUISINES)[rng.integers(0, len(CUISINES), size=n)],
+            'rating': np.round(rng.uniform(3.0, 5.0, size=n), 1),
+            'distance': np.round(rng.uniform(0.2, 8.0, size=n), 1),
+            'latitude': np.round(lat + rng.normal(0, 0.05, size=n), 6),
+            'longitude': np.round(lon + rng.normal(0, 0.05, size=n), 6),
+        }))
+    frames.append(base[base['city'] == '*'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_recommendations(restaurants, age):
+    """The original scoring loop and full sort"""
+    recommendations = []
+    for i, rest in enumerate(restaurants):
+        rating_score = rest['rating'] / 5.0
+        distance_score = max(0, 1 - (rest['distance'] / 5.0))
+        age_preference = 0.9 if int(age) < 30 else 0.8
+        probability = (rating_score * 0.4 + distance_score * 0.4 + age_preference * 0.2)
+        probability = min(0.98, probability + (np.random.random() * 0.1 - 0.05))
+        recommendations.append({
+            'vendor_id': i + 1, 'name': rest['name'], 'cuisine': rest['cuisine'],
+            'rating': rest['rating'], 'distance': rest['distance'],
+            'latitude': 12.9716 + (np.random.random() - 0.5) * 0.01,
+            'longitude': 77.5946 + (np.random.random() - 0.5) * 0.01,
+            'probability': round(probability, 3)
+        })
+    recommendations.sort(key=lambda x: x['probability'], reverse=True)
+    return recommendations[:5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vendors', type=int, default=10000, help='vendors per city')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    catalog_dir = tempfile.mkdtemp(prefix='orderly-catalog-')
+    frame = make_catalog(args.vendors)
+    frame.to_csv(os.path.join(catalog_dir, 'restaurants.csv'), index=False)
+    catalog = RestaurantCatalog.load(os.path.join(catalog_dir, 'restaurants.csv'))
+    print(f"{len(catalog):,} vendors, {args.vendors:,} per city, {len(catalog.grid_keys):,} grid cells")
+
+    lists = {city: group[['name', 'cuisine', 'rating', 'distance']].to_dict('records')
+             for city, group in frame.groupby('city', sort=False)}
+    legacy = summarize(measure(lambda: legacy_recommendations(lists['Mumbai'], 25), max(args.repeat // 10, 5), warmup=1))
+
+    def vectorized(cuisine=None):
+        rows = catalog.candidates('Mumbai', cuisine)
+        probabilities = catalog.score(rows, 25, np.random.default_rng(7))
+        best = top_k(probabilities, 5)
+        return catalog.records(rows[best], probabilities[best])
+
+    print_row('per-row loop + full sort', legacy)
+    fast = summarize(measure(vectorized, args.repeat, warmup=5))
+    print_row('indexed + vectorized top-k', fast)
+    print_row('  ... filtered by cuisine', summarize(measure(lambda: vectorized('seafood'), args.repeat, warmup=5)))
+    print(f"speedup (p50): {legacy['p50_ms'] / fast['p50_ms']:.0f}x")
+
+    os.environ['ORDERLY_CATALOG_DIR'] = catalog_dir
+    import app as backend
+    client = backend.app.test_client()
+    payload = {'age': 25, 'gender': 'F', 'city': 'Mumbai'}
+    first = client.post('/recommendations', json=payload).get_json()
+    assert first == client.post('/recommendations', json=payload).get_json(), 'seeded jitter should be repeatable'
+    assert first['total_found'] == args.vendors and len(first['recommendations']) == 5
+    print_row('POST /recommendations', summarize(measure(lambda: client.post('/recommendations', json=payload),
+                                                          args.repeat, warmup=5)))
+
+
+if __name__ == '__main__':
+    main()
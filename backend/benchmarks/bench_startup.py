@@ -0,0 +1,105 @@
+"""Cold start: import time and time to first response, eager vs lazy startup.
+
+Each measurement is a fresh interpreter, so nothing is shared between runs
+(the OS page cache is, so the first run of each mode is discarded).
+
+  * import app            python -c "import app", with and without the
+                          sklearn modules app.py used to import eagerly
+  * dev server, eager     the old startup: everything loaded (pickle and
+                          sklearn included) before app.run opens the port
+  * dev server, lazy      python app.py: port opens at once, warm-up runs in
+                          the background and /predict scores from the
+                          compiled export until the pickle is loaded
+
+For the servers it reports when the port accepted a connection, when the
+first /predict returned 200 and when /ready did.
+
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from common import BACKEND_DIR, make_data_dir, train_model
+from load_test import free_port
+
+EAGER_IMPORTS = 'import sklearn.ensemble, sklearn.model_selection, sklearn.preprocessing; '
+EAGER_SERVER = EAGER_IMPORTS + ("import os, app; app.preload(); "
+                                "app.app.run(port=int(os.environ['PORT']), host='127.0.0.1')")
+PREDICT_BODY = json.dumps({'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'})
+
+
+def time_import(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def status(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, body=body, headers={'Content-Type': 'application/json'} if body else {})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def time_server(cmd, env, port, timeout=120):
+    """Seconds from spawn until the port opens, /predict answers 200 and /ready answers 200"""
+    start = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    marks = {}
+    try:
+        while len(marks) < 3 and time.perf_counter() - start < timeout:
+            try:
+                if 'port' not in marks:
+                    with socket.create_connection(('127.0.0.1', port), timeout=1):
+                        marks['port'] = time.perf_counter() - start
+                if 'predict' not in marks and status(port, 'POST', '/predict', PREDICT_BODY) == 200:
+                    marks['predict'] = time.perf_counter() - start
+                if 'ready' not in marks and status(port, 'GET', '/ready') == 200:
+                    marks['ready'] = time.perf_counter() - start
+            except OSError:
+                pass
+            time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    env = dict(os.environ, ORDERLY_DATA_DIR=data_dir, ORDERLY_LOG_LEVEL='OFF')
+
+    for label, code in [('import app (eager sklearn)', EAGER_IMPORTS + 'import app'), ('import app (lazy)', 'import app')]:
+        samples = [time_import(code, env) for _ in range(args.runs + 1)][1:]
+        print(f"{label:<28} {np.median(samples) * 1000:8.0f} ms  (median of {args.runs})")
+
+    for label, cmd in [('dev server, eager', [sys.executable, '-c', EAGER_SERVER]),
+                       ('dev server, lazy', [sys.executable, 'app.py'])]:
+        runs = []
+        for _ in range(args.runs + 1):
+            port = free_port()
+            runs.append(time_server(cmd, dict(env, PORT=str(port)), port))
+        runs = runs[1:]
+        medians = {mark: np.median([r[mark] for r in runs if mark in r]) * 1000 for mark in ('port', 'predict', 'ready')}
+        print(f"{label:<28} port open {medians['port']:6.0f} ms  first /predict {medians['predict']:6.0f} ms  "
+              f"/ready {medians['ready']:6.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
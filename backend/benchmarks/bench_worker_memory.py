@@ -0,0 +1,144 @@
+"""Per-worker memory of gunicorn with the pickled model vs the memory-mapped export.
+
+Starts gunicorn with --workers N (4 and 16 by default) for each mode, sends
+random /predict traffic so every worker has walked its trees, waits for
+memory to settle and
+reads each worker's /proc/<pid>/smaps_rollup:
+
+  * RSS   resident pages, shared ones included (what `ps` shows)
+  * PSS   resident pages, each shared page split between the processes mapping it
+  * USS   pages private to the worker
+
+Modes:
+
+  * pickle, per worker      ORDERLY_WARMUP=background: every worker loads the
+                            pickle (and sklearn) into its own heap
+  * pickle, preload         the default: loaded once in the master, pages
+                            shared copy-on-write after fork
+  * mmap export             ORDERLY_MODEL_MMAP=1: workers map the export
+                            read-only and never load the pickle
+  * mmap export, float32    the same with a train.py --float32 export
+  * mmap export, preload    mapped once in the master, app imported there too
+
+Linux only (reads /proc).
+
+    python benchmarks/bench_worker_memory.py [--workers 4 16] [--rows 20000]
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from bench_predict_batching import random_orders
+from common import BACKEND_DIR, make_data_dir, train_model
+from load_test import free_port, wait_until_warm
+
+
+def worker_pids(master):
+    with open(f'/proc/{master}/task/{master}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def memory_kib(pid):
+    """RSS, PSS and USS of a process in KiB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': fields['Rss'], 'pss': fields['Pss'], 'uss': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def wait_settled(master, workers, timeout=300, quiet=3):
+    """Wait until all workers are up and their total RSS stopped changing for `quiet` seconds"""
+    deadline = time.monotonic() + timeout
+    previous, stable = None, 0
+    while time.monotonic() < deadline and stable < quiet:
+        time.sleep(1)
+        pids = worker_pids(master)
+        if len(pids) < workers:
+            continue
+        total = sum(memory_kib(pid)['rss'] for pid in pids)
+        stable = stable + 1 if previous and abs(total - previous) <= 0.005 * previous else 0
+        previous = total
+
+
+def send_predictions(port, n, concurrency):
+    """n random /predict calls on fresh connections, so they spread over the workers"""
+    orders = random_orders(n)
+
+    def client(i):
+        for body in orders[i::concurrency]:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.request('POST', '/predict', body=body, headers={'Content-Type': 'application/json'})
+            conn.getresponse().read()
+            conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def measure_mode(data_dir, overrides, workers, requests):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), ORDERLY_DATA_DIR=data_dir, ORDERLY_ACCESS_LOG='', ORDERLY_LOG_LEVEL='WARNING',
+               WEB_CONCURRENCY=str(workers), ORDERLY_THREADS='1', **overrides)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_warm(port, timeout=300)
+        wait_settled(server.pid, workers)
+        send_predictions(port, requests, workers)
+        wait_settled(server.pid, workers)
+        usage = [memory_kib(pid) for pid in worker_pids(server.pid)]
+        master = memory_kib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    per_worker = {key: np.mean([u[key] for u in usage]) / 1024 for key in ('rss', 'pss', 'uss')}
+    per_worker['total_pss'] = (sum(u['pss'] for u in usage) + master['pss']) / 1024
+    return per_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--requests', type=int, default=2000, help='/predict calls before measuring')
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    float32_dir = make_data_dir(args.rows)
+    train_model(float32_dir, float32=True)
+
+    for label, directory in (('float64', data_dir), ('float32', float32_dir)):
+        pickle = os.path.getsize(os.path.join(directory, 'food_delivery_model.pkl')) / 2 ** 20
+        export = os.path.getsize(os.path.join(directory, 'food_delivery_model.forest.npz')) / 2 ** 20
+        print(f"{label}: pickle {pickle:.1f} MiB, export {export:.1f} MiB")
+
+    modes = [
+        ('pickle, per worker', data_dir, {'ORDERLY_WARMUP': 'background'}),
+        ('pickle, preload', data_dir, {'ORDERLY_WARMUP': 'preload'}),
+        ('mmap export', data_dir, {'ORDERLY_WARMUP': 'background', 'ORDERLY_MODEL_MMAP': '1'}),
+        ('mmap export, float32', float32_dir, {'ORDERLY_WARMUP': 'background', 'ORDERLY_MODEL_MMAP': '1'}),
+        ('mmap export, preload', data_dir, {'ORDERLY_WARMUP': 'preload', 'ORDERLY_MODEL_MMAP': '1'}),
+    ]
+    for workers in args.workers:
+        print(f"\n{workers} workers (MiB per worker; total PSS includes the master)")
+        for label, directory, overrides in modes:
+            m = measure_mode(directory, overrides, workers, args.requests)
+            print(f"  {label:<24} RSS {m['rss']:7.1f}  PSS {m['pss']:7.1f}  USS {m['uss']:7.1f}  "
+                  f"total PSS {m['total_pss']:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
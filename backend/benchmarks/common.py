@@ -0,0 +1,114 @@
+"""Shared helpers for the backend benchmarks.
+
+Benchmarks run from the ``backend`` directory, e.g.::
+
+    python benchmarks/bench_predict_latency.py
+
+They never touch ``data/``: each one writes a synthetic dataset with the same
+schema as ``dataset.csv`` into a temporary directory and points the app at it
+through ``ORDERLY_DATA_DIR``.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+CITIES = ['Delhi NCR', 'Mumbai', 'Bangalore', 'Pune', 'Chennai', 'Lucknow']
+SUBZONES = ['Sector 4', 'Sector 18', 'Koramangala', 'Indiranagar', 'Bandra', 'Andheri', 'Hazratganj', 'Adyar']
+STATUSES = ['Delivered', 'Delivered', 'Delivered', 'Delivered', 'Rejected', 'Cancelled']
+MONTHS = ['August', 'September', 'October']
+
+
+def make_orders(n, seed=42):
+    """Build a synthetic order frame with the columns used by clean_dataset"""
+    rng = np.random.default_rng(seed)
+
+    km = rng.integers(1, 12, size=n).astype(str)
+    distance = np.char.add(km, 'km').astype(object)
+    distance[rng.random(n) < 0.15] = '<1km'
+    distance[rng.random(n) < 0.01] = np.nan
+
+    hours = rng.integers(1, 13, size=n)
+    minutes = rng.integers(0, 60, size=n)
+    ampm = np.where(rng.random(n) < 0.7, 'PM', 'AM')
+    days = rng.integers(1, 29, size=n)
+    months = np.array(MONTHS)[rng.integers(0, len(MONTHS), size=n)]
+    placed_at = [
+        f"{h:02d}:{m:02d} {p}, {mo} {d} 2024"
+        for h, m, p, mo, d in zip(hours, minutes, ampm, months, days)
+    ]
+
+    rating = rng.integers(1, 6, size=n).astype(float)
+    rating[rng.random(n) < 0.85] = np.nan
+    kpt = np.round(rng.gamma(4.0, 4.0, size=n), 2)
+    kpt[rng.random(n) < 0.015] = np.nan
+    rider_wait = np.round(rng.gamma(2.0, 2.5, size=n), 2)
+    rider_wait[rng.random(n) < 0.015] = np.nan
+
+    return pd.DataFrame({
+        'Restaurant ID': 20320607,
+        'Restaurant name': 'Swaad',
+        'Subzone': np.array(SUBZONES)[rng.integers(0, len(SUBZONES), size=n)],
+        'City': np.array(CITIES)[rng.integers(0, len(CITIES), size=n)],
+        'Order ID': np.arange(6100000000, 6100000000 + n),
+        'Order Placed At': placed_at,
+        'Order Status': np.array(STATUSES)[rng.integers(0, len(STATUSES), size=n)],
+        'Delivery': 'Zomato Delivery',
+        'Distance': distance,
+        'Rating': rating,
+        'KPT duration (minutes)': kpt,
+        'Rider wait time (minutes)': rider_wait,
+        'Order Ready Marked': np.where(rng.random(n) < 0.9, 'Correctly', 'Incorrectly'),
+    })
+
+
+def make_data_dir(n_rows, seed=42):
+    """Write a synthetic dataset.csv into a fresh temp dir and return its path"""
+    data_dir = tempfile.mkdtemp(prefix='orderly-bench-')
+    make_orders(n_rows, seed=seed).to_csv(os.path.join(data_dir, 'dataset.csv'), index=False)
+    return data_dir
+
+
+def train_model(data_dir, **kwargs):
+    """Train and publish a model into data_dir the way train.py does"""
+    from train import train
+    csv_path = os.path.join(data_dir, 'dataset.csv')
+    return train(csv_path, os.path.join(data_dir, 'food_delivery_model.pkl'), os.path.join(data_dir, 'models'), **kwargs)[0]
+
+
+def use_data_dir(data_dir):
+    """Point the app at data_dir; must be called before importing app"""
+    os.environ['ORDERLY_DATA_DIR'] = data_dir
+
+
+def measure(fn, repeat, warmup=0):
+    """Call fn repeatedly and return per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = (time.perf_counter() - start) * 1000
+    return samples
+
+
+def summarize(samples):
+    """Return p50/p99/mean of a latency sample in milliseconds"""
+    return {
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(np.mean(samples)),
+        'n': int(len(samples)),
+    }
+
+
+def print_row(label, stats):
+    print(f"{label:<40} p50={stats['p50_ms']:9.3f} ms  p99={stats['p99_ms']:9.3f} ms  mean={stats['mean_ms']:9.3f} ms  (n={stats['n']})")
@@ -0,0 +1,130 @@
+"""HTTP load test: Flask dev server (python app.py) vs gunicorn (wsgi.py).
+
+Starts each server as a subprocess on a synthetic dataset with a trained
+model, waits until /analyze is warm, then drives every endpoint with
+--concurrency keep-alive client threads for --duration seconds and reports
+requests per second and p50/p99 latency.
+
+    python benchmarks/load_test.py [--servers dev gunicorn] [--workers 4] [--threads 4]
+                                   [--concurrency 16] [--duration 10]
+
+The clients run on the same machine, so on a small box they compete with the
+server for CPU; compare modes rather than reading the numbers as absolutes.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from common import BACKEND_DIR, make_data_dir, summarize, train_model
+
+PREDICT_BODY = json.dumps({'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'})
+ENDPOINTS = {
+    '/predict': ('POST', PREDICT_BODY),
+    '/analyze': ('GET', None),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, data_dir, port, workers, threads):
+    env = dict(os.environ, PORT=str(port), ORDERLY_DATA_DIR=data_dir,
+               WEB_CONCURRENCY=str(workers), ORDERLY_THREADS=str(threads), ORDERLY_ACCESS_LOG='')
+    if kind == 'dev':
+        cmd = [sys.executable, 'app.py']
+    else:
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_warm(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/analyze')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server on port {port} did not become ready")
+
+
+def run_load(port, path, concurrency, duration):
+    """Hammer one endpoint; returns (requests per second, latencies in ms, errors)"""
+    method, body = ENDPOINTS[path]
+    headers = {'Content-Type': 'application/json'} if body else {}
+    latencies, errors = [[] for _ in range(concurrency)], [0] * concurrency
+    stop = time.monotonic() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors[i] += 1
+            except OSError:
+                errors[i] += 1
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies[i].append((time.perf_counter() - start) * 1000)
+
+    started = time.monotonic()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    elapsed = time.monotonic() - started
+    samples = np.concatenate([np.asarray(l) for l in latencies])
+    return len(samples) / elapsed, samples, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=['dev', 'gunicorn'], default=['dev', 'gunicorn'])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, {args.duration:.0f}s per endpoint")
+
+    for kind in args.servers:
+        port = free_port()
+        server = start_server(kind, data_dir, port, args.workers, args.threads)
+        label = 'dev server' if kind == 'dev' else f"gunicorn {args.workers}w x {args.threads}t"
+        try:
+            wait_until_warm(port)
+            for path in ENDPOINTS:
+                rps, samples, errors = run_load(port, path, args.concurrency, args.duration)
+                stats = summarize(samples)
+                print(f"{label:<22} {path:<10} {rps:8.0f} req/s  p50={stats['p50_ms']:8.2f} ms  "
+                      f"p99={stats['p99_ms']:8.2f} ms  errors={errors}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark suite: preprocessing, model load/inference and every Flask route.
+
+Generates a synthetic dataset with the dataset.csv schema (no network, no
+files outside a temp dir), trains a model on it the way train.py does,
+times every case and writes the results as JSON. With a baseline, each
+case's p50 is compared against it and the run fails (exit status 1) when
+any case is more than --threshold slower.
+
+    python benchmarks/run_suite.py                            # run, compare with baseline.json
+    python benchmarks/run_suite.py --save-baseline            # run and store a new baseline
+    python benchmarks/run_suite.py --only route: --repeat 500 # a subset, more samples
+
+Baselines are machine specific: refresh baseline.json on the machine that
+runs the comparison, from the same --rows.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from bench_predict_batching import random_orders
+from common import BACKEND_DIR, make_orders, make_data_dir, measure, summarize, train_model, use_data_dir
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results.json')
+
+BATCH_ORDER = {'Distance': '3km', 'KPT_duration': 18, 'Rider_wait_time': 4, 'Order_time': '08:15 PM'}
+
+
+def batch_orders(n):
+    return [dict(BATCH_ORDER, Distance=f"{i % 10 + 1}km", KPT_duration=10 + i % 25) for i in range(n)]
+
+
+def preprocess_cases(rows):
+    from utils.preprocess import (clean_dataset, convert_distance_series, convert_distance_to_numeric,
+                                  create_performance_label, create_performance_labels, extract_hour,
+                                  extract_hour_series)
+    orders = make_orders(rows)
+    sample = orders.iloc[:1000]
+    first = orders.iloc[0]
+    return [
+        ('preprocess:convert_distance_to_numeric', lambda: convert_distance_to_numeric('3.5km'), 1),
+        ('preprocess:extract_hour', lambda: extract_hour('11:38 PM, September 10 2024'), 1),
+        ('preprocess:create_performance_label', lambda: create_performance_label(first), 1),
+        ('preprocess:convert_distance_series[1k]', lambda: convert_distance_series(sample['Distance']), 4),
+        ('preprocess:extract_hour_series[1k]', lambda: extract_hour_series(sample['Order Placed At']), 4),
+        ('preprocess:create_performance_labels[1k]', lambda: create_performance_labels(sample), 4),
+        (f'preprocess:clean_dataset[{rows // 1000}k]', lambda: clean_dataset(orders.copy()), 20),
+    ]
+
+
+def model_cases(data_dir):
+    import joblib
+    import pandas as pd
+    from utils.compiled_forest import CompiledForest, compiled_path
+    from utils.preprocess import FEATURE_NAMES
+
+    model_path = os.path.join(data_dir, 'food_delivery_model.pkl')
+    model = joblib.load(model_path)
+    forest = CompiledForest.load(compiled_path(model_path))
+    row = [3.0, 18.0, 4.0, 20]
+    X_one = pd.DataFrame([row], columns=FEATURE_NAMES)
+    X_batch = pd.DataFrame(np.tile(row, (1000, 1)) + np.arange(1000)[:, None] % 7, columns=FEATURE_NAMES)
+    return [
+        ('model:joblib.load', lambda: joblib.load(model_path), 20),
+        ('model:CompiledForest.load', lambda: CompiledForest.load(compiled_path(model_path)), 4),
+        ('model:CompiledForest.load (mmap)', lambda: CompiledForest.load(compiled_path(model_path), mmap=True), 1),
+        ('model:sklearn predict_proba[1]', lambda: model.predict_proba(X_one), 4),
+        ('model:sklearn predict_proba[1k]', lambda: model.predict_proba(X_batch), 10),
+        ('model:compiled predict_one', lambda: forest.predict_one(row), 1),
+        ('model:compiled predict_proba[1k]', lambda: forest.predict_proba(X_batch.to_numpy()), 10),
+    ]
+
+
+def route_cases(backend):
+    client = backend.app.test_client()
+    small, large = batch_orders(100), batch_orders(2000)
+    location = {'age': 27, 'city': 'Mumbai', 'location': {'latitude': 19.07, 'longitude': 72.87}}
+    # A different order per call, so /predict is scored rather than answered by the prediction cache
+    orders = itertools.cycle(random_orders(20000))
+
+    def stream(path, **kwargs):
+        response = client.post(path, **kwargs)
+        response.get_data()
+        return response
+
+    cases = [
+        ('route:GET /', lambda: client.get('/'), 1),
+        ('route:POST /predict', lambda: client.post('/predict', data=next(orders), content_type='application/json'), 1),
+        ('route:POST /predict (cache hit)', lambda: client.post('/predict', json=BATCH_ORDER), 1),
+        ('route:POST /predict/batch[100]', lambda: client.post('/predict/batch', json=small), 2),
+        ('route:POST /predict/batch[2k] ndjson', lambda: stream('/predict/batch', json=large), 10),
+        ('route:GET /analyze', lambda: client.get('/analyze'), 1),
+        ('route:GET /feature-importance', lambda: client.get('/feature-importance'), 1),
+        ('route:GET /stats', lambda: client.get('/stats'), 1),
+        ('route:POST /recommendations', lambda: client.post('/recommendations', json={'age': 27, 'city': 'Mumbai'}), 1),
+        ('route:POST /recommendations (location)', lambda: client.post('/recommendations', json=location), 1),
+        ('route:GET /customers', lambda: client.get('/customers'), 1),
+        ('route:GET /menu', lambda: client.get('/menu/3/Mumbai'), 1),
+        ('route:GET /metrics', lambda: client.get('/metrics'), 1),
+        ('route:GET /ready', lambda: client.get('/ready'), 1),
+        ('route:POST /menu/reload', lambda: client.post('/menu/reload'), 4),
+    ]
+    # Every registered route must be covered, so a new one can't slip past the suite
+    covered = {'/', '/predict', '/predict/batch', '/analyze', '/feature-importance', '/stats',
+               '/recommendations', '/customers', '/menu/<int:vendor_id>/<city>', '/metrics', '/menu/reload', '/ready'}
+    missing = {rule.rule for rule in backend.app.url_map.iter_rules() if rule.endpoint != 'static'} - covered
+    if missing:
+        print(f"warning: routes without a benchmark: {', '.join(sorted(missing))}")
+    return cases
+
+
+def run_cases(cases, repeat, only):
+    results = {}
+    for name, fn, cost in cases:
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        fn()
+        stats = summarize(measure(fn, max(repeat // cost, 5), warmup=2))
+        results[name] = stats
+        print(f"{name:<48} p50={stats['p50_ms']:10.3f} ms  p99={stats['p99_ms']:10.3f} ms  (n={stats['n']})")
+    return results
+
+
+def environment(args):
+    import pandas as pd
+    import sklearn
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'rows': args.rows,
+        'repeat': args.repeat,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Cases more than threshold slower (by p50) than the baseline"""
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        ratio = stats['p50_ms'] / reference['p50_ms'] if reference['p50_ms'] > 0 else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((name, reference['p50_ms'], stats['p50_ms'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='rows in the synthetic dataset')
+    parser.add_argument('--repeat', type=int, default=200, help='samples for the cheapest cases')
+    parser.add_argument('--only', nargs='*', default=[], help='run only cases starting with these prefixes')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed p50 slowdown, 0.25 = 25%%')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline')
+    args = parser.parse_args()
+
+    data_dir = make_data_dir(args.rows)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    os.environ.setdefault('ORDERLY_LOG_LEVEL', 'WARNING')
+
+    import app as backend
+    backend.preload()
+
+    cases = preprocess_cases(args.rows) + model_cases(data_dir) + route_cases(backend)
+    report = {'environment': environment(args), 'results': run_cases(cases, args.repeat, args.only)}
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {os.path.relpath(args.output, BACKEND_DIR)}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {os.path.relpath(args.baseline, BACKEND_DIR)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('rows') != args.rows:
+        print(f"warning: baseline was recorded with --rows {baseline['environment'].get('rows')}")
+
+    regressions = compare(report['results'], baseline, args.threshold)
+    if not regressions:
+        print(f"No case is more than {args.threshold:.0%} slower than the baseline")
+        return 0
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+    for name, before, after, ratio in regressions:
+        print(f"  {name:<48} {before:10.3f} ms -> {after:10.3f} ms  ({ratio:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
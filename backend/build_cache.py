@@ -0,0 +1,51 @@
+"""Build the columnar cache of the cleaned dataset ahead of time.
+
+The server builds the cache itself on the first CSV load, so this step only
+takes that parse off the first request after a deploy:
+
+    cd backend && python build_cache.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append('utils')
+
+try:
+    from preprocess import clean_dataset
+    from columnar_cache import ColumnarCache
+except ImportError:
+    from utils.preprocess import clean_dataset
+    from utils.columnar_cache import ColumnarCache
+
+DATA_DIR = os.environ.get('ORDERLY_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the columnar cache of the cleaned dataset')
+    parser.add_argument('--csv', default=os.path.join(DATA_DIR, 'dataset.csv'))
+    parser.add_argument('--cache-dir', default=os.path.join(DATA_DIR, 'cache'))
+    parser.add_argument('--force', action='store_true', help='rebuild even if an entry already exists')
+    args = parser.parse_args()
+
+    cache = ColumnarCache(args.cache_dir)
+    key = cache.key_for(args.csv)
+    if key is None:
+        sys.exit(f"Dataset not found: {args.csv}")
+    if cache.exists(key) and not args.force:
+        print(f"Cache is up to date: {os.path.join(args.cache_dir, key)}")
+        return
+
+    start = time.perf_counter()
+    df = clean_dataset(pd.read_csv(args.csv))
+    cache.write(key, df)
+    cache.prune(key)
+    print(f"Cached {len(df)} rows x {len(df.columns)} columns in {time.perf_counter() - start:.2f}s "
+          f"-> {os.path.join(args.cache_dir, key)}")
+
+
+if __name__ == '__main__':
+    main()
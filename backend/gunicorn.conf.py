@@ -0,0 +1,50 @@
+"""Gunicorn settings for the production server.
+
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+or, for the asyncio serving mode (see asgi.py):
+
+    cd backend && ORDERLY_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi:app
+
+The app is imported once in the master (preload_app), which loads the
+dataset, model and catalogs before forking, so workers share those pages
+copy-on-write instead of each loading its own copy. Send HUP to the master
+to gracefully replace the workers; a new model or dataset file is picked up
+without a restart anyway.
+
+Settings come from the environment:
+    PORT                        port to bind (default 8000)
+    WEB_CONCURRENCY             worker processes (default 2 x CPUs + 1, at most 8)
+    ORDERLY_THREADS             threads per worker (default 4)
+    ORDERLY_WORKER_CLASS        gunicorn worker class (default gthread, or sync with one thread)
+    ORDERLY_TIMEOUT             seconds before a silent worker is restarted (default 60)
+    ORDERLY_MAX_REQUESTS        recycle a worker after this many requests (default 0 = never)
+    ORDERLY_ACCESS_LOG          access log file, '-' for stdout (default), empty to disable
+    ORDERLY_WARMUP              'preload' (default) loads in the master before forking;
+                                'background' opens the port first and warms up in each worker
+
+With more than one worker, set ORDERLY_HISTORY_BACKEND=sqlite so /stats and
+/analyze see predictions from every worker.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('ORDERLY_THREADS', 4))
+worker_class = os.environ.get('ORDERLY_WORKER_CLASS') or ('gthread' if threads > 1 else 'sync')
+
+preload_app = os.environ.get('ORDERLY_WARMUP', 'preload') != 'background'
+timeout = int(os.environ.get('ORDERLY_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('ORDERLY_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# '-' logs requests to stdout; set ORDERLY_ACCESS_LOG='' to turn it off
+accesslog = os.environ.get('ORDERLY_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    server.log.info(f"Orderly ready: {workers} workers x {threads} threads on {bind}")
@@ -0,0 +1,33 @@
+"""Shared setup for the backend tests.
+
+Run from the ``backend`` directory::
+
+    python -m pytest
+
+The parity tests reuse the reference implementations and synthetic data
+helpers kept in ``benchmarks/``, so the benchmarks and the tests check
+against the same code.
+"""
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope='session')
+def backend():
+    """The app module, pointed at a small synthetic dataset with a trained model and warmed up"""
+    from common import make_data_dir, train_model, use_data_dir
+    data_dir = make_data_dir(3000)
+    train_model(data_dir)
+    use_data_dir(data_dir)
+    os.environ.setdefault('ORDERLY_LOG_LEVEL', 'WARNING')
+    import app
+    app.preload()
+    return app
@@ -0,0 +1,75 @@
+"""/analyze served from running aggregates against the original per-request rebuild."""
+import pytest
+
+from bench_analyze import check_parity, random_orders, record_predictions
+
+HISTORY_SIZES = [0, 1, 50, 400]
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def client(request, backend, monkeypatch, tmp_path):
+    """Test client with an empty prediction history in each backend"""
+    store = backend.create_history_store(request.param, str(tmp_path), capacity=max(HISTORY_SIZES))
+    monkeypatch.setattr(backend, 'history_store', store)
+    return backend.app.test_client()
+
+
+def test_analyze_matches_reference(backend, client):
+    df = backend.dataset_cache.refresh(wait=True).frame
+    recorded = 0
+    for size in HISTORY_SIZES:
+        record_predictions(client, random_orders(size - recorded, seed=size))
+        recorded = size
+        assert len(backend.history_store) == size
+        check_parity(client, df, backend.history_store, size)
+
+
+def test_history_rejects_non_finite(backend, client):
+    # A NaN would stay in the running KPT/distance sums (and in the SQLite file) for good
+    df = backend.dataset_cache.refresh(wait=True).frame
+    orders = random_orders(3, seed=7)
+    record_predictions(client, orders)
+    orders[1]['KPT_duration'] = 'nan'
+    response = client.post('/predict', json=orders[1])
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'KPT_duration must be a number'
+
+    record = dict(backend.history_store.recent(1)[0], kpt_duration=float('nan'))
+    with pytest.raises(ValueError):
+        backend.history_store.append(record)
+    with pytest.raises(ValueError):
+        backend.history_store.extend({field: [value] for field, value in record.items()})
+    assert len(backend.history_store) == 3
+    check_parity(client, df, backend.history_store, 3)
+    assert client.get('/analyze').get_json()['summary']['avg_kpt_duration'] > 0
+
+
+@pytest.mark.parametrize('value', [None, 'nan', 'inf', 'abc'])
+def test_batch_rejects_non_finite_numbers(backend, client, value):
+    orders = random_orders(5, seed=3)
+    orders[3]['KPT_duration'] = value
+    response = client.post('/predict/batch', json=orders)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'orders[3].KPT_duration must be a number'
+    assert len(backend.history_store) == 0
+
+
+@pytest.mark.parametrize('query, message', [
+    ('limit=-1', 'limit must be at least 1'),
+    ('limit=0', 'limit must be at least 1'),
+    ('limit=x', 'limit must be an integer'),
+    ('hour_from=5&hour_to=3', 'hour_from must not be after hour_to'),
+    ('hour_to=24', 'hour_to must be at most 23'),
+    ('hour_window=0', 'hour_window must be at least 1'),
+    ('date_from=2024-09-10&date_to=2024-09-01', 'date_from must not be after date_to'),
+])
+def test_grouped_query_rejects_bad_parameters(backend, query, message):
+    response = backend.app.test_client().get(f'/analyze?group_by=city&{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == message
+
+
+def test_grouped_query_reports_date_bounds(backend):
+    response = backend.app.test_client().get('/analyze?group_by=city&date_from=1970-01-01')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['filters']['day'] == {'from': '1970-01-01', 'to': None}
@@ -0,0 +1,72 @@
+"""Flat-array forest export against model.predict_proba."""
+import copy
+
+import numpy as np
+import pytest
+
+from bench_compiled_forest import check_parity, random_rows, threshold_rows
+from utils.compiled_forest import CompiledForest
+
+
+@pytest.fixture(scope='module')
+def model(backend):
+    return backend.get_model()
+
+
+@pytest.fixture(scope='module')
+def forest(model):
+    return CompiledForest.from_model(model)
+
+
+@pytest.mark.parametrize('rows', [
+    pytest.param(lambda model: random_rows(300), id='random'),
+    pytest.param(lambda model: threshold_rows(model, 300), id='on-split-thresholds'),
+])
+def test_matches_predict_proba(model, forest, rows):
+    # Batch evaluator and predict_one, row by row
+    check_parity(model, forest, rows(model))
+
+
+def test_float32_export_agrees_on_thresholds(model, forest):
+    assert forest.to_float32().agrees_with(forest, threshold_rows(model, 300))
+
+
+def test_rows_with_nan_use_sklearn(backend, model):
+    X = random_rows(50)
+    X[::7, 1] = np.nan
+    X[3, 0] = np.nan
+    labels, probabilities = backend.score_rows(model, X)
+    expected = model.predict_proba(X)
+    np.testing.assert_array_equal(probabilities, expected)
+    np.testing.assert_array_equal(labels, model.classes_.take(np.argmax(expected, axis=1)))
+
+
+def test_predict_rejects_nan(backend):
+    client = backend.app.test_client()
+    response = client.post('/predict', json={'Distance': '3km', 'KPT_duration': 'nan',
+                                             'Rider_wait_time': 5, 'Order_time': '07:30 PM'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'KPT_duration must be a number'
+
+
+def test_matches_only_the_source_model(model, forest, tmp_path):
+    path = str(tmp_path / 'model.forest.npz')
+    forest.save(path)
+    assert forest.matches(model)
+    assert CompiledForest.load(path).matches(model)
+    assert CompiledForest.load(path, mmap=True).matches(model)
+    assert forest.to_float32().matches(model)
+
+    # Same shape, one threshold moved: a retrained model the old export must not score
+    retrained = copy.deepcopy(model)
+    tree = retrained.estimators_[0].tree_
+    state = tree.__getstate__()
+    state['nodes']['threshold'][0] += 0.25
+    tree.__setstate__(state)
+    assert not forest.matches(retrained)
+
+    # Exports written before fingerprints were recorded are recompiled
+    stale = copy.copy(forest)
+    stale.fingerprint = None
+    stale.save(path)
+    assert not CompiledForest.load(path).matches(model)
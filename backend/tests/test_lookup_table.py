@@ -0,0 +1,32 @@
+"""/predict lookup table and the mapped export."""
+import functools
+
+import numpy as np
+
+PAYLOAD = {'Distance': '2km', 'KPT_duration': 15, 'Rider_wait_time': 5, 'Order_time': '07:30 PM'}
+ROW = [2.0, 15.0, 5.0, 19]
+
+
+def test_mapped_export_skips_pickle_and_table(backend, monkeypatch):
+    # ORDERLY_MODEL_MMAP=1 with ORDERLY_LOOKUP_TABLE=1: /predict scores with the
+    # export, and warm-up neither loads the pickle nor builds the table
+    export_registry = backend.ModelRegistry(backend.compiled_path(backend.MODEL_PATH),
+                                            loader=functools.partial(backend.CompiledForest.load, mmap=True))
+    model_registry = backend.ModelRegistry(backend.MODEL_PATH)
+    monkeypatch.setattr(backend, 'export_registry', export_registry)
+    monkeypatch.setattr(backend, 'model_registry', model_registry)
+    monkeypatch.setattr(backend, 'LOOKUP_TABLE', True)
+    monkeypatch.setattr(backend, 'prediction_table', (None, None))
+    monkeypatch.setattr(backend, 'prediction_cache', None)
+
+    backend.warm_model()
+    response = backend.app.test_client().post('/predict', json=PAYLOAD)
+    assert response.status_code == 200, response.get_json()
+
+    label, probability = export_registry.get().predict_one(ROW)
+    body = response.get_json()
+    assert body['predicted_label'] == label
+    assert np.isclose(body['confidence'], probability.max(), rtol=0, atol=1e-12)
+    assert not model_registry.loaded
+    assert backend.prediction_table == (None, None)
+    assert backend.prediction_table_worker is None or not backend.prediction_table_worker.is_alive()
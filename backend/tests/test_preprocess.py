@@ -0,0 +1,32 @@
+"""Vectorized preprocessing against the original row-wise functions."""
+import pandas as pd
+import pytest
+
+from bench_preprocess import EDGE_DISTANCES, EDGE_TIMESTAMPS, clean_dataset_rowwise, edge_case_orders
+from common import make_orders
+from utils.preprocess import (clean_dataset, convert_distance_series, convert_distance_to_numeric, extract_day,
+                              extract_day_series, extract_hour, extract_hour_series)
+
+
+def test_distance_series_matches_rowwise():
+    expected = [convert_distance_to_numeric(v) for v in EDGE_DISTANCES]
+    assert convert_distance_series(EDGE_DISTANCES).tolist() == expected
+
+
+def test_hour_series_matches_rowwise():
+    expected = [extract_hour(v) for v in EDGE_TIMESTAMPS]
+    assert extract_hour_series(EDGE_TIMESTAMPS).tolist() == expected
+
+
+def test_day_series_matches_rowwise():
+    expected = [extract_day(v) for v in EDGE_TIMESTAMPS]
+    assert extract_day_series(EDGE_TIMESTAMPS).tolist() == expected
+
+
+@pytest.mark.parametrize('orders', [
+    pytest.param(edge_case_orders, id='edge-cases'),
+    pytest.param(lambda: make_orders(20000, seed=3), id='synthetic'),
+])
+def test_clean_dataset_matches_rowwise(orders):
+    df = orders()
+    pd.testing.assert_frame_equal(clean_dataset(df.copy()), clean_dataset_rowwise(df.copy()))
@@ -0,0 +1,37 @@
+"""/ready after warm-up, with and without a usable model."""
+import pytest
+
+
+@pytest.fixture
+def warm_up(backend, monkeypatch, tmp_path):
+    """Run a fresh warm-up with the model artifact at a temporary path"""
+    model_path = str(tmp_path / 'food_delivery_model.pkl')
+    monkeypatch.setattr(backend, 'MODEL_PATH', model_path)
+    monkeypatch.setattr(backend, 'model_registry', backend.ModelRegistry(model_path))
+    monkeypatch.setattr(backend, 'warmup', {'status': 'pending', 'steps': {}, 'seconds': None})
+
+    def run():
+        backend.preload()
+        return backend.app.test_client().get('/ready')
+    return run
+
+
+def test_ready_after_warmup(backend):
+    response = backend.app.test_client().get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+
+
+@pytest.mark.parametrize('artifact, error', [
+    (None, 'failed: Model not available, run `python train.py` to create it'),
+    (b'not a pickle', 'failed: Model at {path} failed to load'),
+])
+def test_not_ready_without_a_model(backend, warm_up, artifact, error):
+    if artifact is not None:
+        with open(backend.MODEL_PATH, 'wb') as f:
+            f.write(artifact)
+    response = warm_up()
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['status'] == 'failed' and not body['ready']
+    assert body['steps']['model'] == error.format(path=backend.MODEL_PATH)
@@ -0,0 +1,298 @@
+"""Offline training for the /predict model.
+
+The API never fits a model itself; it only loads the artifact published here
+and hot-swaps it when the file changes:
+
+    cd backend && python train.py                  # full refit on all cores
+    python train.py --sample 200000                # stratified sample of the dataset
+    python train.py --chunk-size 100000            # stream the CSV, adding trees per chunk
+    python train.py --warm-start 25                # add 25 trees to the current model
+
+Every run writes a versioned artifact, its flat-array export (see
+utils/compiled_forest.py) and a JSON metadata file to ``data/models/``, then
+publishes them as ``data/food_delivery_model.{pkl,forest.npz,json}``.
+``--export-only`` just rebuilds the export of the published model.
+``--float32`` stores the export's thresholds and leaf values as float32 when
+that scores the training rows exactly like the float64 export.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+
+try:
+    from preprocess import FEATURE_NAMES, clean_dataset
+    from columnar_cache import ColumnarCache, load_cleaned_dataset
+    from ingest import INGEST_DTYPES
+    from compiled_forest import CompiledForest, compiled_path
+except ImportError:
+    from utils.preprocess import FEATURE_NAMES, clean_dataset
+    from utils.columnar_cache import ColumnarCache, load_cleaned_dataset
+    from utils.ingest import INGEST_DTYPES
+    from utils.compiled_forest import CompiledForest, compiled_path
+
+DATA_DIR = os.environ.get('ORDERLY_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+MODEL_PATH = os.path.join(DATA_DIR, 'food_delivery_model.pkl')
+DATASET_PATH = os.path.join(DATA_DIR, 'dataset.csv')
+MODELS_DIR = os.path.join(DATA_DIR, 'models')
+
+TRAINING_COLUMNS = FEATURE_NAMES + ['performance_label']
+
+# Training rows the float32 export is checked against
+PARITY_ROWS = 20000
+
+
+def metadata_path(model_path):
+    """JSON metadata file that sits next to a model artifact"""
+    return os.path.splitext(model_path)[0] + '.json'
+
+
+def load_metadata(model_path):
+    """Metadata of a model artifact, or None if it has none"""
+    try:
+        with open(metadata_path(model_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_training_set(csv_path, cache=None):
+    """Return the (X, y) training set from the cleaned dataset"""
+    df = load_cleaned_dataset(csv_path, cache, TRAINING_COLUMNS)
+    return df[FEATURE_NAMES].fillna(0).to_numpy(dtype=np.float32), df['performance_label'].to_numpy()
+
+
+def iter_training_chunks(csv_path, chunksize):
+    """Yield (X, y) per chunk of the CSV without holding the whole file"""
+    reader = pd.read_csv(csv_path, chunksize=chunksize, usecols=lambda c: c in INGEST_DTYPES, dtype=INGEST_DTYPES)
+    for chunk in reader:
+        # Missing KPT/rider wait values get the chunk's median rather than the file's
+        chunk = clean_dataset(chunk)
+        yield chunk[FEATURE_NAMES].fillna(0).to_numpy(dtype=np.float32), chunk['performance_label'].to_numpy()
+
+
+def stratified_sample(X, y, n_rows, random_state=42):
+    """Sample n_rows keeping the label distribution of y"""
+    if n_rows >= len(y):
+        return X, y
+    try:
+        X, _, y, _ = train_test_split(X, y, train_size=n_rows, stratify=y, random_state=random_state)
+    except ValueError:
+        # A label with a single row cannot be stratified; fall back to a uniform sample
+        X, _, y, _ = train_test_split(X, y, train_size=n_rows, random_state=random_state)
+    return X, y
+
+
+def count_rows(csv_path):
+    """Number of data rows in a CSV, without parsing it"""
+    with open(csv_path, 'rb') as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def fit_trees(model, X, y, n_trees):
+    """Grow n_trees more trees on (X, y), keeping the ones already fitted"""
+    fitted = len(getattr(model, 'estimators_', []))
+    # Old and new trees must vote over the same classes, in the same order
+    if fitted and not np.array_equal(np.unique(y), model.classes_):
+        raise ValueError(f"labels {np.unique(y).tolist()} do not match the model's classes {model.classes_.tolist()}")
+    model.set_params(n_estimators=fitted + n_trees, warm_start=bool(fitted))
+    model.fit(X, y)
+    return model
+
+
+def export_forest(model, path, float32=False, X_check=None):
+    """Write the flat-array export of model; returns the CompiledForest written"""
+    forest = CompiledForest.from_model(model)
+    if float32:
+        compact = forest.to_float32()
+        X_check = np.asarray(X_check, dtype=np.float64)[:PARITY_ROWS]
+        if compact.agrees_with(forest, X_check):
+            forest = compact
+        else:
+            print("float32 export disagrees with float64 on the training rows; keeping float64")
+    forest.save(path)
+    return forest
+
+
+def write_artifact(model, version, models_dir=MODELS_DIR, float32=False, X_check=None):
+    """Save a versioned model artifact and its flat-array export; return (artifact path, export)"""
+    os.makedirs(models_dir, exist_ok=True)
+    artifact = os.path.join(models_dir, f"food_delivery_model-{version}.pkl")
+    joblib.dump(model, artifact)
+    forest = export_forest(model, compiled_path(artifact), float32, X_check)
+    return artifact, forest
+
+
+def publish(artifact, metadata, model_path=MODEL_PATH, keep=5):
+    """Write the artifact's metadata and make it the model the server loads"""
+    with open(metadata_path(artifact), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    # Copy, then rename, so the server never sees a partial file. The pickle
+    # goes last: its change is what makes the server reload.
+    for src, dst in ((metadata_path(artifact), metadata_path(model_path)),
+                     (compiled_path(artifact), compiled_path(model_path)),
+                     (artifact, model_path)):
+        tmp_path = f"{dst}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+
+    prune_versions(os.path.dirname(artifact), keep)
+
+
+def prune_versions(models_dir, keep):
+    """Delete all but the newest `keep` versioned artifacts"""
+    artifacts = sorted(name for name in os.listdir(models_dir) if name.endswith('.pkl'))
+    for name in artifacts[:-keep] if keep > 0 else []:
+        artifact = os.path.join(models_dir, name)
+        for path in (artifact, metadata_path(artifact), compiled_path(artifact)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def train(csv_path=DATASET_PATH, model_path=MODEL_PATH, models_dir=MODELS_DIR, cache=None, n_estimators=100,
+          n_jobs=-1, sample=None, chunk_size=None, warm_start=None, keep=5, random_state=42, float32=False):
+    """Train (or extend) the model and publish it; returns (model, metadata)"""
+    started = time.perf_counter()
+    timings = {'load_seconds': 0.0, 'fit_seconds': 0.0}
+
+    base_metadata = None
+    if warm_start:
+        model = joblib.load(model_path)
+        base_metadata = load_metadata(model_path) or {}
+        model.set_params(n_jobs=n_jobs)
+        n_trees = warm_start
+    else:
+        model = RandomForestClassifier(n_estimators=0, random_state=random_state, n_jobs=n_jobs)
+        n_trees = n_estimators
+
+    rows = sampled_from = 0
+    chunks = []
+    if chunk_size:
+        # Spread the new trees over the chunks; every chunk gets at least one
+        n_chunks = max(1, -(-count_rows(csv_path) // chunk_size))
+        per_chunk = np.diff(np.linspace(0, n_trees, n_chunks + 1).round().astype(int)).clip(min=1)
+        load_start = time.perf_counter()
+        for i, (X, y) in enumerate(iter_training_chunks(csv_path, chunk_size)):
+            timings['load_seconds'] += time.perf_counter() - load_start
+            trees = int(per_chunk[min(i, len(per_chunk) - 1)])
+            fit_start = time.perf_counter()
+            try:
+                fit_trees(model, X, y, trees)
+            except ValueError as e:
+                print(f"Skipping chunk {i}: {e}")
+                trees = 0
+            timings['fit_seconds'] += time.perf_counter() - fit_start
+            chunks.append({'rows': len(y), 'trees': trees})
+            rows += len(y) if trees else 0
+            load_start = time.perf_counter()
+        sampled_from = rows
+    else:
+        load_start = time.perf_counter()
+        X, y = load_training_set(csv_path, cache)
+        sampled_from = len(y)
+        if sample:
+            X, y = stratified_sample(X, y, sample, random_state)
+        timings['load_seconds'] = time.perf_counter() - load_start
+        if len(y) == 0:
+            raise ValueError(f"No training rows in {csv_path}")
+        fit_start = time.perf_counter()
+        fit_trees(model, X, y, n_trees)
+        timings['fit_seconds'] = time.perf_counter() - fit_start
+        rows = len(y)
+
+    if not hasattr(model, 'estimators_'):
+        raise ValueError(f"No usable training rows in {csv_path}")
+
+    # Requests predict one row at a time, where a worker pool costs more than it saves
+    model.set_params(n_jobs=None, warm_start=False)
+
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    metadata = {
+        'version': version,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'features': FEATURE_NAMES,
+        'classes': model.classes_.tolist(),
+        'n_estimators': len(model.estimators_),
+        'training_rows': int(rows),
+        'sampled_from': int(sampled_from),
+        'chunks': chunks,
+        'warm_start_from': base_metadata.get('version') if base_metadata is not None else None,
+        'dataset': os.path.abspath(csv_path),
+        'params': {'n_jobs': n_jobs, 'sample': sample, 'chunk_size': chunk_size, 'random_state': random_state,
+                   'float32': float32},
+        'sklearn_version': sklearn.__version__,
+    }
+    if base_metadata:
+        metadata['training_rows_total'] = base_metadata.get('training_rows_total', base_metadata.get('training_rows', 0)) + int(rows)
+
+    save_start = time.perf_counter()
+    # The last chunk (or the training set) doubles as the float32 parity check
+    artifact, forest = write_artifact(model, version, models_dir, float32, X)
+    metadata['export_dtype'] = str(forest.threshold.dtype)
+    timings['save_seconds'] = time.perf_counter() - save_start
+    timings['total_seconds'] = time.perf_counter() - started
+    metadata['timings'] = timings
+
+    publish(artifact, metadata, model_path, keep)
+    return model, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the delivery performance model offline')
+    parser.add_argument('--csv', default=DATASET_PATH)
+    parser.add_argument('--model', default=MODEL_PATH, help='published artifact the server loads')
+    parser.add_argument('--models-dir', default=MODELS_DIR, help='where versioned artifacts are kept')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--n-jobs', type=int, default=-1, help='cores to fit on (-1 = all)')
+    parser.add_argument('--sample', type=int, help='train on a stratified sample of this many rows')
+    parser.add_argument('--chunk-size', type=int, help='stream the CSV and add trees chunk by chunk')
+    parser.add_argument('--warm-start', type=int, metavar='TREES', help='add TREES trees to the published model')
+    parser.add_argument('--keep', type=int, default=5, help='versioned artifacts to keep')
+    parser.add_argument('--no-cache', action='store_true', help='do not read or write the columnar cache')
+    parser.add_argument('--export-only', action='store_true', help='only rebuild the flat-array export of --model')
+    parser.add_argument('--float32', action='store_true',
+                        help='store export thresholds and leaf values as float32 if that keeps predictions identical')
+    args = parser.parse_args()
+
+    if args.export_only:
+        start = time.perf_counter()
+        X_check = load_training_set(args.csv)[0] if args.float32 else None
+        forest = export_forest(joblib.load(args.model), compiled_path(args.model), args.float32, X_check)
+        print(f"Exported {forest.n_estimators} trees ({forest.nbytes / 2 ** 20:.1f} MiB, "
+              f"{forest.threshold.dtype}) in "
+              f"{time.perf_counter() - start:.2f}s -> {compiled_path(args.model)}")
+        return
+
+    if args.sample and args.chunk_size:
+        parser.error('--sample and --chunk-size cannot be combined')
+    if args.warm_start and not os.path.exists(args.model):
+        sys.exit(f"No model to warm-start from: {args.model}")
+
+    cache = None if args.no_cache else ColumnarCache(os.path.join(os.path.dirname(os.path.abspath(args.csv)), 'cache'))
+    try:
+        _, metadata = train(args.csv, args.model, args.models_dir, cache, args.n_estimators, args.n_jobs,
+                            args.sample, args.chunk_size, args.warm_start, args.keep, float32=args.float32)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Training failed: {e}")
+
+    timings = metadata['timings']
+    print(f"Model {metadata['version']}: {metadata['n_estimators']} trees on {metadata['training_rows']} rows "
+          f"(load {timings['load_seconds']:.2f}s, fit {timings['fit_seconds']:.2f}s, save {timings['save_seconds']:.2f}s) "
+          f"-> {args.model}")
+
+
+if __name__ == '__main__':
+    main()
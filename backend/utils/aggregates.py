@@ -0,0 +1,121 @@
+import threading
+
+import numpy as np
+
+
+class OrderAggregates:
+    """Mergeable summary of cleaned orders used by /analyze.
+
+    Only counts and sums are stored, so aggregates built from separate
+    frames (or chunks of one frame) can be merged and still give the same
+    means as computing them over the concatenated data.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.rating_sum = 0.0
+        self.kpt_sum = 0.0
+        self.distance_sum = 0.0
+        self.delivered = 0
+        self.performance = {}
+        self.hours = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Summarize a frame produced by clean_dataset"""
+        agg = cls()
+        agg.count = len(df)
+        agg.rating_sum = _column_sum(df['Rating'])
+        agg.kpt_sum = _column_sum(df['KPT duration (minutes)'])
+        agg.distance_sum = _column_sum(df['Distance_numeric'])
+        agg.delivered = int((df['Order Status'] == 'Delivered').sum())
+        agg.performance = {int(k): int(v) for k, v in df['performance_label'].value_counts().items()}
+        agg.hours = {int(k): int(v) for k, v in df.groupby('order_hour').size().items()}
+        return agg
+
+    def merge(self, other):
+        """Fold another OrderAggregates into this one and return self"""
+        self.count += other.count
+        self.rating_sum += other.rating_sum
+        self.kpt_sum += other.kpt_sum
+        self.distance_sum += other.distance_sum
+        self.delivered += other.delivered
+        for key, value in other.performance.items():
+            self.performance[key] = self.performance.get(key, 0) + value
+        for key, value in other.hours.items():
+            self.hours[key] = self.hours.get(key, 0) + value
+        return self
+
+    def _mean(self, total):
+        # np.float64 so callers round the same way as the pandas means did
+        return np.float64(total) / self.count if self.count else np.nan
+
+    @property
+    def avg_rating(self):
+        return self._mean(self.rating_sum)
+
+    @property
+    def avg_kpt(self):
+        return self._mean(self.kpt_sum)
+
+    @property
+    def avg_distance(self):
+        return self._mean(self.distance_sum)
+
+    @property
+    def delivery_success_rate(self):
+        return self._mean(self.delivered) * 100
+
+
+def _column_sum(column):
+    # Accumulate in float64 even for the float32 columns of chunked ingestion
+    return float(column.fillna(0).to_numpy(dtype=np.float64).sum())
+
+
+class PredictionAggregates:
+    """Running totals over /predict results.
+
+    Each prediction updates the counters in O(1), so /analyze can merge them
+    with the dataset aggregates without revisiting the prediction history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.kpt_sum = 0.0
+        self.distance_sum = 0.0
+        self.performance = {}
+        self.hours = {}
+
+    def add(self, distance, kpt_duration, label, hour):
+        """Record a single prediction"""
+        with self._lock:
+            self.count += 1
+            self.kpt_sum += kpt_duration
+            self.distance_sum += distance
+            self.performance[label] = self.performance.get(label, 0) + 1
+            self.hours[hour] = self.hours.get(hour, 0) + 1
+
+    def add_many(self, distances, kpt_durations, labels, hours):
+        """Record a batch of predictions given as equal-length arrays"""
+        label_keys, label_counts = np.unique(np.asarray(labels), return_counts=True)
+        hour_keys, hour_counts = np.unique(np.asarray(hours), return_counts=True)
+        with self._lock:
+            self.count += len(labels)
+            self.kpt_sum += float(np.sum(kpt_durations))
+            self.distance_sum += float(np.sum(distances))
+            for key, value in zip(label_keys.tolist(), label_counts.tolist()):
+                self.performance[key] = self.performance.get(key, 0) + value
+            for key, value in zip(hour_keys.tolist(), hour_counts.tolist()):
+                self.hours[key] = self.hours.get(key, 0) + value
+
+    def snapshot(self):
+        """Return a consistent copy of the counters"""
+        with self._lock:
+            copy = PredictionAggregates()
+            copy.count = self.count
+            copy.kpt_sum = self.kpt_sum
+            copy.distance_sum = self.distance_sum
+            copy.performance = dict(self.performance)
+            copy.hours = dict(self.hours)
+            return copy
@@ -0,0 +1,447 @@
+import functools
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+try:
+    from columnar_cache import ColumnarCache
+except ImportError:
+    from utils.columnar_cache import ColumnarCache
+
+logger = logging.getLogger(__name__)
+
+# Dimensions grouped /analyze queries can group by or filter on, and the column behind each
+DIMENSIONS = {
+    'city': 'City',
+    'subzone': 'Subzone',
+    'status': 'Order Status',
+    'day': 'order_day',
+    'hour': 'order_hour',
+}
+TEXT_DIMENSIONS = ('city', 'subzone', 'status')
+
+# Numeric columns summarized per group by count, sum and sum of squares
+MEASURES = {
+    'rating': 'Rating',
+    'kpt_duration': 'KPT duration (minutes)',
+    'distance': 'Distance_numeric',
+    'rider_wait_time': 'Rider wait time (minutes)',
+}
+
+# KPT histogram bucket edges in minutes; the last bucket is open-ended
+KPT_BINS = np.arange(0, 65, 5)
+
+# Group keys below this many possible values are counted densely instead of sorted
+DENSE_KEY_SPACE = 1 << 16
+
+COLUMNS = list(dict.fromkeys(list(DIMENSIONS.values()) + list(MEASURES.values()) + ['performance_label']))
+
+# Query parameters that turn /analyze into a grouped query
+QUERY_PARAMS = ('group_by', 'city', 'subzone', 'status', 'date_from', 'date_to',
+                'hour_from', 'hour_to', 'hour_window', 'day_window', 'limit')
+
+AnalyticsQuery = namedtuple('AnalyticsQuery', ['group_by', 'filters', 'hour_window', 'day_window', 'limit'])
+
+# Ends of a date_from/date_to range that was given only one bound
+NO_DAY_FROM, NO_DAY_TO = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+# A query resolved against one source: dimensions are (column, origin, width, radix)
+# and filters (column, kind, payload), so partitions need no labels to run it
+QueryPlan = namedtuple('QueryPlan', ['dimensions', 'filters', 'delivered_code'])
+
+
+def parse_query(args):
+    """AnalyticsQuery from /analyze query parameters; raises ValueError on bad input"""
+    group_by = [name.strip() for name in args.get('group_by', '').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown group_by dimension: {', '.join(unknown)} (expected {', '.join(DIMENSIONS)})")
+    if len(set(group_by)) != len(group_by):
+        raise ValueError('group_by lists a dimension twice')
+
+    filters = {}
+    for name in TEXT_DIMENSIONS:
+        if args.get(name):
+            filters[name] = [value.strip() for value in args[name].split(',') if value.strip()]
+    if args.get('date_from') or args.get('date_to'):
+        filters['day'] = (_parse_day(args.get('date_from'), NO_DAY_FROM), _parse_day(args.get('date_to'), NO_DAY_TO))
+        if filters['day'][0] > filters['day'][1]:
+            raise ValueError('date_from must not be after date_to')
+    if args.get('hour_from') or args.get('hour_to'):
+        filters['hour'] = (_parse_int(args, 'hour_from', 0, 0, 23), _parse_int(args, 'hour_to', 23, 0, 23))
+        if filters['hour'][0] > filters['hour'][1]:
+            raise ValueError('hour_from must not be after hour_to')
+
+    hour_window = _parse_int(args, 'hour_window', 1, 1, 24)
+    day_window = _parse_int(args, 'day_window', 1, 1)
+    limit = _parse_int(args, 'limit', None, 1)
+    return AnalyticsQuery(group_by, filters, hour_window, day_window, limit)
+
+
+def _parse_int(args, name, default, minimum, maximum=None):
+    text = args.get(name)
+    if not text:
+        return default
+    try:
+        value = int(text)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return value
+
+
+def _parse_day(text, default):
+    if not text:
+        return default
+    try:
+        return int(np.datetime64(text, 'D').astype(np.int64))
+    except ValueError:
+        raise ValueError(f"Invalid date {text!r}, expected YYYY-MM-DD")
+
+
+def day_label(day):
+    return str(np.datetime64(int(day), 'D'))
+
+
+class ColumnSource:
+    """The cleaned dataset's analytics columns as plain arrays.
+
+    Text columns are held as integer codes (-1 for missing) plus their
+    labels. A source read from a ColumnarCache entry is memory-mapped, and
+    pool workers open the same entry by its (cache_dir, key) instead of
+    having the rows pickled to them.
+    """
+
+    def __init__(self, arrays, categories, rows, entry=None):
+        self.arrays = arrays
+        self.categories = categories
+        self.rows = rows
+        self.entry = entry
+        self._day_range = None
+
+    @classmethod
+    def from_frame(cls, df):
+        import pandas as pd
+        missing = [name for name in COLUMNS if name not in df.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing columns: {', '.join(missing)}")
+        arrays, categories = {}, {}
+        for name in COLUMNS:
+            column = df[name]
+            if isinstance(column.dtype, pd.CategoricalDtype) or column.dtype == object:
+                categorical = pd.Categorical(column)
+                arrays[name] = categorical.codes
+                categories[name] = categorical.categories.tolist()
+            else:
+                arrays[name] = column.to_numpy()
+        return cls(arrays, categories, len(df))
+
+    @classmethod
+    def from_cache(cls, cache_dir, key):
+        arrays, categories, rows = ColumnarCache(cache_dir).read_arrays(key, COLUMNS)
+        return cls(arrays, categories, rows, entry=(cache_dir, key))
+
+    def day_range(self):
+        """(first, last) order day, ignoring missing days"""
+        if self._day_range is None:
+            days = np.asarray(self.arrays['order_day'])
+            valid = days[days >= 0]
+            self._day_range = (int(valid.min()), int(valid.max())) if len(valid) else (0, 0)
+        return self._day_range
+
+
+def compile_query(source, query):
+    """Resolve labels, windows and group key radices of a query against source"""
+    dimensions = []
+    for name in query.group_by:
+        column = DIMENSIONS[name]
+        # Bucket 0 holds missing values; bucket b > 0 is (value - origin) // width + 1
+        if name in TEXT_DIMENSIONS:
+            dimensions.append((column, 0, 1, len(source.categories[column]) + 1))
+        elif name == 'hour':
+            dimensions.append((column, 0, query.hour_window, -(-24 // query.hour_window) + 1))
+        else:
+            first, last = source.day_range()
+            dimensions.append((column, first, query.day_window, (last - first) // query.day_window + 2))
+    if math.prod(radix for _, _, _, radix in dimensions) >= 2 ** 62:
+        raise ValueError('Too many groups; group by fewer dimensions or use wider windows')
+
+    filters = []
+    for name, value in query.filters.items():
+        column = DIMENSIONS[name]
+        if name in TEXT_DIMENSIONS:
+            index = {label: code for code, label in enumerate(source.categories[column])}
+            filters.append((column, 'in', np.asarray([index[v] for v in value if v in index], dtype=np.int64)))
+        elif name == 'day':
+            # Negative days are missing dates (-1), which no date range matches
+            filters.append((column, 'range', (max(value[0], 0), value[1])))
+        else:
+            filters.append((column, 'range', value))
+
+    statuses = source.categories[DIMENSIONS['status']]
+    delivered_code = statuses.index('Delivered') if 'Delivered' in statuses else -2
+    return QueryPlan(dimensions, filters, delivered_code)
+
+
+class GroupAggregates:
+    """Mergeable per-group totals of one query.
+
+    Groups are integer keys built the same way in every partition, and every
+    field is a count or a sum, so partials from any split of the rows add up
+    to the totals over all of them.
+    """
+
+    FIELDS = ('orders', 'delivered', 'good', 'measure_count', 'measure_sum', 'measure_sumsq', 'hours', 'kpt_histogram')
+
+    def __init__(self, keys, orders, delivered, good, measure_count, measure_sum, measure_sumsq, hours, kpt_histogram):
+        self.keys = keys
+        self.orders = orders
+        self.delivered = delivered
+        self.good = good
+        self.measure_count = measure_count
+        self.measure_sum = measure_sum
+        self.measure_sumsq = measure_sumsq
+        self.hours = hours
+        self.kpt_histogram = kpt_histogram
+
+    @classmethod
+    def from_rows(cls, keys, delivered, good, measures, hours, kpt, key_space=None):
+        """Totals of rows given as equal-length arrays; measures is (len(MEASURES), rows)"""
+        if key_space is not None and key_space <= DENSE_KEY_SPACE:
+            # Few possible keys: count straight into one slot per key and drop the empty
+            # ones afterwards, which skips sorting the keys
+            inverse, n = keys, key_space
+        else:
+            groups, inverse = np.unique(keys, return_inverse=True)
+            n = len(groups)
+
+        def per_group(weights=None):
+            return np.bincount(inverse, weights, minlength=n)
+
+        present = ~np.isnan(measures)
+        values = np.where(present, measures, 0.0)
+        measure_count = np.stack([per_group(row) for row in present], axis=1)
+        measure_sum = np.stack([per_group(row) for row in values], axis=1)
+        measure_sumsq = np.stack([per_group(row * row) for row in values], axis=1)
+
+        bucket = np.clip(np.searchsorted(KPT_BINS, np.nan_to_num(kpt), side='right') - 1, 0, len(KPT_BINS) - 1)
+        kpt_histogram = np.bincount(inverse * len(KPT_BINS) + bucket, weights=~np.isnan(kpt),
+                                    minlength=n * len(KPT_BINS)).reshape(n, len(KPT_BINS))
+        hour_counts = np.bincount(inverse * 24 + hours, minlength=n * 24).reshape(n, 24)
+
+        totals = cls(np.arange(n, dtype=np.int64) if inverse is keys else groups,
+                     per_group().astype(np.int64), per_group(delivered).astype(np.int64),
+                     per_group(good).astype(np.int64), measure_count.astype(np.int64), measure_sum, measure_sumsq,
+                     hour_counts.astype(np.int64), kpt_histogram.astype(np.int64))
+        return totals.select(totals.orders > 0) if inverse is keys else totals
+
+    def select(self, mask):
+        """The groups where mask is true"""
+        return type(self)(self.keys[mask], *(getattr(self, name)[mask] for name in self.FIELDS))
+
+    @classmethod
+    def combine(cls, partials):
+        """Add up partials computed over disjoint rows"""
+        groups, inverse = np.unique(np.concatenate([p.keys for p in partials]), return_inverse=True)
+        fields = {}
+        for name in cls.FIELDS:
+            stacked = np.concatenate([getattr(p, name) for p in partials])
+            total = np.zeros((len(groups),) + stacked.shape[1:], dtype=stacked.dtype)
+            np.add.at(total, inverse, stacked)
+            fields[name] = total
+        return cls(groups, **fields)
+
+
+def aggregate_partition(source, plan, start, stop):
+    """GroupAggregates of rows [start, stop) of source"""
+    arrays = source.arrays
+    mask = None
+    for column, kind, payload in plan.filters:
+        values = arrays[column][start:stop]
+        if kind == 'in':
+            keep = np.isin(values, payload)
+        else:
+            keep = (values >= payload[0]) & (values <= payload[1])
+        mask = keep if mask is None else mask & keep
+
+    # Gather the matching rows of each column by position, once
+    index = None if mask is None else np.flatnonzero(mask)
+
+    def rows(column):
+        values = np.asarray(arrays[column][start:stop])
+        return values if index is None else values.take(index)
+
+    n = stop - start if index is None else len(index)
+    keys = np.zeros(n, dtype=np.int64)
+    for column, origin, width, radix in plan.dimensions:
+        values = rows(column).astype(np.int64)
+        keys = keys * radix + np.where(values < 0, 0, (values - origin) // width + 1)
+
+    measures = np.stack([rows(column).astype(np.float64) for column in MEASURES.values()]) \
+        if n else np.empty((len(MEASURES), 0))
+    return GroupAggregates.from_rows(
+        keys,
+        rows(DIMENSIONS['status']) == plan.delivered_code,
+        rows('performance_label') == 1,
+        measures,
+        rows(DIMENSIONS['hour']).astype(np.int64),
+        measures[list(MEASURES).index('kpt_duration')],
+        key_space=math.prod(radix for _, _, _, radix in plan.dimensions),
+    )
+
+
+@functools.lru_cache(maxsize=2)
+def _open_entry(cache_dir, key):
+    return ColumnSource.from_cache(cache_dir, key)
+
+
+def _aggregate_entry(entry, plan, start, stop):
+    # Runs in a pool worker: map the cache entry (once per worker) rather than receive the rows
+    return aggregate_partition(_open_entry(*entry), plan, start, stop)
+
+
+def describe_groups(source, query, plan, totals):
+    """Response rows for the groups in totals, largest first when limited"""
+    order = np.argsort(-totals.orders, kind='stable') if query.limit else np.arange(len(totals.keys))
+    if query.limit:
+        order = order[:query.limit]
+
+    # Split each key back into its per-dimension buckets
+    buckets = []
+    keys = totals.keys[order]
+    for _, _, _, radix in reversed(plan.dimensions):
+        keys, bucket = np.divmod(keys, radix)
+        buckets.append(bucket)
+    buckets.reverse()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals.measure_sum[order] / totals.measure_count[order]
+        stds = np.sqrt(np.maximum(totals.measure_sumsq[order] / totals.measure_count[order] - means ** 2, 0))
+        orders = totals.orders[order]
+        success = np.round(np.where(orders > 0, 100.0 * totals.delivered[order] / orders, 0), 2)
+
+    # Per-dimension labels for every bucket, then plain lists: the loop below only assembles dicts
+    columns = []
+    for name, (_, origin, width, radix), bucket in zip(query.group_by, plan.dimensions, buckets):
+        if name in TEXT_DIMENSIONS:
+            labels = [None] + list(source.categories[DIMENSIONS[name]])
+        elif name == 'hour':
+            labels = [None] + [b * width for b in range(radix - 1)]
+        else:
+            labels = [None] + [day_label(origin + b * width) for b in range(radix - 1)]
+        columns.append((name, [labels[b] for b in bucket.tolist()]))
+
+    means = np.round(means, 2).tolist()
+    stds = np.round(stds, 2).tolist()
+    present = (totals.measure_count[order] > 0).tolist()
+    good = totals.good[order].tolist()
+    hours = totals.hours[order].tolist() if 'hour' not in query.group_by else None
+    histograms = totals.kpt_histogram[order].tolist()
+
+    groups = []
+    for row, (count, rate) in enumerate(zip(orders.tolist(), success.tolist())):
+        group = {name: labels[row] for name, labels in columns}
+        group['orders'] = count
+        group['delivery_success_rate'] = rate
+        group['performance_distribution'] = {0: count - good[row], 1: good[row]}
+        group['metrics'] = {
+            name: {'mean': means[row][j], 'std': stds[row][j]} if present[row][j] else {'mean': None, 'std': None}
+            for j, name in enumerate(MEASURES)
+        }
+        if hours is not None:
+            group['peak_hours'] = {hour: n for hour, n in enumerate(hours[row]) if n}
+        group['kpt_histogram'] = histograms[row]
+        groups.append(group)
+    return groups
+
+
+class AnalyticsEngine:
+    """Grouped /analyze queries over partitions of the cleaned dataset.
+
+    Rows are split into contiguous partitions of at most ``partition_rows``
+    and each is reduced to GroupAggregates on its own: on a pool of
+    ``workers`` processes when there is more than one partition and the
+    source is a columnar cache entry (workers map the entry themselves, so
+    only the per-group totals cross process boundaries), in this process
+    otherwise. The partials are then added up.
+    """
+
+    def __init__(self, workers=1, partition_rows=500000):
+        self.workers = max(1, int(workers))
+        self.partition_rows = max(1, int(partition_rows))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def partitions(self, rows):
+        n = max(1, math.ceil(rows / self.partition_rows))
+        bounds = np.linspace(0, rows, n + 1).astype(np.int64).tolist()
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def run(self, source, query):
+        """Response body of a grouped /analyze query over source"""
+        started = time.perf_counter()
+        plan = compile_query(source, query)
+        partitions = self.partitions(source.rows)
+        workers = self.workers if len(partitions) > 1 and source.entry is not None else 1
+
+        partials = None
+        if workers > 1:
+            try:
+                pool = self._get_pool()
+                futures = [pool.submit(_aggregate_entry, source.entry, plan, start, stop) for start, stop in partitions]
+                partials = [future.result() for future in futures]
+            except BrokenProcessPool as e:
+                logger.error("Analytics worker died, aggregating in-process: %s", e)
+                self.close()
+                workers = 1
+            except OSError:
+                # The entry was pruned after a dataset reload; this process still has it mapped
+                workers = 1
+        if partials is None:
+            partials = [aggregate_partition(source, plan, start, stop) for start, stop in partitions]
+        totals = GroupAggregates.combine(partials)
+
+        return {
+            'group_by': query.group_by,
+            'filters': {name: list(value) if name in TEXT_DIMENSIONS else _describe_range(name, value)
+                        for name, value in query.filters.items()},
+            'total_orders': int(totals.orders.sum()),
+            'kpt_bins': KPT_BINS.tolist(),
+            'groups': describe_groups(source, query, plan, totals),
+            'partitions': len(partitions),
+            'workers': workers,
+            'seconds': round(time.perf_counter() - started, 4),
+        }
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Forking this threaded server directly could copy a held lock into a child
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _describe_range(name, value):
+    low, high = value
+    if name == 'day':
+        return {'from': day_label(low) if low != NO_DAY_FROM else None,
+                'to': day_label(high) if high != NO_DAY_TO else None}
+    return {'from': low, 'to': high}
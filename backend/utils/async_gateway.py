@@ -0,0 +1,182 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Responses are handed to the event loop in pieces of at least this size, so
+# a streamed NDJSON body doesn't cost one loop round trip per line
+SEND_BUFFER_BYTES = 64 * 1024
+
+BUSY_BODY = b'{"error":"Server busy, retry shortly"}\n'
+
+
+class AsyncGateway:
+    """ASGI front end that runs a WSGI app on two bounded thread pools.
+
+    The event loop only reads request bodies and writes responses. Each
+    request then runs start to finish on one pool thread, which keeps Flask's
+    request context on a single thread even for streamed bodies. Cheap routes
+    (``light_paths`` and anything under ``light_prefixes``) get their own
+    pool, so they never wait behind model inference or dataset work; every
+    other route shares the heavy pool.
+
+    Backpressure: at most ``max_pending`` heavy requests may be running or
+    queued at once. Beyond that the gateway answers 503 with Retry-After
+    straight from the loop instead of letting the queue (and latency) grow.
+    """
+
+    def __init__(self, wsgi_app, light_paths=(), light_prefixes=(), heavy_workers=4, light_workers=2,
+                 max_pending=64, retry_after=1):
+        self.wsgi_app = wsgi_app
+        self.light_paths = frozenset(light_paths)
+        self.light_prefixes = tuple(light_prefixes)
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.heavy_pool = ThreadPoolExecutor(max_workers=heavy_workers, thread_name_prefix='heavy')
+        self.light_pool = ThreadPoolExecutor(max_workers=light_workers, thread_name_prefix='light')
+        self.heavy_pending = 0
+        self.rejected = 0
+
+    def is_light(self, path):
+        return path in self.light_paths or path.startswith(self.light_prefixes)
+
+    def stats(self):
+        return {
+            'heavy_pending': self.heavy_pending,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        loop = asyncio.get_running_loop()
+        if self.is_light(scope['path']):
+            body = await self._read_body(receive)
+            await loop.run_in_executor(self.light_pool, self._run, loop, scope, body, send)
+            return
+
+        if self.heavy_pending >= self.max_pending:
+            self.rejected += 1
+            await self._busy(send)
+            return
+        # Counted from here, so requests still uploading their body hold a slot too
+        self.heavy_pending += 1
+        try:
+            body = await self._read_body(receive)
+            await loop.run_in_executor(self.heavy_pool, self._run, loop, scope, body, send)
+        finally:
+            self.heavy_pending -= 1
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.heavy_pool.shutdown(wait=False)
+                self.light_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    async def _busy(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(BUSY_BODY)).encode()),
+                (b'retry-after', str(self.retry_after).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': BUSY_BODY})
+
+    def _run(self, loop, scope, body, send):
+        """Run one request through the WSGI app on a pool thread"""
+        def post(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+        pending = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and 'started' in response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return pending.append
+
+        def flush(more_body):
+            if 'started' not in response:
+                post({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                response['started'] = True
+            post({'type': 'http.response.body', 'body': b''.join(pending), 'more_body': more_body})
+            pending.clear()
+
+        result = self.wsgi_app(wsgi_environ(scope, body), start_response)
+        try:
+            size = 0
+            for chunk in result:
+                if not chunk:
+                    continue
+                pending.append(chunk)
+                size += len(chunk)
+                if size >= SEND_BUFFER_BYTES:
+                    flush(more_body=True)
+                    size = 0
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        flush(more_body=False)
+
+
+def wsgi_environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP scope and its buffered body"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+try:
+    import preprocess
+except ImportError:
+    from utils import preprocess
+
+try:
+    from model_registry import file_version
+except ImportError:
+    from utils.model_registry import file_version
+
+logger = logging.getLogger(__name__)
+
+
+def preprocess_version():
+    """Hash of utils/preprocess.py, so a cleaning change invalidates old caches"""
+    with open(preprocess.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """On-disk cache of clean_dataset output, one .npy file per column.
+
+    Entries live in ``<cache_dir>/<key>/`` where the key combines a hash of
+    the source CSV with preprocess_version(). Numeric columns are stored as
+    plain arrays and text columns as categorical codes plus their
+    categories, so reads can memory-map just the columns a caller asks for.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key_for(self, csv_path):
+        """Cache key for the CSV's current contents; None if it is missing"""
+        version = file_version(csv_path)
+        if version is None:
+            return None
+
+        # Remember digests by (mtime, size) so unchanged files are not rehashed
+        index_path = os.path.join(self.cache_dir, 'index.json')
+        index = self._read_json(index_path) or {}
+        entry = index.get(os.path.abspath(csv_path))
+        if entry and tuple(entry['version']) == version:
+            digest = entry['sha256']
+        else:
+            digest = file_digest(csv_path)
+            index[os.path.abspath(csv_path)] = {'version': list(version), 'sha256': digest}
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_json(index_path, index)
+        return f"{digest[:24]}-{preprocess_version()}"
+
+    def exists(self, key):
+        return key is not None and os.path.exists(os.path.join(self.cache_dir, key, 'manifest.json'))
+
+    def write(self, key, df):
+        """Store a cleaned frame under key (written to a temp dir, then renamed)"""
+        import pandas as pd
+        final_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = f"{final_dir}.{os.getpid()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        columns = {}
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            entry = {'file': f"col_{i:03d}.npy"}
+            if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+                values = series.to_numpy()
+            else:
+                categorical = pd.Categorical(series)
+                values = categorical.codes
+                entry['categories'] = f"col_{i:03d}.categories.json"
+                self._write_json(os.path.join(tmp_dir, entry['categories']), categorical.categories.tolist())
+            np.save(os.path.join(tmp_dir, entry['file']), values, allow_pickle=False)
+            entry['dtype'] = str(values.dtype)
+            columns[name] = entry
+
+        self._write_json(os.path.join(tmp_dir, 'manifest.json'), {
+            'rows': len(df),
+            'preprocess_version': preprocess_version(),
+            'columns': columns,
+        })
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Another worker won the race; its copy is identical
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def read(self, key, columns=None):
+        """Load the cached frame, memory-mapping only the requested columns"""
+        import pandas as pd
+        arrays, categories, _ = self.read_arrays(key, columns)
+        data = {}
+        for name, values in arrays.items():
+            if name in categories:
+                values = pd.Categorical.from_codes(values, categories=categories[name])
+            data[name] = values
+        return pd.DataFrame(data, columns=list(arrays), copy=False)
+
+    def read_arrays(self, key, columns=None):
+        """Memory-mapped column arrays (codes for text columns), their categories and the row count"""
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest = self._read_json(os.path.join(entry_dir, 'manifest.json'))
+        names = columns if columns is not None else list(manifest['columns'])
+
+        arrays, categories = {}, {}
+        for name in names:
+            entry = manifest['columns'][name]
+            arrays[name] = np.load(os.path.join(entry_dir, entry['file']), mmap_mode='r')
+            if 'categories' in entry:
+                categories[name] = self._read_json(os.path.join(entry_dir, entry['categories']))
+        return arrays, categories, manifest['rows']
+
+    def prune(self, keep_key):
+        """Delete every cache entry except keep_key"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != keep_key and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+def load_cleaned_dataset(csv_path, cache=None, columns=None):
+    """Cleaned dataset from the cache when possible, parsing and caching the CSV otherwise"""
+    import pandas as pd
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key_for(csv_path)
+            if cache.exists(key):
+                return cache.read(key, columns)
+        except Exception as e:
+            logger.error("Error reading column cache: %s", e)
+
+    df = preprocess.clean_dataset(pd.read_csv(csv_path))
+    if cache is not None and key is not None:
+        try:
+            cache.write(key, df)
+            cache.prune(key)
+        except Exception as e:
+            logger.error("Error writing column cache: %s", e)
+    return df[columns] if columns is not None else df
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+# .npy headers are padded to a multiple of this; members are written so their data starts on it
+ALIGNMENT = 64
+# Extra-field ID used for padding, the one zipalign uses
+PADDING_FIELD = 0xD935
+
+
+def compiled_path(model_path):
+    """Flat-array export that sits next to a pickled model"""
+    return os.path.splitext(model_path)[0] + '.forest.npz'
+
+
+def model_fingerprint(model):
+    """Digest of a fitted forest's splits and leaf values, to tell retrained models apart"""
+    digest = hashlib.blake2b(digest_size=16)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for array in (tree.feature, tree.threshold, tree.children_left, tree.children_right, tree.value):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.digest()
+
+
+def write_npz_member(archive, name, array):
+    """Add array to archive as an uncompressed .npy member with its data aligned"""
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    # Pad the local header's extra field so the data, after a .npy header that
+    # is itself a multiple of ALIGNMENT long, starts on an ALIGNMENT boundary
+    header_end = archive.fp.tell() + 30 + len(name.encode()) + 4
+    padding = -header_end % ALIGNMENT
+    info.extra = struct.pack('<HH', PADDING_FIELD, padding) + bytes(padding)
+    with archive.open(info, 'w') as f:
+        np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+
+
+def map_npz(path, names):
+    """Memory-map arrays of an uncompressed .npz read-only.
+
+    np.load ignores mmap_mode for .npz archives, but an uncompressed member
+    is a contiguous byte range of the file that can be mapped in place.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for name in names:
+            try:
+                info = archive.getinfo(f"{name}.npy")
+            except KeyError:
+                continue
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{name} is compressed in {path} and can't be memory-mapped")
+            # Local file header: 30 fixed bytes, then the file name and extra field
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"{name} in {path} holds Python objects")
+            if not shape or 0 in shape:
+                arrays[name] = np.lib.format.read_array(archive.open(info), allow_pickle=False)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                     order='F' if fortran_order else 'C')
+    return arrays
+
+
+def _flat_view(array):
+    """Indexable memoryview of a 1-D array"""
+    # Exports written by np.savez aren't aligned, and memoryview won't index
+    # the '=d' format NumPy reports for unaligned data; recasting through
+    # bytes gives it the native format back
+    return memoryview(array).cast('B').cast(array.dtype.char)
+
+
+class CompiledForest:
+    """Flat-array copy of a fitted RandomForestClassifier for single-row scoring.
+
+    The nodes of every tree are concatenated into one set of NumPy arrays and
+    ``roots`` holds the index of each tree's first node. Leaves point back at
+    themselves with an infinite threshold. ``value`` holds each leaf's
+    normalized class distribution, as in ``DecisionTreeClassifier.predict_proba``.
+
+    predict_one() walks each tree through memoryviews of the arrays, which
+    costs one Python step per node visited and skips the DataFrame,
+    feature-name validation and per-tree dispatch of ``model.predict_proba``.
+    predict_proba() walks all rows and trees in lockstep with one vectorized
+    step per level of the deepest tree.
+
+    load(path, mmap=True) maps the arrays read-only from the export instead
+    of copying them, so every process serving the same file shares one copy
+    through the page cache. to_float32() halves the threshold and leaf value
+    arrays without changing which leaf any float32 input reaches.
+
+    ``fingerprint`` is model_fingerprint() of the model the export was
+    compiled from; matches() compares it, so a retrained model of the same
+    shape is never scored with a stale export.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes', 'node_counts')
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, node_counts, depth, importances=None,
+                 fingerprint=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.node_counts = node_counts
+        self.depth = int(depth)
+        # The model's feature_importances_, so /feature-importance doesn't need the pickle
+        self.importances = importances
+        # bytes; None for exports written before fingerprints were recorded
+        self.fingerprint = fingerprint
+        self._nodes = tuple(_flat_view(a) for a in (feature, threshold, left, right))
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots, node_counts = [], [], [], [], [], [], []
+        offset = depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            # float64 like sklearn's thresholds; inputs are compared as float32 values
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right).astype(np.int32) + offset)
+
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            values.append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+
+            roots.append(offset)
+            node_counts.append(tree.node_count)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+            np.concatenate(rights), np.concatenate(values), np.asarray(roots, dtype=np.int32),
+            np.asarray(model.classes_), np.asarray(node_counts, dtype=np.int64), depth,
+            importances=np.asarray(model.feature_importances_, dtype=np.float64),
+            fingerprint=model_fingerprint(model)
+        )
+
+    def to_float32(self):
+        """Copy with float32 thresholds and leaf values"""
+        threshold = self.threshold.astype(np.float32)
+        # Inputs are float32, so rounding each threshold down to the nearest
+        # float32 keeps x <= threshold exactly as it was
+        above = threshold > self.threshold
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+        return type(self)(
+            self.feature, threshold, self.left, self.right, self.value.astype(np.float32), self.roots,
+            self.classes, self.node_counts, self.depth, importances=self.importances, fingerprint=self.fingerprint
+        )
+
+    def agrees_with(self, other, X, atol=1e-6):
+        """Whether both forests give X the same labels and probabilities within atol"""
+        ours, theirs = self.predict_proba(X), other.predict_proba(X)
+        return (np.array_equal(ours.argmax(axis=1), theirs.argmax(axis=1))
+                and bool(np.allclose(ours, theirs, rtol=0, atol=atol)))
+
+    def matches(self, model):
+        """Whether this export was compiled from model"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None or len(estimators) != self.n_estimators or self.fingerprint is None:
+            return False
+        if not np.array_equal(np.asarray(model.classes_), self.classes):
+            return False
+        if not np.array_equal([e.tree_.node_count for e in estimators], self.node_counts):
+            return False
+        return model_fingerprint(model) == self.fingerprint
+
+    def leaves(self, X):
+        """Leaf index reached in every tree, shape (n_rows, n_estimators)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_estimators))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities for a 2-D array of rows, like model.predict_proba"""
+        return self.value[self.leaves(X)].sum(axis=1, dtype=np.float64) / self.n_estimators
+
+    def predict_one(self, x):
+        """Score one raw feature vector; returns (label, class probabilities)"""
+        # Round to float32 first, as sklearn does, then compare as Python floats
+        x = np.asarray(x, dtype=np.float32).tolist()
+        feature, threshold, left, right = self._nodes
+        leaves = []
+        for node in self.roots.tolist():
+            while True:
+                child = left[node] if x[feature[node]] <= threshold[node] else right[node]
+                if child == node:
+                    break
+                node = child
+            leaves.append(node)
+        probability = self.value[leaves].sum(axis=0, dtype=np.float64) / self.n_estimators
+        return self.classes[np.argmax(probability)], probability
+
+    def save(self, path):
+        """Write the arrays to an .npz file (written to a temp file, then renamed)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays['depth'] = np.int64(self.depth)
+        if self.importances is not None:
+            arrays['importances'] = self.importances
+        if self.fingerprint is not None:
+            arrays['fingerprint'] = np.frombuffer(self.fingerprint, dtype=np.uint8)
+        # Uncompressed and aligned, so load(mmap=True) can map every array in place
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as archive:
+            for name, array in arrays.items():
+                write_npz_member(archive, f"{name}.npy", array)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """Read an export; with mmap, map its arrays read-only instead of copying them"""
+        if mmap:
+            # A replaced export gets a new inode, so existing maps stay valid
+            data = map_npz(path, cls.ARRAYS + ('importances', 'depth', 'fingerprint'))
+        else:
+            with np.load(path, allow_pickle=False) as archive:
+                data = {name: archive[name] for name in archive.files}
+        fingerprint = data.get('fingerprint')
+        return cls(*(data[name] for name in cls.ARRAYS), depth=data['depth'], importances=data.get('importances'),
+                   fingerprint=bytes(fingerprint) if fingerprint is not None else None)
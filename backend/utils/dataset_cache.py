@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+try:
+    from model_registry import file_version
+except ImportError:
+    from utils.model_registry import file_version
+
+logger = logging.getLogger(__name__)
+
+# aggregates is None when the last load found no usable data; frame is also
+# None when the dataset was streamed rather than held in memory
+DatasetSnapshot = namedtuple('DatasetSnapshot', ['frame', 'aggregates', 'version'])
+
+
+class DatasetCache:
+    """In-memory cleaned dataset and its /analyze aggregates.
+
+    The snapshot is keyed by the CSV's (mtime, size) signature. Reloads run
+    on a background thread: get() never parses the CSV itself, it returns the
+    last good snapshot (or None before the first load completes) and kicks
+    off a rebuild when the file has changed.
+    """
+
+    def __init__(self, csv_path, build, check_interval=2.0):
+        self.csv_path = csv_path
+        self._build = build
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._worker = None
+        self._snapshot = None
+        self._next_check = 0.0
+
+    def get(self):
+        """Return the current snapshot without blocking on a reload"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self._check_interval
+            if snapshot is None or file_version(self.csv_path) != snapshot.version:
+                self.refresh()
+        return snapshot
+
+    def refresh(self, wait=False):
+        """Start a background rebuild unless one is already running"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._rebuild, name='dataset-cache', daemon=True)
+                self._worker.start()
+            worker = self._worker
+        if wait:
+            worker.join()
+        return self._snapshot
+
+    def _rebuild(self):
+        version = file_version(self.csv_path)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.aggregates is not None and version == snapshot.version:
+            return
+
+        # build() returns (frame, aggregates), or None when there is no data
+        built = self._build()
+        if built is None:
+            # Keep serving the last good data if the file became unreadable
+            if snapshot is None or snapshot.aggregates is None:
+                self._snapshot = DatasetSnapshot(None, None, version)
+            return
+
+        frame, aggregates = built
+        self._snapshot = DatasetSnapshot(frame, aggregates, version)
+        logger.info("Loaded %d records", aggregates.count)
@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# NumPy scalars and C-contiguous arrays are encoded natively; int dict keys
+# (performance_distribution, peak_hours) are written as strings like json does
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _default(o):
+    """Fallback for values neither encoder handles natively"""
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        # Arrays orjson won't take as-is: non-contiguous, or an unsupported dtype
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+def encode(obj, sort_keys=False, indent=False):
+    """Encode obj to UTF-8 JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        option = ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except TypeError:
+            # e.g. integers wider than 64 bits, which json still encodes
+            pass
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, ensure_ascii=False,
+                      indent=2 if indent else None, separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def encode_response(obj):
+    """The body jsonify would send for obj, for responses encoded ahead of time"""
+    return encode(obj, sort_keys=True) + b'\n'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the stdlib json as fallback.
+
+    jsonify() and request.get_json() go through it, so every route gets the
+    faster encoder and NumPy support without calling it directly. Output
+    keeps Flask's defaults: sorted keys, compact unless the app is in debug
+    mode, and a trailing newline on responses. Two differences from json:
+    NaN and infinities are written as null rather than as invalid JSON, and
+    int keys are sorted as strings ("10" before "2").
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for json.dumps options get json.dumps
+            return super().dumps(obj, **kwargs)
+        return encode(obj, sort_keys=self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # json accepts a few things orjson rejects (NaN literals, lone surrogates)
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = encode(obj, sort_keys=self.sort_keys, indent=indent) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
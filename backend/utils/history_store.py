@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+try:
+    from aggregates import PredictionAggregates
+except ImportError:
+    from utils.aggregates import PredictionAggregates
+
+HISTORY_FIELDS = ['distance', 'kpt_duration', 'rider_wait_time', 'order_hour', 'predicted_performance', 'confidence']
+
+# 34 bytes per prediction, versus several hundred for a dict of Python floats
+HISTORY_DTYPE = np.dtype([
+    ('distance', 'f8'),
+    ('kpt_duration', 'f8'),
+    ('rider_wait_time', 'f8'),
+    ('order_hour', 'i1'),
+    ('predicted_performance', 'i1'),
+    ('confidence', 'f8'),
+])
+
+# Fields every store keeps running sums of; one NaN would stick in the totals for good
+SUMMED_FIELDS = ('distance', 'kpt_duration')
+
+
+def check_finite(columns):
+    """Raise ValueError if a summed field of a record (or of columns) is NaN or infinite"""
+    for field in SUMMED_FIELDS:
+        if not np.isfinite(np.asarray(columns[field], dtype=np.float64)).all():
+            raise ValueError(f"Prediction history needs a finite {field}")
+
+
+class RingBufferHistory:
+    """Fixed-capacity prediction history in a NumPy structured array.
+
+    Only the newest ``capacity`` records are kept, but the aggregates cover
+    every prediction this process has made.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        self._total = 0
+        self._lock = threading.Lock()
+        self._stats = PredictionAggregates()
+
+    def __len__(self):
+        return self._total
+
+    @property
+    def nbytes(self):
+        return self._buffer.nbytes
+
+    def append(self, record):
+        """Store one prediction record (a dict with HISTORY_FIELDS keys)"""
+        check_finite(record)
+        with self._lock:
+            self._buffer[self._total % self.capacity] = tuple(record[f] for f in HISTORY_FIELDS)
+            self._total += 1
+        self._stats.add(record['distance'], record['kpt_duration'],
+                        record['predicted_performance'], record['order_hour'])
+
+    def extend(self, columns):
+        """Store many predictions given as a dict of equal-length arrays"""
+        n = len(columns['distance'])
+        if n == 0:
+            return
+        check_finite(columns)
+        keep = min(n, self.capacity)
+        with self._lock:
+            positions = (self._total + np.arange(n - keep, n)) % self.capacity
+            for field in HISTORY_FIELDS:
+                self._buffer[field][positions] = np.asarray(columns[field])[n - keep:]
+            self._total += n
+        self._stats.add_many(columns['distance'], columns['kpt_duration'],
+                             columns['predicted_performance'], columns['order_hour'])
+
+    def recent(self, n):
+        """Return the newest n records as dicts, oldest first"""
+        with self._lock:
+            n = min(n, self._total, self.capacity)
+            positions = (self._total - n + np.arange(n)) % self.capacity
+            rows = self._buffer[positions]
+        return [dict(zip(HISTORY_FIELDS, row)) for row in rows.tolist()]
+
+    def aggregates(self):
+        return self._stats.snapshot()
+
+
+class SQLiteHistory:
+    """Append-only prediction history in a SQLite database (WAL mode).
+
+    The file is shared by every worker process and survives restarts. Running
+    totals are updated in the same transaction as each insert, so reading the
+    aggregates never scans the predictions table.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    id INTEGER PRIMARY KEY,
+                    distance REAL, kpt_duration REAL, rider_wait_time REAL,
+                    order_hour INTEGER, predicted_performance INTEGER, confidence REAL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS prediction_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    count INTEGER NOT NULL, kpt_sum REAL NOT NULL, distance_sum REAL NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS prediction_counts (
+                    kind TEXT NOT NULL, key INTEGER NOT NULL, count INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )""")
+            conn.execute("INSERT OR IGNORE INTO prediction_totals (id, count, kpt_sum, distance_sum) "
+                         "VALUES (1, 0, 0.0, 0.0)")
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def __len__(self):
+        return self._connection().execute("SELECT count FROM prediction_totals WHERE id = 1").fetchone()[0]
+
+    def append(self, record):
+        """Store one prediction record (a dict with HISTORY_FIELDS keys)"""
+        self.extend({field: [record[field]] for field in HISTORY_FIELDS})
+
+    def extend(self, columns):
+        """Store many predictions given as a dict of equal-length arrays"""
+        values = [np.asarray(columns[field]).tolist() for field in HISTORY_FIELDS]
+        if not values[0]:
+            return
+        check_finite(columns)
+        labels, label_counts = np.unique(values[4], return_counts=True)
+        hours, hour_counts = np.unique(values[3], return_counts=True)
+        counts = ([('label', k, c) for k, c in zip(labels.tolist(), label_counts.tolist())] +
+                  [('hour', k, c) for k, c in zip(hours.tolist(), hour_counts.tolist())])
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO predictions (distance, kpt_duration, rider_wait_time, order_hour, "
+                "predicted_performance, confidence) VALUES (?, ?, ?, ?, ?, ?)",
+                zip(*values))
+            conn.execute(
+                "UPDATE prediction_totals SET count = count + ?, kpt_sum = kpt_sum + ?, "
+                "distance_sum = distance_sum + ? WHERE id = 1",
+                (len(values[0]), float(np.sum(values[1])), float(np.sum(values[0]))))
+            conn.executemany(
+                "INSERT INTO prediction_counts (kind, key, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (kind, key) DO UPDATE SET count = count + excluded.count",
+                counts)
+
+    def recent(self, n):
+        """Return the newest n records as dicts, oldest first"""
+        rows = self._connection().execute(
+            "SELECT distance, kpt_duration, rider_wait_time, order_hour, predicted_performance, confidence "
+            "FROM predictions ORDER BY id DESC LIMIT ?", (n,)).fetchall()
+        return [dict(zip(HISTORY_FIELDS, row)) for row in reversed(rows)]
+
+    def aggregates(self):
+        conn = self._connection()
+        stats = PredictionAggregates()
+        stats.count, stats.kpt_sum, stats.distance_sum = conn.execute(
+            "SELECT count, kpt_sum, distance_sum FROM prediction_totals WHERE id = 1").fetchone()
+        for kind, key, count in conn.execute("SELECT kind, key, count FROM prediction_counts"):
+            if kind == 'label':
+                stats.performance[key] = count
+            else:
+                stats.hours[key] = count
+        return stats
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def create_history_store(backend, data_dir, capacity=100000):
+    """Build the configured history backend: 'memory' (default) or 'sqlite'"""
+    if backend == 'sqlite':
+        os.makedirs(data_dir, exist_ok=True)
+        return SQLiteHistory(os.path.join(data_dir, 'prediction_history.db'))
+    if backend == 'memory':
+        return RingBufferHistory(capacity)
+    raise ValueError(f"Unknown history backend: {backend}")
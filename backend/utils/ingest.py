@@ -0,0 +1,150 @@
+import os
+import resource
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from preprocess import FEATURE_NAMES, clean_dataset
+    from aggregates import OrderAggregates
+except ImportError:
+    from utils.preprocess import FEATURE_NAMES, clean_dataset
+    from utils.aggregates import OrderAggregates
+
+# Only the columns clean_dataset and the aggregates need, with compact dtypes
+INGEST_DTYPES = {
+    'City': 'category',
+    'Subzone': 'category',
+    'Order Status': 'category',
+    'Order Ready Marked': 'category',
+    'Distance': 'object',
+    'Order Placed At': 'object',
+    'Rating': 'float32',
+    'KPT duration (minutes)': 'float32',
+    'Rider wait time (minutes)': 'float32',
+}
+
+IngestResult = namedtuple('IngestResult', ['aggregates', 'features', 'labels', 'rows', 'chunks', 'peak_rss_mb'])
+
+
+def current_rss_mb():
+    """Resident set size of this process in MiB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    try:
+        # VmHWM resets on exec, unlike ru_maxrss which inherits the parent's peak
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if os.uname().sysname == 'Darwin' else peak / 2 ** 10
+
+
+def choose_chunksize(csv_path, max_rss_mb, probe_rows=5000):
+    """Pick a chunk size that keeps one parsed+cleaned chunk within the RSS budget"""
+    import pandas as pd
+    probe = pd.read_csv(csv_path, nrows=probe_rows, usecols=lambda c: c in INGEST_DTYPES, dtype=INGEST_DTYPES)
+    if len(probe) == 0:
+        return probe_rows
+    # Cleaning roughly triples a chunk's footprint while it is in flight
+    bytes_per_row = probe.memory_usage(deep=True).sum() / len(probe) * 3
+    headroom = (max_rss_mb - current_rss_mb()) * 2 ** 20 / 2
+    return int(max(1000, headroom / bytes_per_row))
+
+
+def ingest_csv(csv_path, chunksize=None, max_rss_mb=None, training_set=False):
+    """Stream the order CSV in chunks into aggregates, and optionally a compact training set.
+
+    Each chunk is read with compact dtypes, cleaned and folded into an
+    OrderAggregates; the raw frame is never held in full. Missing KPT values
+    enter the KPT sum at the median of the whole file, which gives the same
+    result as cleaning the full frame in one go. The median comes from counts
+    of the distinct KPT values (minutes to two decimals), so memory does not
+    grow with the number of rows.
+
+    With training_set=True each chunk is also reduced to float32 features
+    plus int8 labels, kept for the whole file, and missing KPT/rider wait
+    values are filled with the file's medians. Otherwise features and labels
+    are None.
+    """
+    import pandas as pd
+    if chunksize is None:
+        chunksize = choose_chunksize(csv_path, max_rss_mb) if max_rss_mb else 100000
+
+    aggregates = OrderAggregates()
+    features, labels = [], []
+    kpt_values, kpt_counts = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    rows = chunks = kpt_missing = 0
+    reader = pd.read_csv(csv_path, chunksize=chunksize, usecols=lambda c: c in INGEST_DTYPES, dtype=INGEST_DTYPES)
+    for chunk in reader:
+        chunk = clean_dataset(chunk, fill_medians=False)
+        chunk['order_hour'] = chunk['order_hour'].astype('int8')
+        chunk['performance_label'] = chunk['performance_label'].astype('int8')
+        aggregates.merge(OrderAggregates.from_frame(chunk))
+        kpt = chunk['KPT duration (minutes)'].to_numpy(dtype=np.float32)
+        missing = np.isnan(kpt)
+        kpt_missing += int(missing.sum())
+        kpt_values, kpt_counts = _add_counts(kpt_values, kpt_counts, kpt[~missing])
+        if training_set:
+            features.append(chunk[FEATURE_NAMES].to_numpy(dtype=np.float32))
+            labels.append(chunk['performance_label'].to_numpy())
+        rows += len(chunk)
+        chunks += 1
+
+    # Global median fill of the KPT sum (nothing to fill with when every value is missing)
+    kpt_median = _median_of_counts(kpt_values, kpt_counts)
+    if kpt_median is not None:
+        aggregates.kpt_sum += kpt_median * kpt_missing
+    if not training_set:
+        return IngestResult(aggregates, None, None, rows, chunks, peak_rss_mb())
+
+    features = np.concatenate(features) if features else np.empty((0, len(FEATURE_NAMES)), dtype=np.float32)
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int8)
+    if kpt_median is not None:
+        kpt = features[:, 1]
+        kpt[np.isnan(kpt)] = kpt_median
+    _fill_with_median(features[:, 2])
+    np.nan_to_num(features, copy=False)
+
+    return IngestResult(aggregates, features, labels, rows, chunks, peak_rss_mb())
+
+
+def _add_counts(values, counts, new_values):
+    """Fold new_values into the sorted distinct values and their counts"""
+    new, new_counts = np.unique(new_values, return_counts=True)
+    merged, inverse = np.unique(np.concatenate([values, new]), return_inverse=True)
+    merged_counts = np.zeros(len(merged), dtype=np.int64)
+    np.add.at(merged_counts, inverse, np.concatenate([counts, new_counts]))
+    return merged, merged_counts
+
+
+def _median_of_counts(values, counts):
+    """np.median of the data with values[i] occurring counts[i] times, or None if empty"""
+    n = int(counts.sum())
+    if n == 0:
+        return None
+    cumulative = np.cumsum(counts)
+    middle = values[np.searchsorted(cumulative, [(n - 1) // 2, n // 2], side='right')]
+    return float(np.mean(middle.astype(np.float64)))
+
+
+def _fill_with_median(column):
+    """Fill NaNs in a column view in place; return (median, number filled)"""
+    missing = np.isnan(column)
+    n_missing = int(missing.sum())
+    if n_missing == 0 or n_missing == len(column):
+        return 0.0, 0
+    median = float(np.median(column[~missing].astype(np.float64)))
+    column[missing] = median
+    return median, n_missing
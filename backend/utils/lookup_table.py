@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+# (feature, first value, last value, step) of the grid nearly all /predict
+# traffic falls on: half-kilometre distances, whole minutes and the 24 hours
+PREDICTION_GRID = (
+    ('Distance_numeric', 0.0, 15.0, 0.5),
+    ('KPT duration (minutes)', 0.0, 60.0, 1.0),
+    ('Rider wait time (minutes)', 0.0, 30.0, 1.0),
+    ('order_hour', 0.0, 23.0, 1.0),
+)
+
+
+class PredictionTable:
+    """Dense predict_proba output for every point of a discretized feature grid.
+
+    ``probabilities`` has one axis per feature plus a class axis, filled by
+    running the model over the whole grid once. lookup() answers an on-grid
+    row by indexing and returns None for anything off the grid, so callers
+    fall back to the model. Results are the model's own outputs, not an
+    approximation.
+    """
+
+    def __init__(self, probabilities, classes, grid=PREDICTION_GRID, build_seconds=0.0):
+        self.probabilities = probabilities
+        self.classes = classes
+        self.grid = grid
+        self.build_seconds = build_seconds
+        # Index into classes rather than the labels themselves, to keep it one byte per point
+        self.label_index = np.argmax(probabilities, axis=-1).astype(np.int8)
+
+    @property
+    def shape(self):
+        return self.probabilities.shape[:-1]
+
+    @property
+    def nbytes(self):
+        return self.probabilities.nbytes + self.label_index.nbytes
+
+    @classmethod
+    def build(cls, predict_proba, classes, grid=PREDICTION_GRID, block_rows=1 << 16):
+        """Score every grid point with predict_proba, block_rows points at a time"""
+        start = time.perf_counter()
+        axes = [np.arange(round((last - first) / step) + 1) * step + first for _, first, last, step in grid]
+        shape = tuple(len(axis) for axis in axes)
+        size = int(np.prod(shape))
+
+        probabilities = np.empty((size, len(classes)), dtype=np.float64)
+        for begin in range(0, size, block_rows):
+            index = np.unravel_index(np.arange(begin, min(begin + block_rows, size)), shape)
+            X = np.column_stack([axis[i] for axis, i in zip(axes, index)])
+            probabilities[begin:begin + len(X)] = predict_proba(X)
+
+        return cls(probabilities.reshape(shape + (len(classes),)), np.asarray(classes), grid,
+                   time.perf_counter() - start)
+
+    def index(self, row):
+        """Grid position of row, or None if any feature is off the grid"""
+        position = []
+        for value, (_, first, last, step) in zip(row, self.grid):
+            if not first <= value <= last:
+                return None
+            i = round((value - first) / step)
+            if i * step + first != value:
+                return None
+            position.append(i)
+        return tuple(position)
+
+    def lookup(self, row):
+        """(label, class probabilities) for an on-grid row, or None"""
+        position = self.index(row)
+        if position is None:
+            return None
+        return self.classes[self.label_index[position]], self.probabilities[position]
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+try:
+    from model_registry import file_version
+    from fast_json import encode_response
+except ImportError:
+    from utils.model_registry import file_version
+    from utils.fast_json import encode_response
+
+logger = logging.getLogger(__name__)
+
+# body is the encoded /menu response; etag is derived from it, so it is the
+# same in every worker and only changes when the menu itself does
+MenuEntry = namedtuple('MenuEntry', ['body', 'etag'])
+
+
+def encode_menu(menu):
+    """Encode a /menu response the way Flask's jsonify does"""
+    return encode_response({'menu': menu})
+
+
+def make_entry(menu):
+    body = encode_menu(menu)
+    return MenuEntry(body, hashlib.sha256(body).hexdigest()[:20])
+
+
+class MenuStore:
+    """Vendor menus keyed by (city, vendor_id), encoded once per load.
+
+    The JSON file maps city -> vendor_id -> list of dishes. Every menu is
+    serialized up front so a request only does a dict lookup. The file is
+    re-checked at most every ``check_interval`` seconds and reloaded when its
+    (mtime, size) signature changes; reload() forces it.
+    """
+
+    EMPTY = make_entry([])
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._next_check = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, city, vendor_id):
+        """Encoded menu of a vendor; the empty menu if it has none"""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self._check_interval
+                if file_version(self.path) != self._version:
+                    self._load()
+            finally:
+                self._lock.release()
+        return self._entries.get((city, vendor_id), self.EMPTY)
+
+    def reload(self):
+        """Re-read the menu file now; returns the number of menus"""
+        with self._lock:
+            self._load()
+            self._next_check = time.monotonic() + self._check_interval
+        return len(self._entries)
+
+    def _load(self):
+        version = file_version(self.path)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                menus = json.load(f)
+            entries = {
+                (city, int(vendor_id)): make_entry(menu)
+                for city, vendors in menus.items()
+                for vendor_id, menu in vendors.items()
+            }
+        except (OSError, ValueError) as e:
+            # Keep serving the last good menus
+            logger.error("Error loading menus from %s: %s", self.path, e)
+            self._version = version
+            return
+        self._entries = entries
+        self._version = version
+        logger.info("Loaded %d menus", len(entries))
@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+import time
+import warnings
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ModelEntry = namedtuple('ModelEntry', ['model', 'version', 'loaded_at'])
+
+
+def load_pickle(path):
+    """joblib.load, imported on first use: unpickling a forest pulls in sklearn anyway"""
+    import joblib
+    # A pickle from another sklearn release still loads; don't warn about it on every reload
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return joblib.load(path)
+
+
+def file_version(path):
+    """Return a (mtime_ns, size) signature for a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ModelRegistry:
+    """Process-wide holder for the trained model.
+
+    The model is loaded once and kept in memory. The artifact on disk is
+    re-checked at most every ``check_interval`` seconds and swapped in
+    atomically when its mtime/size signature changes. Artifacts are produced
+    offline (train.py); the registry only loads them, and get() returns None
+    while there is none. Only one thread loads at a time; concurrent callers
+    either reuse the current model or, when nothing is loaded yet, wait for
+    the in-flight load to finish.
+    """
+
+    def __init__(self, model_path, loader=load_pickle, check_interval=2.0):
+        self.model_path = model_path
+        self._loader = loader
+        self._check_interval = check_interval
+        self._load_lock = threading.Lock()
+        self._entry = None
+        self._next_check = 0.0
+
+    @property
+    def version(self):
+        entry = self._entry
+        return entry.version if entry is not None else None
+
+    @property
+    def loaded(self):
+        """Whether a model is in memory (get() will not block on the first load)"""
+        return self._entry is not None
+
+    def get(self):
+        """Return the current model, loading or reloading it if needed"""
+        entry = self._entry
+        if entry is not None and time.monotonic() < self._next_check:
+            return entry.model
+
+        if entry is not None:
+            # Someone else is already reloading: keep serving the current model
+            if not self._load_lock.acquire(blocking=False):
+                return entry.model
+        else:
+            self._load_lock.acquire()
+
+        try:
+            return self._refresh()
+        finally:
+            self._load_lock.release()
+
+    def invalidate(self):
+        """Drop the in-memory model so the next get() loads it from disk again"""
+        with self._load_lock:
+            self._entry = None
+            self._next_check = 0.0
+
+    def _refresh(self):
+        entry = self._entry
+        self._next_check = time.monotonic() + self._check_interval
+
+        version = file_version(self.model_path)
+        if entry is not None and version == entry.version:
+            return entry.model
+
+        if version is None:
+            # Artifact removed (or never trained): keep serving what is loaded
+            return entry.model if entry is not None else None
+
+        try:
+            model = self._loader(self.model_path)
+        except Exception as e:
+            logger.error("Error loading model from %s: %s", self.model_path, e)
+            return entry.model if entry is not None else None
+
+        self._entry = ModelEntry(model, version, time.time())
+        return model
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Upper bounds of the batch size histogram buckets (the last one is open-ended)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _Pending:
+    __slots__ = ('model', 'row', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, model, row):
+        self.model = model
+        self.row = row
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PredictBatcher:
+    """Coalesces concurrent single-row predictions into batched scoring calls.
+
+    submit() queues a feature row and blocks until it is scored. A worker
+    thread takes the oldest queued row, waits up to ``max_wait_ms`` for more
+    (or until ``max_batch_size`` are queued), stacks them into one matrix and
+    makes a single ``score(model, X)`` call, which returns (labels,
+    probabilities) for the rows in order. Rows queued against different
+    models are scored separately.
+
+    stats() reports the batch size distribution and how long rows waited in
+    the queue before their batch was scored.
+    """
+
+    def __init__(self, score, max_batch_size=64, max_wait_ms=2.0):
+        self._score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._worker = None
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = np.zeros(len(BATCH_SIZE_BUCKETS) + 1, dtype=np.int64)
+        self.queue_delay_sum = 0.0
+        self.queue_delay_max = 0.0
+
+    def submit(self, model, row):
+        """Score one feature row with model; returns (label, class probabilities)"""
+        pending = _Pending(model, row)
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+                self._worker.start()
+            self._queue.append(pending)
+            self._cond.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'batch_size_histogram': {
+                    (f"<={bound}" if bound is not None else f">{BATCH_SIZE_BUCKETS[-1]}"): int(count)
+                    for bound, count in zip(BATCH_SIZE_BUCKETS + (None,), self.batch_sizes)
+                },
+                'mean_queue_delay_ms': 1000 * self.queue_delay_sum / self.requests if self.requests else 0.0,
+                'max_queue_delay_ms': 1000 * self.queue_delay_max,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': 1000 * self.max_wait,
+            }
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.monotonic()
+            self._record(batch, started)
+
+            by_model = {}
+            for pending in batch:
+                by_model.setdefault(id(pending.model), []).append(pending)
+            for group in by_model.values():
+                try:
+                    labels, probabilities = self._score(group[0].model, np.array([p.row for p in group], dtype=np.float64))
+                    for pending, label, probability in zip(group, labels, probabilities):
+                        pending.result = (label, probability)
+                except Exception as e:
+                    for pending in group:
+                        pending.error = e
+                for pending in group:
+                    pending.done.set()
+
+    def _record(self, batch, started):
+        delays = [started - pending.enqueued for pending in batch]
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_sizes[np.searchsorted(BATCH_SIZE_BUCKETS, len(batch))] += 1
+            self.queue_delay_sum += sum(delays)
+            self.queue_delay_max = max(self.queue_delay_max, max(delays))
@@ -1,10 +1,16 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
 
+# pandas is imported inside the functions that need it: the scalar parsers
+# below serve /predict, which answers before the server has loaded pandas
+
+# Model input columns, in training order
+FEATURE_NAMES = ['Distance_numeric', 'KPT duration (minutes)', 'Rider wait time (minutes)', 'order_hour']
+
 def preprocess_input(data):
     """Preprocess input data for prediction"""
+    import pandas as pd
     df = pd.DataFrame([data])
     
     # Handle distance conversion
@@ -23,9 +29,17 @@ def preprocess_input(data):
     
     return df
 
+def _is_missing(value):
+    """pd.isna for one value (None, NaN, NaT or pd.NA)"""
+    try:
+        return value is None or bool(value != value)
+    except TypeError:
+        # pd.NA != pd.NA is pd.NA, which has no truth value
+        return True
+
 def convert_distance_to_numeric(distance_str):
     """Convert distance string to numeric value"""
-    if pd.isna(distance_str):
+    if _is_missing(distance_str):
         return 0
     
     distance_str = str(distance_str).lower()
@@ -40,7 +54,7 @@ def convert_distance_to_numeric(distance_str):
 
 def extract_hour(timestamp_str):
     """Extract hour from timestamp string"""
-    if pd.isna(timestamp_str):
+    if _is_missing(timestamp_str):
         return 12
     
     try:
@@ -53,21 +67,106 @@ def extract_hour(timestamp_str):
     except:
         return 12
 
-def clean_dataset(df):
-    """Clean and preprocess the full dataset"""
+def extract_day(timestamp_str):
+    """Extract the order date from timestamp string, as days since 1970-01-01 (-1 if missing)"""
+    if _is_missing(timestamp_str):
+        return -1
+    
+    try:
+        # "11:38 PM, September 10 2024": the date follows the first comma
+        date_part = str(timestamp_str).partition(',')[2].strip()
+        return (datetime.strptime(date_part, '%B %d %Y') - datetime(1970, 1, 1)).days
+    except ValueError:
+        return -1
+
+# Vectorized counterparts of the scalar functions above, for whole columns.
+# Order exports repeat the same few distance strings and timestamps many
+# times, so parsing runs over the distinct values only and is broadcast back.
+HOUR_PATTERN = r'^(1[0-2]|0[1-9]|[1-9]):(?:[0-5]\d|\d)\s+([AaPp][Mm])$'
+
+def _map_distinct(values, parse, na_value):
+    """Apply a vectorized parser to the distinct values of a column"""
+    import pandas as pd
+    values = pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object)).to_numpy()
+    # NaN/None get code -1, which picks na_value from the end
+    parsed = np.append(parsed, na_value)
+    return pd.Series(parsed[codes], index=values.index)
+
+def _parse_distances(distances):
+    text = distances.astype(str).str.lower()
+    numeric = text.str.extract(r'(\d+(?:\.\d+)?)', expand=False).astype(float)
+    less_than_1km = text.str.contains('<1km', regex=False) | text.str.contains('less than 1km', regex=False)
+    return numeric.mask(less_than_1km, 0.5).fillna(0)
+
+def _parse_hours(timestamps):
+    import pandas as pd
+    has_ampm = (timestamps.str.contains('AM', regex=False) | timestamps.str.contains('PM', regex=False))
+    has_ampm = has_ampm.fillna(False).astype(bool)
+    
+    # Same rules as strptime('%I:%M %p') on the part before the first comma
+    time_part = timestamps.where(has_ampm).str.split(',', n=1).str[0].str.strip()
+    parts = time_part.str.extract(HOUR_PATTERN)
+    hour = pd.to_numeric(parts[0], errors='coerce') % 12
+    hour = hour + np.where(parts[1].str.upper() == 'PM', 12, 0)
+    return hour.fillna(12).astype(int)
+
+def _parse_days(timestamps):
+    import pandas as pd
+    # "11:38 PM, September 10 2024" -> days since 1970-01-01
+    # A plain loop beats the .str accessor here: these are distinct values only
+    date_part = pd.Series([str(t).partition(',')[2].strip() for t in timestamps], dtype=object)
+    dates = pd.to_datetime(date_part, format='%B %d %Y', errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return pd.Series(np.where(dates.isna().to_numpy(), -1, days))
+
+def convert_distance_series(distances):
+    """Vectorized convert_distance_to_numeric over a Series"""
+    return _map_distinct(distances, _parse_distances, 0.0)
+
+def extract_hour_series(timestamps):
+    """Vectorized extract_hour over a Series"""
+    return _map_distinct(timestamps, _parse_hours, 12)
+
+def extract_day_series(timestamps):
+    """Order date as days since 1970-01-01 (-1 when missing or unparseable)"""
+    return _map_distinct(timestamps, _parse_days, -1)
+
+def create_performance_labels(df):
+    """Vectorized create_performance_label over a DataFrame"""
+    import pandas as pd
+    rating = df['Rating'] if 'Rating' in df.columns else pd.Series(3.0, index=df.index)
+    kpt_duration = df['KPT duration (minutes)'] if 'KPT duration (minutes)' in df.columns else pd.Series(15, index=df.index)
+    order_ready = df['Order Ready Marked'] if 'Order Ready Marked' in df.columns else pd.Series('Correctly', index=df.index)
+    
+    # NaN compares False everywhere, exactly like the row-wise version
+    correctly = (order_ready == 'Correctly').to_numpy()
+    good = (rating >= 4.0).to_numpy() & (kpt_duration <= 15).to_numpy() & correctly
+    poor = (rating <= 2.0).to_numpy() | (kpt_duration >= 25).to_numpy() | ~correctly
+    return pd.Series(np.select([good, poor], [1, 0], default=1), index=df.index)
+
+def clean_dataset(df, fill_medians=True):
+    """Clean and preprocess the full dataset
+
+    With fill_medians=False the KPT and rider wait gaps are left as NaN, for
+    callers that clean in chunks and fill with the global median later.
+    """
     # Convert distance to numeric
-    df['Distance_numeric'] = df['Distance'].apply(convert_distance_to_numeric)
+    df['Distance_numeric'] = convert_distance_series(df['Distance'])
     
-    # Extract order hour
-    df['order_hour'] = df['Order Placed At'].apply(extract_hour)
+    # Extract order hour and day
+    df['order_hour'] = extract_hour_series(df['Order Placed At'])
+    df['order_day'] = extract_day_series(df['Order Placed At'])
     
     # Create performance label based on rating and KPT duration
-    df['performance_label'] = df.apply(create_performance_label, axis=1)
+    df['performance_label'] = create_performance_labels(df)
     
     # Handle missing values
-    df['Rating'].fillna(3.0, inplace=True)
-    df['KPT duration (minutes)'].fillna(df['KPT duration (minutes)'].median(), inplace=True)
-    df['Rider wait time (minutes)'].fillna(df['Rider wait time (minutes)'].median(), inplace=True)
+    df['Rating'] = df['Rating'].fillna(3.0)
+    if fill_medians:
+        df['KPT duration (minutes)'] = df['KPT duration (minutes)'].fillna(df['KPT duration (minutes)'].median())
+        df['Rider wait time (minutes)'] = df['Rider wait time (minutes)'].fillna(df['Rider wait time (minutes)'].median())
     
     return df
 
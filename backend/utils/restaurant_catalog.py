@@ -0,0 +1,191 @@
+import numpy as np
+
+# City key of the restaurants offered when the requested city is not in the catalog
+FALLBACK_CITY = '*'
+
+# Side of a spatial grid cell in degrees (about 1.1 km of latitude)
+GRID_CELL_DEG = 0.01
+# Cell (row, col) is stored as the sortable key row * GRID_KEY_STRIDE + col
+GRID_KEY_STRIDE = 1 << 20
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat, lon, latitudes, longitudes):
+    """Great-circle distance in km from one point to arrays of points"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = (np.sin((latitudes - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(latitudes) * np.sin((longitudes - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def top_k(scores, k):
+    """Positions of the k highest scores, highest first; ties keep catalog order"""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        positions = np.sort(np.argpartition(-scores, k - 1)[:k])
+    else:
+        positions = np.arange(len(scores))
+    return positions[np.argsort(-scores[positions], kind='stable')]
+
+
+class RestaurantCatalog:
+    """Restaurant catalog held as NumPy columns and indexed once at load.
+
+    Rows are grouped by city and by (city, lower-cased cuisine), and every
+    row with coordinates is bucketed into a GRID_CELL_DEG spatial grid, so a
+    request only touches its candidate rows. Indexes map to sorted arrays of
+    row positions into the columns.
+
+    The grid is stored CSR-style: ``grid_keys`` holds the sorted keys of the
+    occupied cells and ``grid_rows[grid_starts[i]:grid_starts[i + 1]]`` the
+    rows in cell i. Cells of one grid row are adjacent, so a box query costs
+    two binary searches per grid row it spans plus the rows it returns.
+    within() and nearest() refine those candidates by haversine distance.
+    """
+
+    def __init__(self, frame):
+        import pandas as pd
+        frame = frame.reset_index(drop=True)
+        self.city = frame['city'].to_numpy(dtype=object)
+        self.vendor_id = frame['vendor_id'].to_numpy(dtype=np.int64)
+        self.name = frame['name'].to_numpy(dtype=object)
+        self.cuisine = frame['cuisine'].to_numpy(dtype=object)
+        self.rating = frame['rating'].to_numpy(dtype=np.float64)
+        self.distance = frame['distance'].to_numpy(dtype=np.float64)
+        self.latitude = frame['latitude'].to_numpy(dtype=np.float64)
+        self.longitude = frame['longitude'].to_numpy(dtype=np.float64)
+
+        rows = pd.Series(np.arange(len(frame)))
+        self.by_city = rows.groupby(frame['city'], sort=False).indices
+        self.by_cuisine = rows.groupby([frame['city'], frame['cuisine'].str.lower()], sort=False).indices
+        codes, cuisines = pd.factorize(frame['cuisine'].str.lower())
+        self.cuisine_code = codes.astype(np.int32)
+        self.cuisine_codes = {cuisine: code for code, cuisine in enumerate(cuisines)}
+
+        located = np.flatnonzero(~(np.isnan(self.latitude) | np.isnan(self.longitude)))
+        keys = self.cell_key(*self.cell_of(self.latitude[located], self.longitude[located]))
+        order = np.argsort(keys, kind='stable')
+        self.grid_rows = located[order]
+        self.grid_keys, starts = np.unique(keys[order], return_index=True)
+        self.grid_starts = np.append(starts, len(order))
+
+    def __len__(self):
+        return len(self.vendor_id)
+
+    @classmethod
+    def load(cls, path):
+        """Read a catalog CSV with city, vendor_id, name, cuisine, rating, distance, latitude, longitude"""
+        import pandas as pd
+        return cls(pd.read_csv(path, dtype={'city': str, 'name': str, 'cuisine': str}, keep_default_na=False,
+                               na_values={'latitude': [''], 'longitude': [''], 'rating': [''], 'distance': ['']}))
+
+    @staticmethod
+    def cell_of(latitude, longitude):
+        """Grid cell (row, column) of coordinates"""
+        return (np.floor(np.asarray(latitude) / GRID_CELL_DEG).astype(np.int64),
+                np.floor(np.asarray(longitude) / GRID_CELL_DEG).astype(np.int64))
+
+    @staticmethod
+    def cell_key(row, col):
+        return np.asarray(row, dtype=np.int64) * GRID_KEY_STRIDE + np.asarray(col, dtype=np.int64)
+
+    def candidates(self, city, cuisine=None):
+        """Row positions for a city (and cuisine), falling back to the default list for unknown cities"""
+        if city not in self.by_city:
+            city = FALLBACK_CITY
+        if cuisine:
+            return self.by_cuisine.get((city, cuisine.lower()), np.empty(0, dtype=np.int64))
+        return self.by_city.get(city, np.empty(0, dtype=np.int64))
+
+    def in_box(self, lat_min, lat_max, lon_min, lon_max):
+        """Row positions in the grid cells overlapping a lat/lon box (a superset of the rows inside it)"""
+        (row_lo, row_hi), (col_lo, col_hi) = self.cell_of([lat_min, lat_max], [lon_min, lon_max])
+        grid_rows = np.arange(row_lo, row_hi + 1)
+        first = np.searchsorted(self.grid_keys, self.cell_key(grid_rows, col_lo), side='left')
+        last = np.searchsorted(self.grid_keys, self.cell_key(grid_rows, col_hi), side='right')
+        found = [self.grid_rows[self.grid_starts[i]:self.grid_starts[j]] for i, j in zip(first, last) if j > i]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def in_radius_box(self, lat, lon, radius_km):
+        """Grid candidates for a circle: the rows in cells overlapping its bounding box"""
+        dlat = radius_km / KM_PER_DEGREE
+        widest = min(abs(lat) + dlat, 89.9)
+        dlon = min(radius_km / (KM_PER_DEGREE * np.cos(np.radians(widest))), 180.0)
+        return self.in_box(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+
+    def _located(self, rows, lat, lon, cuisine):
+        """Distances to rows, after dropping rows of other cuisines"""
+        if cuisine:
+            rows = rows[self.cuisine_code[rows] == self.cuisine_codes.get(cuisine.lower(), -1)]
+        return rows, haversine_km(lat, lon, self.latitude[rows], self.longitude[rows])
+
+    def within(self, lat, lon, radius_km, cuisine=None):
+        """Rows within radius_km of a point, nearest first; returns (rows, distances in km)"""
+        rows, distances = self._located(self.in_radius_box(lat, lon, radius_km), lat, lon, cuisine)
+        inside = distances <= radius_km
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
+
+    def nearest(self, lat, lon, k, cuisine=None, max_radius_km=50.0):
+        """The k rows nearest a point (within max_radius_km), nearest first; returns (rows, distances)
+
+        The search radius starts at one grid cell and doubles until it holds
+        k rows. Every row within the radius is among the candidates, so the
+        k nearest of those are the k nearest overall.
+        """
+        radius = GRID_CELL_DEG * KM_PER_DEGREE
+        while True:
+            radius = min(radius, max_radius_km)
+            rows, distances = self._located(self.in_radius_box(lat, lon, radius), lat, lon, cuisine)
+            inside = distances <= radius
+            if inside.sum() >= k or radius >= max_radius_km:
+                break
+            radius *= 2
+        rows, distances = rows[inside], distances[inside]
+        best = top_k(-distances, k)
+        return rows[best], distances[best]
+
+    def score(self, rows, age, rng, distances=None):
+        """Recommendation probability of each row, with jitter drawn from rng.
+
+        distances overrides the catalog's distance column with the computed
+        distance (km) from the customer to each row.
+        """
+        rating_score = self.rating[rows] / 5.0
+        distance = self.distance[rows] if distances is None else distances
+        distance_score = np.maximum(0, 1 - distance / 5.0)
+        age_preference = 0.9 if int(age) < 30 else 0.8
+
+        probability = rating_score * 0.4 + distance_score * 0.4 + age_preference * 0.2
+        probability = np.minimum(0.98, probability + (rng.random(len(rows)) * 0.1 - 0.05))
+        return np.round(probability, 3)
+
+    def records(self, rows, probabilities, distances=None):
+        """Response dicts for rows, in the given order"""
+        if distances is None:
+            distances = self.distance[rows]
+        else:
+            distances = np.round(distances, 2)
+        # Gather each column once and convert it with tolist() rather than field by field
+        latitude, longitude = self.latitude[rows], self.longitude[rows]
+        return [{
+            'vendor_id': vendor_id,
+            'name': name,
+            'cuisine': cuisine,
+            'rating': rating,
+            'distance': distance,
+            'latitude': lat,
+            'longitude': lon,
+            'probability': probability
+        } for vendor_id, name, cuisine, rating, distance, lat, lon, probability in zip(
+            self.vendor_id[rows].tolist(), self.name[rows].tolist(), self.cuisine[rows].tolist(),
+            self.rating[rows].tolist(), distances.tolist(),
+            np.where(np.isnan(latitude), None, latitude).tolist(),
+            np.where(np.isnan(longitude), None, longitude).tolist(),
+            probabilities.tolist()
+        )]
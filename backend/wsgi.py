@@ -0,0 +1,24 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module loads everything a request needs (see app.preload), so
+with gunicorn's preload_app it happens once in the master before forking.
+
+With ORDERLY_WARMUP=background each worker imports the app itself, starts
+serving at once and warms up on a background thread; GET /ready turns 200
+when it is done. That starts faster but every worker holds its own copy.
+"""
+import gc
+import os
+
+from app import app, preload, start_warmup
+
+if os.environ.get('ORDERLY_WARMUP', 'preload') == 'background':
+    start_warmup()
+else:
+    preload()
+
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collections in the workers don't write to (and un-share) those pages
+    gc.freeze()